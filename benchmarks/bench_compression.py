@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: CPU cost vs bytes saved for gzip levels and brotli qualities
+on search-sized JSON responses, to pick GZIP_LEVEL / BROTLI_QUALITY.
+
+Usage:
+    python benchmarks/bench_compression.py [response.json] ...
+
+Pass recorded /flight or /attraction responses. Without arguments synthetic
+responses of similar shape and size are used.
+"""
+import gzip, json, sys, time
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROUNDS = 20
+GZIP_LEVELS = (1, 5, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 11)
+
+
+def synthetic_flights(offers=60):
+    # /flight result with full legs arrays, a few hundred KB
+    legs = [
+        {"departureTime": f"2026-11-0{d}T0{h}:15:00", "arrivalTime": f"2026-11-0{d}T1{h}:40:00",
+         "departureAirport": {"code": "BAH", "name": "Bahrain International Airport", "cityName": "Manama"},
+         "arrivalAirport": {"code": "LHR", "name": "Heathrow Airport", "cityName": "London"},
+         "cabinClass": "ECONOMY", "flightInfo": {"flightNumber": 1000 + h, "carrierInfo": {"operatingCarrier": "GF"}},
+         "carriersData": [{"name": "Gulf Air", "code": "GF", "logo": "https://r-xx.bstatic.com/data/airlines_logo/GF.png"}]}
+        for d in range(1, 3) for h in range(3)
+    ]
+    flights = [
+        {"token": f"d6a1f_{i:05d}_H4sIAAAAAAAA_" + "x" * 120, "price": 150.5 + i, "currency": "BHD",
+         "duration_hours": 7.5 + i % 4, "stops": i % 3, "legs": legs}
+        for i in range(offers)
+    ]
+    return json.dumps({"status": "Ok", "data": {"outbound": flights, "return": flights}}).encode()
+
+
+def synthetic_attractions(products=50, days=120):
+    # /attraction result with availability lists, a few hundred KB
+    attractions = [
+        {"id": f"PRF{i:06d}", "name": f"Attraction {i}", "shortDescription": "Guided tour of the old town " * 4,
+         "price": 12.5 + i, "currency": "BHD", "reviewsStats": {"combinedNumericStats": {"average": 4.6, "total": 120 + i}},
+         "availability": [{"date": f"2026-{11 + d // 31:02d}-{d % 31 + 1:02d}", "available": d % 5 != 0}
+                          for d in range(days)]}
+        for i in range(products)
+    ]
+    return json.dumps({"status": "Ok", "data": attractions}).encode()
+
+
+def codecs():
+    for level in GZIP_LEVELS:
+        yield f"gzip-{level}", lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0)
+    if brotli is not None:
+        for quality in BROTLI_QUALITIES:
+            yield f"br-{quality}", lambda body, quality=quality: brotli.compress(body, quality=quality)
+
+
+def measure(compress, body):
+    compressed = compress(body)
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        compress(body)
+    cpu_ms = (time.process_time() - started) / ROUNDS * 1000
+    return len(compressed), cpu_ms
+
+
+def main(argv):
+    if argv:
+        payloads = [(Path(p).name, Path(p).read_bytes()) for p in argv]
+    else:
+        payloads = [("flights", synthetic_flights()), ("attractions", synthetic_attractions())]
+
+    print(f"{'payload':>12} {'KB':>6} {'codec':>8} {'out KB':>7} {'saved':>6} {'cpu ms':>7} {'KB saved/ms':>11}")
+    for name, body in payloads:
+        for codec, compress in codecs():
+            size, cpu_ms = measure(compress, body)
+            saved_kb = (len(body) - size) / 1024
+            print(f"{name:>12} {len(body) / 1024:>6.0f} {codec:>8} {size / 1024:>7.1f} "
+                  f"{1 - size / len(body):>6.1%} {cpu_ms:>7.2f} {saved_kb / max(cpu_ms, 1e-6):>11.0f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,89 @@
+"""
+Micro-benchmark: full json.loads vs streamed partial parse of HOTEL_PHOTO_URL payloads.
+
+Usage:
+    python benchmarks/bench_hotel_photo_parse.py [payload.json hotel_id] ...
+
+Pass recorded photo responses (saved raw from the API) with the hotel id each one
+was requested for. Without arguments a synthetic payload of similar shape is used.
+"""
+import json, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.photo_parser import HotelPhotoExtractor
+
+CHUNK_SIZE = 64 * 1024  # roughly what httpx yields per aiter_bytes() step
+ROUNDS = 20
+
+
+def synthetic_payload(hotel_id=123456, photos=2000):
+    # Same nesting as the real payload: data.data[hotel_id] is a list of photo
+    # records whose 5th element holds the size variants, url_prefix comes last
+    records = [
+        [i, f"Photo {i}", [i, i + 1], {"tags": ["room", "view"]},
+         [f"/xdata/images/hotel/square60/{i}.jpg", f"/max300/{i}.jpg", f"/max500/{i}.jpg",
+          f"/max750/{i}.jpg", f"/max1024x768/{i}.jpg", f"/max1280x900/{i}.jpg"],
+         None]
+        for i in range(photos)
+    ]
+    payload = {
+        "status": True,
+        "data": {"data": {str(hotel_id): records}, "url_prefix": "https://cf.bstatic.com"},
+    }
+    return json.dumps(payload).encode(), hotel_id
+
+
+def chunked(body):
+    return [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+
+
+def full_parse(chunks, hotel_id):
+    # What get_hotel_full_detail used to do: buffer the body, then resp.json()
+    data = json.loads(b"".join(chunks))
+    photo = data.get("data", {}).get("data", {}).get(str(hotel_id), [[[], [], [], [], []]])[0][4][5]
+    return data.get("data", {}).get("url_prefix", ""), photo
+
+
+def streamed_parse(chunks, hotel_id):
+    # Same loop as extract_hotel_photo, without the event loop around it
+    extractor = HotelPhotoExtractor(hotel_id)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    extractor.close()
+    return extractor.result()
+
+
+def measure(fn, chunks, hotel_id):
+    result = fn(chunks, hotel_id)
+
+    started = time.process_time()
+    for _ in range(ROUNDS):
+        fn(chunks, hotel_id)
+    cpu_ms = (time.process_time() - started) / ROUNDS * 1000
+
+    tracemalloc.start()
+    fn(chunks, hotel_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, cpu_ms, peak / 1024
+
+
+def main(argv):
+    if argv:
+        payloads = [(Path(p).read_bytes(), h) for p, h in zip(argv[::2], argv[1::2])]
+    else:
+        payloads = [synthetic_payload()]
+
+    print(f"{'payload KB':>10} {'method':>8} {'cpu ms':>8} {'peak KB':>9}  result")
+    for body, hotel_id in payloads:
+        chunks = chunked(body)
+        for name, fn in (("full", full_parse), ("stream", streamed_parse)):
+            result, cpu_ms, peak_kb = measure(fn, chunks, hotel_id)
+            print(f"{len(body) / 1024:>10.0f} {name:>8} {cpu_ms:>8.2f} {peak_kb:>9.0f}  {''.join(result)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,57 @@
+"""
+Cold-start import cost of the application, for tracking in CI.
+
+Usage:
+    python benchmarks/import_time.py [--module main] [--top 15] [--max-ms 1500]
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter, prints
+the total and the slowest imports (cumulative), and exits with status 1 when the
+total exceeds --max-ms.
+"""
+import argparse, subprocess, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def measure(module: str):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(proc.stderr.splitlines()[-1] if proc.stderr else f"import {module} failed")
+
+    # Lines look like: "import time:       self |  cumulative | indented.module"
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    rows = measure(args.module)
+    total_ms = next(c for name, _, c in rows if name.strip() == args.module) / 1000
+
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {name.strip()}")
+    print(f"\nimport {args.module}: {total_ms:.1f} ms")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"Import time above budget of {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
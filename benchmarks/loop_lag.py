@@ -0,0 +1,76 @@
+"""
+Event-loop lag while large upstream JSON payloads are decoded and re-encoded.
+
+Usage:
+    python benchmarks/loop_lag.py [payload.json] [--requests 50] [--concurrency 10]
+
+Replays the cached_get hot path (decode the upstream response, encode it for
+the cache) for a recorded payload, or a synthetic flight search of similar
+shape, while a ticker measures how late the loop wakes up. Compares the
+stdlib json module on the loop (before) with services.json_codec (after).
+"""
+import argparse, asyncio, json, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config.loop_monitor import LoopLagMonitor
+from services import json_codec
+
+TICK = 0.005
+
+
+def synthetic_payload(offers=400):
+    segment = {
+        "departureAirport": {"code": "BAH", "name": "Bahrain International Airport", "cityName": "Manama"},
+        "arrivalAirport": {"code": "LHR", "name": "Heathrow Airport", "cityName": "London"},
+        "departureTime": "2025-09-01T08:05:00", "arrivalTime": "2025-09-01T12:55:00",
+        "legs": [{"flightInfo": {"flightNumber": i, "carrierInfo": {"operatingCarrier": "GF"}},
+                  "carriersData": [{"name": "Gulf Air", "logo": "https://example.com/gf.png"}]} for i in range(3)],
+        "travellerCheckedLuggage": [{"luggageAllowance": {"maxPiece": 2, "maxWeightPerPiece": 23}}],
+    }
+    offer = {"token": "x" * 200, "segments": [segment, segment], "travellers": [{"travellerReference": "1"}],
+             "priceBreakdown": {"total": {"currencyCode": "USD", "units": 640, "nanos": 0}}}
+    return json.dumps({"status": True, "data": {"flightOffers": [dict(offer, token=f"{i:0200d}") for i in range(offers)]}})
+
+
+async def stdlib_path(raw):
+    return json.dumps(json.loads(raw))
+
+
+async def codec_path(raw):
+    return await json_codec.encode(await json_codec.decode(raw), size_hint=len(raw))
+
+
+async def measure(path, raw, requests, concurrency):
+    monitor = LoopLagMonitor(interval=TICK, warn_ms=float("inf"))
+    ticker = asyncio.create_task(monitor.run())
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            await path(raw)
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+    ticker.cancel()
+    return {**monitor.report(), "total_s": round(elapsed, 3)}
+
+
+async def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("payload", nargs="?", help="recorded upstream response (JSON file)")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    raw = Path(args.payload).read_text() if args.payload else synthetic_payload()
+    print(f"payload: {len(raw) / 1024:.0f} KB, offload threshold: {json_codec.OFFLOAD_BYTES / 1024:.0f} KB")
+    for name, path in (("json on loop", stdlib_path), ("json_codec", codec_path)):
+        print(f"{name:<14} {await measure(path, raw, args.requests, args.concurrency)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
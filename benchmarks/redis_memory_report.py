@@ -0,0 +1,53 @@
+"""
+Redis memory per cache namespace, to compare before and after a caching change.
+
+Usage:
+    python benchmarks/redis_memory_report.py [--match 'http_cache:*'] [--sample 50]
+                                             [--save before.json] [--compare before.json]
+
+Uses the app's Redis settings. Scans incrementally (SCAN) and estimates sizes
+from MEMORY USAGE on a sample of keys per namespace.
+"""
+import argparse, asyncio, json, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.cache_admin import namespace_memory_report
+
+
+def print_report(report, baseline=None):
+    baseline = baseline or {}
+    print(f"{'namespace':<28} {'keys':>8} {'avg B':>8} {'est KB':>10} {'delta KB':>10}")
+    for namespace in sorted(set(report) | set(baseline), key=lambda n: -report.get(n, {}).get("est_bytes", 0)):
+        now = report.get(namespace, {"keys": 0, "avg_bytes": 0, "est_bytes": 0})
+        delta = ""
+        if baseline:
+            delta = f"{(now['est_bytes'] - baseline.get(namespace, {}).get('est_bytes', 0)) / 1024:>+10.1f}"
+        print(f"{namespace:<28} {now['keys']:>8} {now['avg_bytes']:>8} {now['est_bytes'] / 1024:>10.1f} {delta}")
+
+    total = sum(entry["est_bytes"] for entry in report.values())
+    line = f"\ntotal: {total / 1024:.1f} KB"
+    if baseline:
+        before = sum(entry["est_bytes"] for entry in baseline.values())
+        line += f" (before: {before / 1024:.1f} KB, {(total - before) / 1024:+.1f} KB)"
+    print(line)
+
+
+async def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--match", default="*")
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--save", help="write the report as JSON, e.g. before a deploy")
+    parser.add_argument("--compare", help="JSON report to show deltas against")
+    args = parser.parse_args(argv)
+
+    report = await namespace_memory_report(args.match, args.sample)
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:]))
@@ -2,14 +2,12 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-import jwt, os
+import jwt
 from passlib.context import CryptContext
 from models.user import User
-from dotenv import load_dotenv
+from config.settings import get_settings
 
-# Load environment variables from the .env file
-# This must be done before calling os.getenv() to ensure variables are available
-load_dotenv()
+settings = get_settings()
 
 # Password hashing context using bcrypt
 # 'deprecated="auto"' allows Passlib to handle outdated hashes automatically
@@ -46,10 +44,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     to_encode = data.copy()  # Make a copy so we don't modify the original data
     # Set token expiration time (either provided or default from env variable)
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))))
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=settings.access_token_expire_minutes))
     to_encode.update({"exp": expire})  # Add expiration claim
     # Encode the token using the secret key and algorithm from environment variables
-    return jwt.encode(to_encode, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM"))
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 def decode_access_token(token: str):
     """
@@ -65,7 +63,7 @@ def decode_access_token(token: str):
         HTTPException: If the token is invalid or expired.
     """
     try:
-        return jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=[os.getenv("ALGORITHM")])
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
     except jwt.PyJWTError:
         # Any JWT decoding error will raise an HTTP 401 Unauthorized
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -93,3 +91,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
     return user
+
+async def get_admin_user(current_user: User = Depends(get_current_user)):
+    """
+    Dependency for the /admin endpoints: the current user, if their email is
+    listed in the ADMIN_EMAILS setting.
+    """
+    admins = {email.strip().lower() for email in settings.admin_emails.split(",") if email.strip()}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
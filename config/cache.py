@@ -0,0 +1,322 @@
+import logging, time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from redis.exceptions import RedisError
+from config.redis_client import get_redis_client
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Default TTL in seconds per key namespace (the part of the key before the first ":"),
+# used when a caller does not pass one
+NAMESPACE_TTLS = {
+    "http_cache": 3600,
+    "weather": settings.weather_cache_ttl,
+    "exchange_rates": 86400,
+    "flights": 86400,
+    "flight_price": settings.flight_price_ttl or 86400,
+    "flight_flex": settings.flight_flex_cell_ttl,
+    "airport_info": 86400,
+    "hotel_location_id": 86400,
+    "hotel_reviews": 86400,
+    "hotel_full_detail": 86400,
+    "hotel_store": 86400,
+    "attraction_autocomplete": 86400,
+    "attraction_search": 86400,
+    "availability": 86400,
+    "attraction_detail": 86400,
+    "availability_bitmap": 86400,
+}
+DEFAULT_TTL = 3600
+
+# Hash of hit/miss counters per namespace, flushed from every worker
+STATS_KEY = "cache:stats"
+
+# Entries written with serve_stale carry their own freshness deadline,
+# SOFT_MARK<unix expiry>SOFT_MARK<value>: past it they read as a miss, but the
+# same key is kept for another STALE_TTL for get_stale() during upstream outages
+SOFT_MARK = "\x1f"
+STALE_TTL = settings.stale_cache_ttl
+
+
+def key_namespace(key: str) -> str:
+    """
+    Namespace of a cache key: its first segment, or the first two for the
+    hash:/negative: companions (e.g. "hash:http_cache").
+    """
+    parts = key.split(":", 2)
+    if parts[0] in ("hash", "negative") and len(parts) > 1:
+        return f"{parts[0]}:{parts[1]}"
+    return parts[0]
+
+
+def namespace_ttl(key: str) -> int:
+    return NAMESPACE_TTLS.get(key.split(":", 1)[0], DEFAULT_TTL)
+
+
+def effective_ttl(key: str, ttl: Optional[int]) -> int:
+    """
+    TTL for a write: a CACHE_TTLS override for the key's namespace wins over the
+    caller's TTL, which wins over the namespace default.
+    """
+    return settings.cache_ttls.get(key_namespace(key)) or ttl or namespace_ttl(key)
+
+
+def with_soft_expiry(value, ttl: int):
+    """
+    Wrap a value (str or bytes) with its soft expiry. Returns (stored value, hard TTL).
+    """
+    header = f"{SOFT_MARK}{int(time.time()) + ttl}{SOFT_MARK}"
+    stored = header.encode() + value if isinstance(value, bytes) else header + value
+    return stored, ttl + STALE_TTL
+
+
+def unwrap(value, fresh_only: bool):
+    """
+    Strip the soft-expiry header of a stored value. With fresh_only, entries past
+    their soft expiry read as None. Values without a header are returned as stored.
+    """
+    mark = SOFT_MARK.encode() if isinstance(value, bytes) else SOFT_MARK
+    if not isinstance(value, (str, bytes)) or not value.startswith(mark):
+        return value
+    _, expires_at, value = value.split(mark, 2)
+    if fresh_only and int(expires_at) <= time.time():
+        return None
+    return value
+
+
+class MemoryStore:
+    """
+    Bounded in-process LRU with per-key expiry, used while Redis is unavailable.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str, ttl: int):
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self.entries.pop(key, None)
+
+
+class CacheBackend:
+    """
+    The cache every service goes through: Redis when it is healthy, otherwise a
+    bounded in-process store, so a Redis outage degrades caching instead of
+    failing requests.
+    After a Redis error the backend stays on the memory store and only retries
+    Redis once the reconnect backoff has passed (doubling up to a maximum).
+    """
+
+    def __init__(self, max_memory_entries: int = settings.memory_cache_max_entries,
+                 backoff: float = settings.cache_reconnect_backoff,
+                 max_backoff: float = settings.cache_reconnect_max_backoff):
+        self.memory = MemoryStore(max_memory_entries)
+        self.base_backoff = backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.retry_at = 0.0
+        self.last_error = None
+        # Hits and misses per namespace since the last flush_stats()
+        self.stats = defaultdict(lambda: [0, 0])
+
+    def _count(self, keys, values):
+        for key, value in zip(keys, values):
+            self.stats[key_namespace(key)][0 if value is not None else 1] += 1
+
+    async def flush_stats(self):
+        """
+        Add the local hit/miss counters to the shared STATS_KEY hash and reset them.
+        """
+        stats, self.stats = self.stats, defaultdict(lambda: [0, 0])
+        if not stats or not self.redis_available():
+            return
+        try:
+            async with get_redis_client().pipeline(transaction=False) as pipe:
+                for namespace, (hits, misses) in stats.items():
+                    pipe.hincrby(STATS_KEY, f"{namespace}:hits", hits)
+                    pipe.hincrby(STATS_KEY, f"{namespace}:misses", misses)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            self.record_failure(e)
+
+    # ---- health tracking ----
+
+    def redis_available(self) -> bool:
+        return self.failures == 0 or time.monotonic() >= self.retry_at
+
+    def record_success(self):
+        if self.failures:
+            logger.info("Redis reachable again, leaving in-memory cache fallback")
+        self.failures = 0
+        self.last_error = None
+
+    def record_failure(self, error: Exception):
+        if not self.failures:
+            logger.warning("Redis unavailable, falling back to in-memory cache: %s", error)
+        self.failures += 1
+        self.last_error = str(error)
+        backoff = min(self.base_backoff * 2 ** (self.failures - 1), self.max_backoff)
+        self.retry_at = time.monotonic() + backoff
+
+    def health(self) -> dict:
+        return {
+            "backend": "redis" if self.failures == 0 else "memory",
+            "consecutive_failures": self.failures,
+            "retry_in": round(max(self.retry_at - time.monotonic(), 0), 1) if self.failures else 0,
+            "last_error": self.last_error,
+            "memory_entries": len(self.memory.entries),
+        }
+
+    # ---- operations ----
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.get_many([key]))[0]
+
+    async def _fetch(self, keys: List[str]) -> list:
+        values = None
+        if self.redis_available():
+            try:
+                values = await get_redis_client().mget(keys)
+                self.record_success()
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        if values is None:
+            values = [self.memory.get(key) for key in keys]
+        return values
+
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """
+        Fresh values of `keys`; entries past their soft expiry read as None.
+        """
+        if not keys:
+            return []
+        values = [unwrap(value, fresh_only=True) for value in await self._fetch(keys)]
+        self._count(keys, values)
+        return values
+
+    async def get_stale(self, key: str) -> Optional[str]:
+        """
+        The value of `key` even past its soft expiry, as long as it is still stored.
+        """
+        return unwrap((await self._fetch([key]))[0], fresh_only=False)
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None):
+        await self.set_many([(key, value, ttl)])
+
+    async def set_many(self, entries: Iterable[Tuple]):
+        """
+        Write (key, value, ttl[, serve_stale]) entries in one pipeline; a None ttl
+        uses the namespace TTL (see effective_ttl). With serve_stale the entry is
+        fresh for ttl and then kept for get_stale() (see with_soft_expiry).
+        """
+        entries = [self._prepare(*entry) for entry in entries]
+        if self.redis_available():
+            try:
+                async with get_redis_client().pipeline(transaction=False) as pipe:
+                    for key, value, ttl in entries:
+                        pipe.setex(key, ttl, value)
+                    await pipe.execute()
+                self.record_success()
+                return
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        for key, value, ttl in entries:
+            self.memory.set(key, value, ttl)
+
+    @staticmethod
+    def _prepare(key: str, value, ttl: Optional[int], serve_stale: bool = False):
+        ttl = effective_ttl(key, ttl)
+        if serve_stale:
+            value, ttl = with_soft_expiry(value, ttl)
+        return key, value, ttl
+
+    async def delete(self, *keys: str) -> int:
+        for key in keys:
+            self.memory.delete(key)
+        if self.redis_available():
+            try:
+                deleted = await get_redis_client().delete(*keys)
+                self.record_success()
+                return deleted
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        return 0
+
+    # ---- hashes ----
+
+    async def hash_get(self, key: str, *fields: str) -> List[Optional[str]]:
+        if not fields:
+            return []  # HMGET needs at least one field
+        if self.redis_available():
+            try:
+                values = await get_redis_client().hmget(key, fields)
+                self.record_success()
+                return values
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        entry = self.memory.get(key) or {}
+        return [entry.get(field) for field in fields]
+
+    async def hash_get_all(self, key: str) -> Dict[str, str]:
+        if self.redis_available():
+            try:
+                values = await get_redis_client().hgetall(key)
+                self.record_success()
+                return values
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        return dict(self.memory.get(key) or {})
+
+    async def hash_set_nx(self, key: str, fields: Dict[str, str], ttl: Optional[int] = None) -> List[bool]:
+        """
+        Set each hash field unless it exists (HSETNX, so concurrent writers never
+        overwrite each other) and refresh the key's TTL, in one pipeline.
+        Returns, per field, whether it was written.
+        """
+        ttl = effective_ttl(key, ttl)
+        if self.redis_available():
+            try:
+                async with get_redis_client().pipeline(transaction=False) as pipe:
+                    for field, value in fields.items():
+                        pipe.hsetnx(key, field, value)
+                    pipe.expire(key, ttl)
+                    results = await pipe.execute()
+                self.record_success()
+                return [bool(result) for result in results[:-1]]
+            except (RedisError, OSError) as e:
+                self.record_failure(e)
+        entry = dict(self.memory.get(key) or {})
+        written = [field not in entry for field in fields]
+        for field, value in fields.items():
+            entry.setdefault(field, value)
+        self.memory.set(key, entry, ttl)
+        return written
+
+
+_cache = CacheBackend()
+
+
+def get_cache() -> CacheBackend:
+    return _cache
+
+
+def cache_health() -> Dict[str, object]:
+    return _cache.health()
@@ -0,0 +1,162 @@
+import gzip, hashlib
+from collections import OrderedDict
+from config.settings import get_settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip alone is used without it
+    brotli = None
+
+settings = get_settings()
+
+# Bodies smaller than this are sent as-is: compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = settings.compression_min_size
+
+# Speed/ratio trade-off, see benchmarks/bench_compression.py
+GZIP_LEVEL = settings.gzip_level
+BROTLI_QUALITY = settings.brotli_quality
+
+# Compressed bodies kept per (body digest, encoding) so repeated search responses are not recompressed
+COMPRESSION_CACHE_SIZE = settings.compression_cache_size
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, honouring q-values.
+    Returns None if the client accepts neither.
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = max(supported, key=lambda enc: weights.get(enc, weights.get("*", 0)))
+    return best if weights.get(best, weights.get("*", 0)) > 0 else None
+
+
+def body_digest(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()
+
+
+def weak_etag(etag: bytes) -> bytes:
+    """
+    The weak form of an ETag: the identity, gzip and br variants of a response
+    share it, so it must not claim byte-for-byte equality.
+    """
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+
+class CompressedBodyCache:
+    """
+    Small LRU of compressed response bodies keyed by (digest of the uncompressed body, encoding).
+    The ETag is not part of the key: it is set by each route and need not change with every byte.
+    """
+
+    def __init__(self, max_entries: int = COMPRESSION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, digest: str, encoding: str):
+        body = self.entries.get((digest, encoding))
+        if body is not None:
+            self.entries.move_to_end((digest, encoding))
+        return body
+
+    def set(self, digest: str, encoding: str, body: bytes):
+        self.entries[(digest, encoding)] = body
+        self.entries.move_to_end((digest, encoding))
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON/text responses with brotli or gzip,
+    negotiated from Accept-Encoding. Only complete (single-message) bodies of at
+    least COMPRESSION_MIN_SIZE bytes are compressed; streamed responses pass through.
+    """
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+        self.cache = CompressedBodyCache()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until the body tells us whether to compress
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            response_headers = [(k.lower(), v) for k, v in start.get("headers", [])]
+            header_map = dict(response_headers)
+            content_type = header_map.get(b"content-type", b"").decode("latin-1")
+
+            if (message.get("more_body", False) or len(body) < self.min_size
+                    or b"content-encoding" in header_map
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                await send(start)
+                await send(message)
+                return
+
+            # Only responses with an ETag are worth caching: they are the repeated search responses
+            etag = header_map.get(b"etag")
+            digest = body_digest(body) if etag else None
+            compressed = self.cache.get(digest, encoding) if digest else None
+            if compressed is None:
+                compressed = compress(body, encoding)
+                if digest:
+                    self.cache.set(digest, encoding, compressed)
+
+            response_headers = [(k, v) for k, v in response_headers if k not in (b"content-length", b"vary", b"etag")]
+            vary = header_map.get(b"vary")
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            if etag:
+                response_headers.append((b"etag", weak_etag(etag)))
+            await send({**start, "headers": response_headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def init_compression(app):
+
+    # Compress large JSON responses (flights with legs, attractions with availability)
+    app.add_middleware(CompressionMiddleware)
@@ -1,14 +1,13 @@
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-import os
-# Load .env before using os.getenv
-load_dotenv() 
+from config.settings import get_settings
+
+settings = get_settings()
 
 
 def init_cors(app):
     
     # Detect the environment: development or production
-    ENV = os.getenv("ENV")  # Default to "development" if not set
+    ENV = settings.env  # Default to "development" if not set
 
     if ENV == "dev":
         # Allowed origins in development environment
@@ -0,0 +1,141 @@
+import asyncio, time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from config.settings import get_settings
+
+settings = get_settings()
+
+# End-to-end budget in seconds for each route, covering every Redis and upstream call it makes
+ROUTE_DEADLINES = {
+    "hotel": settings.hotel_request_deadline,
+    "hotel_details": settings.hotel_details_request_deadline,
+    "hotel_batch": settings.hotel_batch_request_deadline,
+    "flight": settings.flight_request_deadline,
+    "flight_prices": settings.flight_prices_request_deadline,
+    "flight_flex": settings.flight_flex_request_deadline,
+    "attraction": settings.attraction_request_deadline,
+    "weather": settings.weather_request_deadline,
+}
+
+# Absolute time.monotonic() deadline of the current request, None outside a request
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Interactive requests currently being served, so background work can stay out of their way
+_interactive_requests = 0
+
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when the current request has no time budget left.
+    """
+
+    def __init__(self):
+        super().__init__("Request deadline exceeded")
+
+
+def set_deadline(seconds: float):
+    """
+    Start a deadline `seconds` from now for the current context. Returns the ContextVar token.
+    """
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the current deadline, None if no deadline is set.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout_for(default: float) -> float:
+    """
+    Timeout for the next call: the default, capped by what is left of the deadline.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded()
+    return min(default, left)
+
+
+@asynccontextmanager
+async def deadline_scope():
+    """
+    Cancel the enclosed block when the current deadline passes, raising DeadlineExceeded.
+    """
+    left = remaining()
+    if left is None:
+        yield
+        return
+    if left <= 0:
+        raise DeadlineExceeded()
+    try:
+        async with asyncio.timeout(left):
+            yield
+    except TimeoutError:
+        raise DeadlineExceeded()
+
+
+async def bound_by_deadline(awaitable):
+    """
+    Await `awaitable` within the remaining budget of the current deadline.
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()  # never started, avoid the "never awaited" warning
+        raise DeadlineExceeded()
+    async with deadline_scope():
+        return await awaitable
+
+
+async def sleep_within_deadline(seconds: float):
+    """
+    asyncio.sleep() that fails fast instead of sleeping past the deadline (e.g. retry backoff).
+    """
+    left = remaining()
+    if left is not None and seconds >= left:
+        raise DeadlineExceeded()
+    await asyncio.sleep(seconds)
+
+
+def interactive_requests() -> int:
+    return _interactive_requests
+
+
+@contextmanager
+def interactive():
+    """
+    Count the enclosed block as an interactive request, so background work steps aside.
+    """
+    global _interactive_requests
+    _interactive_requests += 1
+    try:
+        yield
+    finally:
+        _interactive_requests -= 1
+
+
+def request_deadline(route: str):
+    """
+    FastAPI dependency setting the deadline of `route` for the whole request,
+    and counting the request as interactive while it is served.
+    Must stay async so the ContextVar is set in the request's own context.
+    The dependency exits before a StreamingResponse body runs, so streaming
+    routes count their body themselves (see interactive()).
+    """
+    seconds = ROUTE_DEADLINES[route]
+
+    async def set_route_deadline():
+        set_deadline(seconds)
+        with interactive():
+            yield
+
+    return set_route_deadline
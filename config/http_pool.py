@@ -0,0 +1,31 @@
+import httpx
+from config.settings import get_settings
+
+settings = get_settings()
+
+# One connection pool shared by every upstream call, opened at startup and closed on shutdown
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    The shared AsyncClient. Created on first use if startup has not opened it yet.
+    Callers must not close it (no `async with get_http_client()`).
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.http_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
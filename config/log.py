@@ -0,0 +1,194 @@
+import atexit, json, logging, queue, random, re, sys, time, uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Id and start time of the request being served, attached to every log line it produces
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+request_started_var: ContextVar[Optional[float]] = ContextVar("request_started", default=None)
+
+# Dict keys whose values never reach the logs, matched case-insensitively as substrings
+SECRET_KEYS = ("password", "secret", "token", "authorization", "api_key", "apikey", "rapidapi-key", "cookie")
+REDACTED = "***"
+SECRET_PATTERNS = [
+    re.compile(r"(?i)(bearer\s+)[\w\-.~+/]+=*"),
+    # key=value and "key": "value" pairs
+    re.compile(r'(?i)((?:password|secret|token|api[_-]?key|authorization)["\']?\s*[:=]\s*["\']?)[^\s"\'&,}]+'),
+    # API keys in query strings, e.g. the weather API's ?key=
+    re.compile(r"(?i)([?&](?:key|appid|access_key)=)[^&\s\"']+"),
+    # bare JWTs
+    re.compile(r"()eyJ[\w-]+\.[\w-]+\.[\w-]+"),
+]
+
+# Attributes every LogRecord has; anything else was passed with extra= and is logged as a field
+STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def redact(value):
+    """
+    Mask secrets in a log message or extra field: values under secret-looking
+    keys, key=value pairs, bearer tokens and JWTs.
+    """
+    if isinstance(value, str):
+        for pattern in SECRET_PATTERNS:
+            value = pattern.sub(lambda match: match.group(1) + REDACTED, value)
+        return value
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if any(secret in str(key).lower() for secret in SECRET_KEYS) else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamp records with the current request id and the time since the request
+    started. Runs in the logging caller's context, before the record is queued.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        started = request_started_var.get()
+        record.elapsed_ms = round((time.perf_counter() - started) * 1000, 1) if started is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of DEBUG/INFO records for loggers listed in LOG_SAMPLING
+    (longest matching module prefix wins). Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: dict):
+        super().__init__()
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: timestamp, level, logger, message, request id,
+    elapsed time and any extra= fields, with secrets redacted.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+            entry["elapsed_ms"] = record.elapsed_ms
+        for key, value in vars(record).items():
+            if key not in STANDARD_ATTRS and key not in entry and key not in ("request_id", "elapsed_ms"):
+                entry[key] = REDACTED if any(secret in key.lower() for secret in SECRET_KEYS) else redact(value)
+        if record.exc_info:
+            entry["exc_info"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging():
+    """
+    Route all logging through a queue: callers only enqueue the record, and a
+    listener thread formats and writes it, so a slow stdout never blocks the
+    event loop. Levels come from LOG_LEVEL and the per-module LOG_LEVELS.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    handler = QueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(SamplingFilter(settings.log_sampling))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(settings.log_level.upper())
+    for name, level in settings.log_levels.items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """
+    Flush queued records and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+access_logger = logging.getLogger("access")
+
+
+class RequestLoggingMiddleware:
+    """
+    Pure ASGI middleware: assign every request an id (X-Request-ID if the client
+    sent one), expose it on the response and log one access line with status
+    and duration when the response is complete.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        request_id = (headers.get(b"x-request-id") or b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        request_id_var.set(request_id)
+        request_started_var.set(time.perf_counter())
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            access_logger.info(
+                "%s %s %s", scope["method"], scope["path"], status,
+                extra={"method": scope["method"], "path": scope["path"], "status": status},
+            )
+
+
+def init_logging(app):
+
+    # Structured, queue-backed logging with a request id on every line
+    setup_logging()
+    app.add_middleware(RequestLoggingMiddleware)
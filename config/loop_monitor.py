@@ -0,0 +1,50 @@
+import asyncio, logging
+from collections import deque
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Lag samples kept for the percentiles reported by /ready (about 5 minutes at the default interval)
+WINDOW = 600
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how much later than scheduled a periodic sleep wakes up.
+    Anything running on the loop without awaiting (e.g. decoding a large JSON
+    payload) shows up here as lag for every other request.
+    """
+
+    def __init__(self, interval: float = settings.loop_lag_interval, warn_ms: float = settings.loop_lag_warn_ms):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.samples = deque(maxlen=WINDOW)
+        self.max_ms = 0.0
+
+    def record(self, lag_ms: float):
+        self.samples.append(lag_ms)
+        self.max_ms = max(self.max_ms, lag_ms)
+        if lag_ms >= self.warn_ms:
+            logger.warning("Event loop lagged %.0fms", lag_ms, extra={"lag_ms": round(lag_ms, 1)})
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (loop.time() - scheduled) * 1000))
+
+    def report(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"samples": 0}
+        return {
+            "samples": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 2),
+            "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+loop_monitor = LoopLagMonitor()
@@ -1,18 +1,57 @@
 import redis.asyncio as redis
-import os
-from dotenv import load_dotenv
+import inspect, functools
+from redis.asyncio.client import Pipeline
+from config.settings import get_settings
+from config.deadline import bound_by_deadline
 
-load_dotenv()
+settings = get_settings()
 
 _redis_client = redis.Redis(
-    host=os.getenv("REDIS_HOST"),
-    port=int(os.getenv("REDIS_PORT")),
-    username=os.getenv("REDIS_USER"),
-    password=os.getenv("REDIS_PASSWORD"),
+    host=settings.redis_host,
+    port=settings.redis_port,
+    username=settings.redis_user,
+    password=settings.redis_password,
     decode_responses=True,
-    max_connections=50
+    max_connections=settings.redis_max_connections
 )
 
+class DeadlineBoundRedis:
+    """
+    Proxy bounding every Redis command (and pipeline execute) by the remaining
+    request deadline, so a slow Redis cannot hold a request past its budget.
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            # Pipelines are awaitable themselves, so check for them first
+            if isinstance(result, Pipeline):
+                return DeadlineBoundRedis(result)
+            if inspect.isawaitable(result):
+                return bound_by_deadline(result)
+            return result
+
+        return call
+
+    async def __aenter__(self):
+        await self._target.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._target.__aexit__(*exc_info)
+
+
+_bounded_client = DeadlineBoundRedis(_redis_client)
+
+
 def get_redis_client():
 
-    return _redis_client
+    return _bounded_client
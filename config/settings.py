@@ -0,0 +1,160 @@
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Application configuration, read once from the environment and the project's .env file.
+    Field names map to the upper-case environment variables (e.g. redis_port -> REDIS_PORT).
+    """
+
+    model_config = SettingsConfigDict(
+        env_file=Path(__file__).resolve().parent.parent / ".env",
+        extra="ignore",
+    )
+
+    # Server
+    env: Optional[str] = None
+    port: int = 8000
+
+    # Database (Neon Postgres)
+    neon_engine: Optional[str] = None
+    neon_host: Optional[str] = None
+    neon_port: int = 5432
+    neon_user: Optional[str] = None
+    neon_password: Optional[str] = None
+    neon_database: Optional[str] = None
+    neon_ssl: Optional[str] = None
+
+    # Redis
+    redis_host: str = "localhost"
+    redis_port: int = 6379
+    redis_user: Optional[str] = None
+    redis_password: Optional[str] = None
+    redis_max_connections: int = 50
+
+    # Authentication
+    secret_key: Optional[str] = None
+    algorithm: Optional[str] = None
+    access_token_expire_minutes: int = 15
+    admin_emails: str = ""  # comma-separated, allowed to use the /admin endpoints
+
+    # Upstream APIs
+    rapid_api_key: Optional[str] = None
+    rapid_api_host: Optional[str] = None
+    exchange_rate_url: Optional[str] = None
+    weather_api_key: Optional[str] = None
+    weather_api_url: Optional[str] = None
+    hotel_auto_complete_url: Optional[str] = None
+    hotel_search_url: Optional[str] = None
+    hotel_review_scores_url: Optional[str] = None
+    hotel_details_url: Optional[str] = None
+    hotel_photo_url: Optional[str] = None
+    flight_auto_complete_url: Optional[str] = None
+    flight_details_url: Optional[str] = None
+    flight_roundtrip_url: Optional[str] = None
+    attraction_auto_complete_url: Optional[str] = None
+    attraction_search_url: Optional[str] = None
+    attraction_availability_calendar_url: Optional[str] = None
+    attraction_availability_url: Optional[str] = None
+    attraction_detail_url: Optional[str] = None
+
+    # Shared HTTP connection pool
+    http_timeout: float = 30.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+
+    # Startup warm-up
+    redis_warm_connections: int = 5
+    prefetch_exchange_rates: bool = False
+    startup_retry_delay: float = 2.0
+
+    # Caching
+    memory_cache_max_entries: int = 5000
+    cache_reconnect_backoff: float = 1.0
+    cache_reconnect_max_backoff: float = 30.0
+    stale_cache_ttl: int = 604800
+    negative_cache_ttl: int = 600
+    negative_cache_max_keys: int = 10000
+    search_cache_max_age: int = 60
+    weather_cache_ttl: int = 600
+    weather_batch_max: int = 20
+    flight_price_ttl: Optional[int] = None
+    flight_flex_cell_ttl: int = 7200
+
+    # Cache administration: TTL overrides (seconds) and memory budgets (MB) per namespace, as JSON objects
+    cache_ttls: Dict[str, int] = {}
+    cache_budgets_mb: Dict[str, float] = {
+        "http_cache": 128, "flights": 32, "hotel_full_detail": 16, "availability": 16,
+    }
+    cache_stats_flush_interval: float = 30
+    cache_budget_interval: float = 300
+
+    # Logging: root level, then per-module levels and DEBUG/INFO sampling rates (0-1) as JSON objects,
+    # e.g. LOG_LEVELS={"services.cache_admin": "DEBUG"} LOG_SAMPLING={"access": 0.1}
+    log_level: str = "INFO"
+    log_levels: Dict[str, str] = {"httpx": "WARNING", "httpcore": "WARNING"}
+    log_sampling: Dict[str, float] = {}
+
+    # Response compression
+    compression_min_size: int = 1024
+    gzip_level: int = 5
+    brotli_quality: int = 4
+    compression_cache_size: int = 256
+
+    # Upstream protection
+    circuit_failure_threshold: int = 5
+    circuit_recovery_timeout: float = 30
+    hedge_requests: bool = False
+    hedge_window: int = 200
+    hedge_min_samples: int = 20
+    hedge_default_delay: float = 2.0
+
+    # Per-route request deadlines in seconds
+    hotel_request_deadline: float = 20
+    hotel_details_request_deadline: float = 15
+    hotel_batch_request_deadline: float = 45
+    flight_request_deadline: float = 25
+    flight_prices_request_deadline: float = 15
+    flight_flex_request_deadline: float = 30
+    attraction_request_deadline: float = 20
+    weather_request_deadline: float = 8
+
+    # Speculative prefetch of the next hotel page (opt-in)
+    hotel_prefetch: bool = False
+    prefetch_concurrency: int = 1
+    prefetch_max_pending: int = 20
+    prefetch_max_wait: float = 10
+    prefetch_deadline: float = 60
+
+    # Upstream fan-out
+    flight_offer_limit: int = 10
+    flight_lazy_offer_limit: int = 100
+    hotel_detail_concurrency: int = 5
+    # Hotels per upstream search page; a shorter page is the last one
+    hotel_search_page_size: int = 20
+    # Flexible-date search: at most this many days either side, i.e. a (2n+1) x (2n+1) matrix,
+    # and at most this many uncached cells searched per request (about what 3 concurrent
+    # searches of ~6 s finish within FLIGHT_FLEX_REQUEST_DEADLINE)
+    flight_flex_max_days: int = 3
+    flight_flex_max_searches: int = 12
+
+    # Airports: dataset override (CSV) and the metro area searched with multi_airport
+    airports_csv: Optional[str] = None
+    flight_metro_radius_km: float = 80
+    flight_metro_max_airports: int = 3
+
+    # JSON payloads at least this large (bytes) are decoded/encoded in a worker thread
+    json_offload_bytes: int = 262144
+    json_offload_workers: int = 2
+
+    # Event-loop lag monitor: sampling interval (seconds) and the lag logged as a warning (ms)
+    loop_lag_interval: float = 0.5
+    loop_lag_warn_ms: float = 100
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
@@ -0,0 +1,112 @@
+import asyncio, logging, time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from tortoise import Tortoise
+from redis.exceptions import RedisError
+from config.cache import cache_health, get_cache
+from config.http_pool import close_http_client, get_http_client
+from config.log import stop_logging
+from config.loop_monitor import loop_monitor
+from config.redis_client import get_redis_client
+from config.settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """
+    Warm-up progress of this worker, reported by /ready.
+    """
+
+    def __init__(self):
+        self.checks = {"database": False, "redis": False, "http_pool": False}
+        if settings.prefetch_exchange_rates:
+            self.checks["exchange_rates"] = False
+        self.started_at = time.monotonic()
+        self.warm_seconds = None
+
+    @property
+    def ready(self) -> bool:
+        return all(self.checks.values())
+
+    def report(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "checks": dict(self.checks),
+            "warm_seconds": self.warm_seconds,
+            "cache": cache_health(),
+            "loop_lag": loop_monitor.report(),
+        }
+
+
+readiness = Readiness()
+
+
+async def warm_database():
+    # Tortoise is initialised by register_tortoise before this lifespan runs; open a pooled connection
+    await Tortoise.get_connection("default").execute_query("SELECT 1")
+
+
+async def warm_redis():
+    # Concurrent pings make the pool open several connections up front. Redis being
+    # down does not block readiness: the cache backend serves from memory meanwhile
+    try:
+        await asyncio.gather(*[get_redis_client().ping() for _ in range(settings.redis_warm_connections)])
+    except (RedisError, OSError) as e:
+        get_cache().record_failure(e)
+
+
+async def warm_http_pool():
+    get_http_client()
+
+
+async def warm_exchange_rates():
+    # Imported here so the settings/startup modules stay free of service imports
+    from services.exchange_rate import ExchangeRateService
+    await ExchangeRateService.get_rates()
+
+
+WARM_STEPS = {
+    "database": warm_database,
+    "redis": warm_redis,
+    "http_pool": warm_http_pool,
+    "exchange_rates": warm_exchange_rates,
+}
+
+
+async def warm_up():
+    """
+    Run every pending warm-up step, retrying failed ones every STARTUP_RETRY_DELAY
+    seconds until all succeed. Runs in the background so the worker can serve
+    /ready (503) while it warms.
+    """
+    while not readiness.ready:
+        pending = [name for name, done in readiness.checks.items() if not done]
+        results = await asyncio.gather(*[WARM_STEPS[name]() for name in pending], return_exceptions=True)
+        for name, result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.warning("Warm-up step %s failed: %s", name, result)
+            else:
+                readiness.checks[name] = True
+        if not readiness.ready:
+            await asyncio.sleep(settings.startup_retry_delay)
+
+    readiness.warm_seconds = round(time.monotonic() - readiness.started_at, 3)
+    logger.info("Worker warm after %ss", readiness.warm_seconds, extra={"warm_seconds": readiness.warm_seconds})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from services.cache_admin import cache_maintenance
+
+    background = [
+        asyncio.create_task(warm_up()),
+        asyncio.create_task(cache_maintenance()),
+        asyncio.create_task(loop_monitor.run()),
+    ]
+    yield
+    for task in background:
+        task.cancel()
+    await close_http_client()
+    stop_logging()
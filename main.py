@@ -1,46 +1,82 @@
-from fastapi.responses import RedirectResponse
-import asyncio, httpx,uvicorn,os
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+import uvicorn
 from uuid import UUID
-from fastapi import Depends, FastAPI, HTTPException, Query
-from config.auth import get_current_user
+from datetime import date
+from typing import Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from config.auth import get_admin_user, get_current_user
+from config.compression import init_compression
 from config.cors import init_cors
 from config.database import init_db
+from config.deadline import DeadlineExceeded, request_deadline
+from config.http_pool import get_http_client
+from config.log import init_logging
 from models.user import User, UserUpdate, user_pydanticIn, user_pydantic
-from models.hotel import hotel_pydanticIn, hotel_pydantic, Hotel
-from models.flight import flight_pydanticIn , flight_pydantic,Flight
+from models.hotel import HotelBatchRequest, hotel_pydanticIn, hotel_pydantic, Hotel
+from models.flight import FlightPriceRequest, flight_pydanticIn , flight_pydantic,Flight
 from models.attraction import attraction_pydanticIn, Attraction, attraction_pydantic
+from services.airport_index import get_airport_index
 from services.attractions import (
-    build_attractions, delete_attraction_service, get_attraction_autocomplete,
-    get_attractions_search, post_attraction_service
+    ATTRACTION_FIELDS, build_attractions, delete_attraction_service, filter_open_during_stay, get_attraction_autocomplete,
+    get_attractions_search_with_hash, post_attraction_service
 )
 from services.authentication import (
     OAuth2PasswordRequestFormCustom, login_service, register_service
 )
 from services.exchange_rate import ExchangeRateService
-from services.flights import delete_flight_service, get_all_flights_service, get_flights, post_flight_service
-from services.general import get_weather_service
+from services.flights import (
+    FLIGHT_FIELDS, delete_flight_service, filter_flights, get_all_flights_service, get_flight_prices, get_flights_with_hash, post_flight_service
+)
+from services.cache_admin import enforce_budgets, get_cache_overview, purge
+from services.circuit_breaker import CircuitOpenError, breaker_states
+from services.etag import body_hash, cache_headers, make_etag, matches_if_none_match, not_modified
+from services.flight_flex import get_flex_matrix
+from services.general import get_weather_batch, get_weather_service
+from services.fieldsets import fields_key, parse_fields, wants
 from services.hotels import (
-     assemble_hotel_info, delete_hotel_service, get_all_hotels_service, get_hotel_full_detail, get_hotel_reviews,
-    get_hotels_data, get_location_id, post_hotel_service
+    FULL_DETAIL_FIELDS, HOTEL_FIELDS, REVIEW_FIELDS, build_hotel_detail, build_hotel_infos, delete_hotel_service,
+    detail_queue, enrich_hotels, get_all_hotels_service, get_cached_enrichment, get_hotels_page, get_location_id,
+    post_hotel_service
 )
+from services.hotel_batch import prepare_hotel_batch, stream_hotel_batch
+from services.hotel_store import HotelFilters
+from services.prefetch import prefetch_stats, schedule_hotel_prefetch
 from services.users import (
     delete_user_service, update_user_service
 )
-from dotenv import load_dotenv
+from config.settings import get_settings
+from config.startup import lifespan, readiness
 
-# Load environment variables from .env file before accessing them
-load_dotenv() 
+settings = get_settings()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
-# Initialize database and CORS settings
+# Initialize database, CORS, response compression and request logging
 init_db(app)
 init_cors(app)
+init_compression(app)
+init_logging(app)
+
+
+# Upstream breaker open and no cached fallback: fail fast instead of waiting on timeouts
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Upstream service temporarily unavailable"},
+        headers={"Retry-After": str(int(exc.retry_after) + 1)}
+    )
+
+
+# Request ran out of its end-to-end time budget
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
 
 # Entry point
 if __name__ == "__main__":
   
-    port = int(os.getenv("PORT", 8000))  
+    port = settings.port  
     host = "0.0.0.0" 
     uvicorn.run("main:app", host=host, port=port, reload=True)
 
@@ -52,6 +88,42 @@ def index():
     return RedirectResponse(url="/docs")
 
 
+# Readiness probe: 503 until this worker has warmed its DB, Redis and HTTP pools
+@app.get('/ready', tags=["Health"], summary="Readiness probe")
+async def ready():
+    report = readiness.report()
+    return JSONResponse(status_code=200 if readiness.ready else 503, content=report)
+
+
+# ===== Cache administration (admins only) =====
+@app.get("/admin/cache", tags=["Admin"], summary="Inspect cache namespaces")
+async def admin_cache_overview(
+    sample: int = Query(50, description="Keys sampled per namespace for size estimates", ge=1, le=1000),
+    admin: User = Depends(get_admin_user),
+):
+    # Key counts, sampled sizes, hit ratios, TTLs and budgets per namespace
+    return {"status": "Ok", "data": {
+        **await get_cache_overview(sample),
+        "circuit_breakers": breaker_states(),
+        "hotel_prefetch": prefetch_stats(),
+        "hotel_enrichment_queue": detail_queue.stats(),
+    }}
+
+
+@app.delete("/admin/cache", tags=["Admin"], summary="Purge cache keys by pattern")
+async def admin_cache_purge(
+    pattern: str = Query(..., description="Redis glob pattern, e.g. flights:*"),
+    admin: User = Depends(get_admin_user),
+):
+    # Incremental SCAN + UNLINK, Redis is never blocked by a large namespace
+    return {"status": "Ok", "deleted_count": await purge(pattern)}
+
+
+@app.post("/admin/cache/budgets", tags=["Admin"], summary="Enforce cache namespace budgets now")
+async def admin_cache_enforce_budgets(admin: User = Depends(get_admin_user)):
+    return {"status": "Ok", "data": await enforce_budgets()}
+
+
 # ===== User profile endpoint (secured) =====
 @app.get("/auth/user/profile" , tags=["Auth"])
 async def read_users_me(current_user: User = Depends(get_current_user)):
@@ -67,8 +139,6 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
 @app.post("/auth/login", tags=["Auth"], summary="Login to get JWT token")
 async def login(form_data: OAuth2PasswordRequestFormCustom = Depends()):
     # Handles login and returns JWT token if credentials are valid
-    print("Received username:", form_data.username)
-    print("Received password:", form_data.password)
     return await login_service(form_data)
 
 @app.get("/auth/session",tags=["Auth"], summary="Get current logged-in user")
@@ -108,66 +178,117 @@ async def delete_user(user_id: UUID, current_user: User = Depends(get_current_us
 
 
 # ===== Get weather data for a city =====
-@app.get("/weather", tags=["Weather"], summary="Find the weather")
-async def get_weather(city: str):
-    # Fetches current weather info for the requested city from an external API
+@app.get("/weather", tags=["Weather"], summary="Find the weather", dependencies=[Depends(request_deadline("weather"))])
+async def get_weather(
+    city: Optional[str] = Query(None, description="City name"),
+    cities: Optional[str] = Query(None, description="Comma-separated city names, e.g. for an itinerary"),
+):
+    # Fetches current weather info for the requested city (or cities) from an external API
+    if cities:
+        return {"status": "Ok", "data": await get_weather_batch(cities.split(","))}
+    if not city:
+        raise HTTPException(status_code=400, detail="Either city or cities is required")
     return await get_weather_service(city)
 
 # ===== Search hotels =====
-@app.get("/hotel", tags=["Hotel"], summary="Find hotels")
+@app.get("/hotel", tags=["Hotel"], summary="Find hotels", dependencies=[Depends(request_deadline("hotel"))])
 async def get_hotels(
+    request: Request,
+    response: Response,
     city_name: str = Query(..., description="City name"),
     arrival_date: str = Query(..., description="Arrival date YYYY-MM-DD"),
     departure_date: str = Query(..., description="Departure date YYYY-MM-DD"),
     page: int = Query(1, description="Page number", ge=1),
     sort_by: str = Query("price", description="Sort hotels by", regex="^(price|review_score|distance|upsort_bh|popularity|class_descending|class_ascending|bayesian_review_score)$"),
+    details: bool = Query(True, description="Fetch reviews, details and photos for every hotel; when false only cached enrichment is used"),
+    min_price: Optional[float] = Query(None, description="Minimum price in BHD", ge=0),
+    max_price: Optional[float] = Query(None, description="Maximum price in BHD", ge=0),
+    min_review_score: Optional[float] = Query(None, description="Minimum review score", ge=0, le=10),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. hotel_name,local_price,hotel_photo_url"),
 ):
     
-    async with httpx.AsyncClient(timeout=30) as client:
-        # Get location ID
-        location_id = await get_location_id(city_name, client)
-        if not location_id:
-            raise HTTPException(status_code=404, detail="City not found")
-
-        # Fetch hotels
-        hotels = await get_hotels_data(location_id, arrival_date, departure_date, client, page, sort_by)
-        if not hotels:
-            return {"status": "Ok", "data": []}
-
-        # Fetch exchange rates
-        rates_data = await ExchangeRateService.get_rates()
-        base_currency_code = rates_data.get("base_currency", "BHD")
-        base_currency_date = rates_data.get("base_currency_date", 0)
-
-        # Prepare concurrent tasks for reviews and full details (including photos)
-        review_tasks = [get_hotel_reviews(hotel["id"], client) for hotel in hotels]
-        full_detail_tasks = [get_hotel_full_detail(hotel["id"], client, arrival_date, departure_date) for hotel in hotels]
-
-        # Run all tasks concurrently
-        reviews_list, full_details_list = await asyncio.gather(
-            asyncio.gather(*review_tasks),
-            asyncio.gather(*full_detail_tasks)
-        )
-
-        # Build hotel info
-        hotel_infos = []
-        for hotel, review_scores, full_details in zip(hotels, reviews_list, full_details_list):
-            hotel_booking_url = full_details.get("hotel_booking_url")
-            hotel_address = full_details.get("hotel_address")
-            hotel_photo_url = full_details.get("hotel_photo_url")
-
-            info = await assemble_hotel_info(
-                hotel,
-                review_scores,
-                hotel_booking_url,
-                hotel_photo_url,
-                hotel_address,
-                base_currency_code,
-                base_currency_date
-            )
-            hotel_infos.append(info)
-
-        return hotel_infos
+    fieldset = parse_fields(fields, HOTEL_FIELDS, "hotel_id")
+    client = get_http_client()
+
+    # Get location ID
+    location_id = await get_location_id(city_name, client)
+    if not location_id:
+        raise HTTPException(status_code=404, detail="City not found")
+
+    # Fetch hotels
+    filters = HotelFilters(min_price, max_price, min_review_score)
+    hotels, hotels_hash = await get_hotels_page(location_id, arrival_date, departure_date, client, page, sort_by, filters)
+    if not hotels:
+        return {"status": "Ok", "data": []}
+
+    # Users nearly always page forward: warm page + 1 in the background (opt-in, low priority)
+    schedule_hotel_prefetch(location_id, arrival_date, departure_date, page, sort_by, details)
+
+    # Fetch exchange rates
+    rates_data = await ExchangeRateService.get_rates()
+    base_currency_code = rates_data.get("base_currency", "BHD")
+    base_currency_date = rates_data.get("base_currency_date", 0)
+
+    hotel_ids = [hotel["id"] for hotel in hotels]
+
+    # Enrichment calls are only made for the parts a sparse fieldset asks for
+    parts = {"reviews": wants(fieldset, *REVIEW_FIELDS), "full_details": wants(fieldset, *FULL_DETAIL_FIELDS)}
+    if details:
+        # Fetch reviews and full details (including photos) for the whole page
+        enrichment = await enrich_hotels(hotel_ids, client, arrival_date, departure_date, **parts)
+    else:
+        # Listing only: use enrichment already in cache, the rest comes from /hotel/details
+        enrichment = await get_cached_enrichment(hotel_ids, **parts)
+
+    # Build hotel info
+    hotel_infos = await build_hotel_infos(hotels, enrichment, base_currency_code, base_currency_date, fieldset)
+
+    # Reviews and details change independently of the search result, so the ETag covers the built page
+    etag = make_etag("hotel", hotels_hash, city_name, arrival_date, departure_date, page, sort_by, details, filters,
+                     fields_key(fieldset), base_currency_date, body_hash(hotel_infos))
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+
+    # Degraded results must not be reused by clients once the upstream recovers
+    if not any(info.get("degraded") for info in hotel_infos):
+        response.headers.update(cache_headers(etag))
+    return hotel_infos
+
+
+# ===== Multi-city hotel search =====
+@app.post("/hotel/batch", tags=["Hotel"], summary="Find hotels for several cities and stays", dependencies=[Depends(request_deadline("hotel_batch"))])
+async def search_hotels_batch(batch: HotelBatchRequest):
+    # One search per itinerary leg; results stream back as NDJSON lines as each leg finishes
+    fieldset = parse_fields(batch.fields, HOTEL_FIELDS, "hotel_id")
+    # Shared lookups first, so their errors get a status code instead of cutting the stream
+    locations, rates = await prepare_hotel_batch(batch.legs)
+    return StreamingResponse(stream_hotel_batch(batch.legs, locations, rates, batch.details, fieldset),
+                             media_type="application/x-ndjson")
+
+
+# ===== Batch hotel enrichment =====
+@app.get("/hotel/details", tags=["Hotel"], summary="Get reviews, details and photos for hotels", dependencies=[Depends(request_deadline("hotel_details"))])
+async def get_hotels_details(
+    ids: str = Query(..., description="Comma separated hotel IDs"),
+    arrival_date: str = Query(..., description="Arrival date YYYY-MM-DD"),
+    departure_date: str = Query(..., description="Departure date YYYY-MM-DD"),
+):
+    # Enriches only the requested hotels, e.g. the cards visible in the UI
+    try:
+        hotel_ids = list(dict.fromkeys(int(hotel_id) for hotel_id in ids.split(",") if hotel_id.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated integers")
+    if not hotel_ids or len(hotel_ids) > 25:
+        raise HTTPException(status_code=400, detail="Provide between 1 and 25 hotel IDs")
+
+    client = get_http_client()
+
+    enrichment = await enrich_hotels(hotel_ids, client, arrival_date, departure_date)
+
+    return {
+        "status": "Ok",
+        "data": [build_hotel_detail(hotel_id, enrichment[hotel_id]) for hotel_id in hotel_ids]
+    }
 
 
 
@@ -198,37 +319,64 @@ async def delete_hotel(hotel_id: int, current_user: User = Depends(get_current_u
 
 
 # ===== List attractions by city =====
-@app.get("/attraction", tags=["Attraction"], summary="Find attractions")
+@app.get("/attraction", tags=["Attraction"], summary="Find attractions", dependencies=[Depends(request_deadline("attraction"))])
 async def get_attraction(
+    request: Request,
+    response: Response,
     city_name: str = Query(..., description="City name for attraction search"),
     arrival_date: str = Query(..., description="Arrival date YYYY-MM-DD format"),
     departure_date: str = Query(..., description="Departure date YYYY-MM-DD format"),
+    page: int = Query(1, description="Page number", ge=1),
+    limit: int = Query(10, description="Attractions per page", ge=1, le=50),
+    open_during_stay: bool = Query(False, description="Only attractions available on at least one day of the stay"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. attraction_name,attraction_price,attractionPhoto"),
 ):
     # Retrieves attractions for a city in the specified date range using external APIs,
-    # includes caching, rate limiting, and price conversion
+    # includes caching, rate limiting, pagination and price conversion
 
-    limit = 10
     attraction_date = arrival_date
-    async with httpx.AsyncClient(timeout=30) as client:
-        attraction_id = await get_attraction_autocomplete(client, city_name)
-        if not attraction_id:
-            raise HTTPException(status_code=404, detail="No attraction found for the city")
+    fieldset = parse_fields(fields, ATTRACTION_FIELDS, "attraction_id")
+    client = get_http_client()
 
-        attractions_data = await get_attractions_search(client, attraction_id, arrival_date, departure_date)
-        if not attractions_data or "products" not in attractions_data:
-            return {"status": "No attractions found", "data": []}
+    attraction_id = await get_attraction_autocomplete(client, city_name)
+    if not attraction_id:
+        raise HTTPException(status_code=404, detail="No attraction found for the city")
 
-        total_results = len(attractions_data["products"])
+    attractions_data, search_hash = await get_attractions_search_with_hash(client, attraction_id, arrival_date, departure_date)
+    if not attractions_data or "products" not in attractions_data:
+        return {"status": "No attractions found", "data": []}
 
-        exchange_data = await ExchangeRateService.get_rates()
-        base_currency_code = exchange_data.get("base_currency", "BHD")
-        base_currency_date = exchange_data.get("base_currency_date", 0)
-
-        # Build full attraction info including availability (with caching + semaphore)
-        found_attractions = await build_attractions(client, attractions_data, attraction_date)
+    exchange_data = await ExchangeRateService.get_rates()
+    base_currency_code = exchange_data.get("base_currency", "BHD")
+    base_currency_date = exchange_data.get("base_currency_date", 0)
 
+    if open_during_stay:
+        try:
+            stay = (date.fromisoformat(arrival_date), date.fromisoformat(departure_date))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+        products = await filter_open_during_stay(client, attractions_data["products"], *stay)
+        attractions_data = {**attractions_data, "products": products}
+
+    total_results = len(attractions_data["products"])
+
+    # Build full attraction info including availability for the requested page only
+    found_attractions = await build_attractions(client, attractions_data, attraction_date, page, limit, fieldset)
+
+    # Descriptions, availability and prices change independently of the search result,
+    # so the ETag covers the built page
+    etag = make_etag("attraction", search_hash, city_name, arrival_date, departure_date,
+                     page, limit, open_during_stay, fields_key(fieldset), base_currency_date,
+                     total_results, body_hash(found_attractions))
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+
+    # Degraded results must not be reused by clients once the upstream recovers
+    if not any(attraction.get("degraded") for attraction in found_attractions):
+        response.headers.update(cache_headers(etag))
     return {
         "status": "Ok",
+        "page": page,
         "limit": limit,
         "total": total_results,
         "base_currency": base_currency_code,
@@ -270,38 +418,108 @@ async def delete_attraction(attraction_id: int, current_user: User = Depends(get
 
 
 # ===== List flights by city with pagination =====
-@app.get("/flight", tags=["Flight"], summary="Get flights info")
+@app.get("/flight", tags=["Flight"], summary="Get flights info", dependencies=[Depends(request_deadline("flight"))])
 async def flight(
+    request: Request,
+    response: Response,
     city_name: str = Query(..., description="City name for arrival airport search"),
     arrival_date: str = Query(..., description="Arrival date YYYY-MM-DD format"),
     departure_date: str = Query(..., description="Departure date YYYY-MM-DD format"),
     departure_city_name: str = Query(..., description="Departure city name"),
-
+    max_price: Optional[float] = Query(None, description="Maximum price in BHD", ge=0),
+    max_duration: Optional[float] = Query(None, description="Maximum duration in hours", ge=0),
+    stops: Optional[int] = Query(None, description="Maximum number of stops", ge=0),
+    carrier: Optional[str] = Query(None, description="Carrier name"),
+    cabin_class: Optional[str] = Query(None, description="Cabin class e.g. ECONOMY"),
+    sort_by: str = Query("price", description="Sort flights by", regex="^(price|duration|departure_time)$"),
+    page: int = Query(1, description="Page number", ge=1),
+    limit: int = Query(10, description="Flights per page", ge=1, le=100),
+    lazy_pricing: bool = Query(False, description="Return list prices now, fetch exact prices via /flight/prices"),
+    multi_airport: bool = Query(False, description="Search every airport of both metro areas, e.g. LHR, LGW and STN for London"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return, e.g. price,departure_time,arrival_time,duration_hours"),
 ):
     # Fetches flight info between departure and arrival cities/dates,
-    # applies pagination and currency conversion for pricing
+    # applies filters, sorting and pagination over the cached result
+    fieldset = parse_fields(fields, FLIGHT_FIELDS, "token")
 
     exchange_data = await ExchangeRateService.get_rates()
     base_currency_code = exchange_data.get("base_currency", "BHD")
     base_currency_date = exchange_data.get("base_currency_date", 0)
 
-    flights = await get_flights(city_name, arrival_date, departure_date, departure_city_name)
-
-    total_results = len(flights)
-
-    # Pagination slicing
+    flights, flights_hash = await get_flights_with_hash(city_name, arrival_date, departure_date, departure_city_name,
+                                                        lazy_pricing, multi_airport)
 
+    # Unchanged offers and query: skip filtering, sorting and serialization
+    etag = make_etag("flight", flights_hash, city_name, arrival_date, departure_date, departure_city_name,
+                     max_price, max_duration, stops, carrier, cabin_class, sort_by, page, limit, lazy_pricing,
+                     multi_airport, fields_key(fieldset), base_currency_date)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
 
+    # Filtering, sorting and pagination slicing
+    flights_page, totals = filter_flights(
+        flights, max_price, max_duration, stops, carrier, cabin_class, sort_by, page, limit, fieldset
+    )
 
+    response.headers.update(cache_headers(etag))
     return {
         "status": "Ok",
-        "total": total_results,
+        "page": page,
+        "limit": limit,
+        "total": totals,
         "base_currency": base_currency_code,
         "base_currency_date": base_currency_date,
-        "data": flights
+        "data": flights_page
     }
 
 
+# ===== Flexible dates: cheapest-day matrix =====
+@app.get("/flight/flex", tags=["Flight"], summary="Cheapest prices around the travel dates", dependencies=[Depends(request_deadline("flight_flex"))])
+async def flight_flex(
+    city_name: str = Query(..., description="City name for arrival airport search"),
+    arrival_date: str = Query(..., description="Arrival date YYYY-MM-DD format"),
+    departure_date: str = Query(..., description="Departure date YYYY-MM-DD format"),
+    departure_city_name: str = Query(..., description="Departure city name"),
+    flex_days: int = Query(3, description="Days to try before and after each date", ge=0),
+):
+    # Returns only the price matrix; /flight with the chosen dates lists that cell's offers.
+    # Wide matrices fill over several calls, "complete" tells when every cell has a price
+    matrix = await get_flex_matrix(city_name, departure_city_name, arrival_date, departure_date, flex_days)
+    return {"status": "Ok", **matrix}
+
+
+# ===== Nearest airports =====
+@app.get("/airports/nearby", tags=["Flight"], summary="Find the airports nearest to a point or airport")
+async def airports_nearby(
+    lat: Optional[float] = Query(None, description="Latitude", ge=-90, le=90),
+    lon: Optional[float] = Query(None, description="Longitude", ge=-180, le=180),
+    code: Optional[str] = Query(None, description="IATA airport code, instead of lat/lon"),
+    limit: int = Query(5, description="Airports to return", ge=1, le=20),
+    radius_km: float = Query(500, description="Search radius in km", gt=0, le=500),
+):
+    # In-memory spatial index lookup, no upstream calls
+    index = get_airport_index()
+    if code:
+        airport = index.get(code)
+        if airport is None:
+            raise HTTPException(status_code=404, detail="Airport not found")
+        lat, lon = airport.latitude, airport.longitude
+    elif lat is None or lon is None:
+        raise HTTPException(status_code=400, detail="Provide lat and lon, or code")
+
+    nearby = index.nearest(lat, lon, limit, radius_km)
+    return {"status": "Ok", "data": [airport.to_dict(distance) for distance, airport in nearby]}
+
+
+# ===== Exact prices for expanded flight offers =====
+@app.post("/flight/prices", tags=["Flight"], summary="Get exact prices for flight offers", dependencies=[Depends(request_deadline("flight_prices"))])
+async def flight_prices(price_request: FlightPriceRequest):
+    # Fetches authoritative prices for the offer tokens the user expanded,
+    # used together with /flight?lazy_pricing=true
+    prices = await get_flight_prices(price_request.tokens)
+    return {"status": "Ok", "data": prices}
+
+
 flightIn = flight_pydanticIn
 
 # ===== Save user-selected flight =====
@@ -1,6 +1,12 @@
 from tortoise.models import Model
 from tortoise import fields
 from tortoise.contrib.pydantic import pydantic_model_creator
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class FlightPriceRequest(BaseModel):
+    tokens: List[str] = Field(..., min_length=1, max_length=50)
 
 
 class Flight (Model):
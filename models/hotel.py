@@ -1,6 +1,22 @@
 from tortoise.models import Model
 from tortoise import fields
 from tortoise.contrib.pydantic import pydantic_model_creator
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class HotelSearchLeg(BaseModel):
+    city_name: str
+    arrival_date: str = Field(..., description="Arrival date YYYY-MM-DD")
+    departure_date: str = Field(..., description="Departure date YYYY-MM-DD")
+    page: int = Field(1, ge=1)
+    sort_by: str = Field("price", pattern="^(price|review_score|distance|upsort_bh|popularity|class_descending|class_ascending|bayesian_review_score)$")
+
+
+class HotelBatchRequest(BaseModel):
+    legs: List[HotelSearchLeg] = Field(..., min_length=1, max_length=10)
+    details: bool = True
+    fields: Optional[str] = Field(None, description="Comma separated fields to return, as for GET /hotel")
 
 
 class Hotel (Model):
@@ -0,0 +1,174 @@
+import csv, math
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Airports bundled with the app (code, name, city, country, latitude, longitude)
+AIRPORTS_CSV = Path(settings.airports_csv) if settings.airports_csv else Path(__file__).resolve().parent.parent / "data" / "airports.csv"
+
+# Grid cell size in degrees: one cell spans ~111 km of latitude
+CELL_DEGREES = 1.0
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+
+@dataclass(frozen=True)
+class Airport:
+    code: str
+    name: str
+    city: str
+    country: str
+    latitude: float
+    longitude: float
+
+    def to_dict(self, distance_km: Optional[float] = None) -> dict:
+        entry = {
+            "airport_code": self.code,
+            "airport_name": self.name,
+            "city_name": self.city,
+            "country_name": self.country,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+        }
+        if distance_km is not None:
+            entry["distance_km"] = round(distance_km, 1)
+        return entry
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class AirportIndex:
+    """
+    In-memory spatial index of airports: a grid of CELL_DEGREES lat/lon cells.
+    A radius query only visits the cells of the radius' bounding box and checks
+    exact great-circle distances there; nearest-k widens the radius until k
+    airports are found.
+    """
+
+    def __init__(self):
+        self.by_code: Dict[str, Airport] = {}
+        self.cells: Dict[Tuple[int, int], List[Airport]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self.by_code)
+
+    @staticmethod
+    def cell(latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / CELL_DEGREES), math.floor(longitude / CELL_DEGREES)
+
+    def add(self, airport: Airport):
+        previous = self.by_code.get(airport.code)
+        if previous is not None:
+            self.cells[self.cell(previous.latitude, previous.longitude)].remove(previous)
+        self.by_code[airport.code] = airport
+        self.cells[self.cell(airport.latitude, airport.longitude)].append(airport)
+
+    def get(self, code: str) -> Optional[Airport]:
+        return self.by_code.get((code or "").upper())
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, Airport]]:
+        """
+        Airports within radius_km, nearest first, as (distance in km, airport).
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; near them, scan every longitude
+        cos_lat = math.cos(math.radians(min(abs(latitude) + lat_span, 90.0)))
+        lon_span = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+
+        min_row, min_col = self.cell(max(latitude - lat_span, -90.0), longitude - lon_span)
+        max_row, max_col = self.cell(min(latitude + lat_span, 90.0), longitude + lon_span)
+        columns = int(360 / CELL_DEGREES)
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            # Wrap around the antimeridian, visiting each column at most once
+            for col in {(col + columns // 2) % columns - columns // 2 for col in range(min_col, max_col + 1)}:
+                for airport in self.cells.get((row, col), ()):
+                    distance = haversine_km(latitude, longitude, airport.latitude, airport.longitude)
+                    if distance <= radius_km:
+                        found.append((distance, airport))
+        return sorted(found, key=lambda item: item[0])
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5,
+                max_km: float = 2 * math.pi * EARTH_RADIUS_KM) -> List[Tuple[float, Airport]]:
+        """
+        The k airports nearest to a point (within max_km), nearest first.
+        """
+        radius = 100.0
+        while True:
+            found = self.within(latitude, longitude, min(radius, max_km))
+            if len(found) >= k or radius >= max_km:
+                return found[:k]
+            radius *= 4
+
+
+def parse_airport(row: dict) -> Optional[Airport]:
+    """
+    Airport from a dataset row or an autocomplete result. Autocomplete results
+    are only indexed when they carry coordinates, e.g. {"coordinates": {"latitude", "longitude"}}.
+    """
+    coordinates = row.get("coordinates") or row
+    latitude, longitude = coordinates.get("latitude"), coordinates.get("longitude")
+    code = row.get("code")
+    if not code or latitude in (None, "") or longitude in (None, ""):
+        return None
+    return Airport(
+        code=code.upper(),
+        name=row.get("name") or "",
+        city=row.get("city") or row.get("cityName") or "",
+        country=row.get("country") or row.get("countryName") or "",
+        latitude=float(latitude),
+        longitude=float(longitude),
+    )
+
+
+@lru_cache
+def get_airport_index() -> AirportIndex:
+    """
+    The process-wide index, loaded from the bundled dataset on first use.
+    """
+    index = AirportIndex()
+    with open(AIRPORTS_CSV, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            airport = parse_airport(row)
+            if airport:
+                index.add(airport)
+    return index
+
+
+def learn_airports(autocomplete_results) -> int:
+    """
+    Add airports from a flight autocomplete response to the index. Returns how many were indexed.
+    """
+    index = get_airport_index()
+    added = 0
+    for result in autocomplete_results:
+        airport = parse_airport(result) if result.get("type") == "AIRPORT" else None
+        if airport:
+            index.add(airport)
+            added += 1
+    return added
+
+
+def metro_airports(code: str, city_airport_codes=(), radius_km: float = settings.flight_metro_radius_km,
+                   limit: int = settings.flight_metro_max_airports) -> List[str]:
+    """
+    Airport codes serving the same metro area as `code`: `code` first, then the
+    other airports the autocomplete returned for the city, then indexed airports
+    within radius_km, nearest first. At most `limit` codes.
+    """
+    codes = [code]
+    codes += [other for other in city_airport_codes if other and other != code]
+    airport = get_airport_index().get(code)
+    if airport is not None:
+        codes += [near.code for _, near in get_airport_index().within(airport.latitude, airport.longitude, radius_km)]
+    return list(dict.fromkeys(codes))[:limit]
@@ -1,21 +1,25 @@
 from uuid import UUID
+from datetime import date
 from fastapi import Depends, HTTPException
-import httpx, asyncio, json, os
+import httpx, asyncio, json
 from config.auth import get_current_user
 from models.attraction import Attraction, attraction_pydantic, attraction_pydanticIn
 from models.user import User
 from services.exchange_rate import ExchangeRateService
-from config.redis_client import get_redis_client
-from services.http_client import cached_get
-from dotenv import load_dotenv
+from config.cache import get_cache
+from services.http_client import cache_with_stale, cached_get, get_stale, get_with_hash, is_degradable
+from services.etag import content_hash
+from services.fieldsets import select, wants
+from services.availability_bitmap import AvailabilityBitmap
+from services.negative_cache import is_negative, mark_negative
+from config.settings import get_settings
 
-# Load environment variables from .env file before accessing them
-load_dotenv() 
+settings = get_settings()
 
 # Prepare headers for API calls, using API keys from environment variables
 HEADERS = {
-    "x-rapidapi-key": os.getenv("RAPID_API_KEY"),
-    "x-rapidapi-host": os.getenv("RAPID_API_HOST")
+    "x-rapidapi-key": settings.rapid_api_key,
+    "x-rapidapi-host": settings.rapid_api_host
 }
 
 # Limit number of concurrent API requests to 3 to avoid rate limiting (HTTP 429 errors)
@@ -24,30 +28,82 @@ semaphore = asyncio.Semaphore(3)
 # Cache time-to-live (TTL) in seconds (24 hours)
 CACHE_TTL = 86400  
 
+# Fields of an /attraction record, for sparse fieldsets
+ATTRACTION_FIELDS = (
+    "attraction_id", "attraction_name", "allReviewsCount", "percentageReview", "averageReview", "totalReview",
+    "attractionPhoto", "attraction_description", "attraction_price", "currency", "base_currency",
+    "base_currency_date", "available_date", "attraction_daily_timing",
+)
+
+
+async def fetch_projection(cache_key: str, url: str, params: dict, project, cache_if=None,
+                           encode=json.dumps, decode=json.loads, with_hash: bool = False):
+    """
+    Derived-result caching: call `url` without persisting its raw response and cache
+    only project(response) under cache_key. Callers check cache_key themselves first.
+    Projections failing cache_if are not stored. Returns the projection - or
+    (projection, content hash) with with_hash. While the upstream is down the last
+    known projection is served past its TTL.
+    """
+    try:
+        async with semaphore:
+            data = await cached_get(url, params=params, headers=HEADERS, persist_raw=False)
+    except Exception as e:
+        stale = await get_stale(cache_key) if is_degradable(e) else None
+        if stale is None:
+            raise
+        return (decode(stale), content_hash(stale)) if with_hash else decode(stale)
+
+    result = project(data)
+    if cache_if is not None and not cache_if(result):
+        return (result, None) if with_hash else result
+
+    payload = encode(result)
+    result_hash = content_hash(payload) if with_hash else None
+    await cache_with_stale(cache_key, CACHE_TTL, payload, result_hash)
+    return (result, result_hash) if with_hash else result
+
+
+def trim_search_product(product: dict) -> dict:
+    """
+    Keep only the product fields build_attraction reads from a search result.
+    """
+    price = product.get("representativePrice") or {}
+    reviews = product.get("reviewsStats") or {}
+    numeric_reviews = product.get("numericReviewsStats") or {}
+    return {
+        "id": product.get("id"),
+        "name": product.get("name"),
+        "slug": product.get("slug"),
+        "representativePrice": {"chargeAmount": price.get("chargeAmount"), "currency": price.get("currency", "USD")},
+        "reviewsStats": {"allReviewsCount": reviews.get("allReviewsCount"), "percentage": reviews.get("percentage")},
+        "numericReviewsStats": {"average": numeric_reviews.get("average"), "total": numeric_reviews.get("total")},
+        "primaryPhoto": {"small": (product.get("primaryPhoto") or {}).get("small")},
+    }
+
 
 async def get_attraction_autocomplete(client: httpx.AsyncClient, city_name: str):
     """
     Search for attraction location ID by city name, using Redis cache to avoid repeated API calls.
     """
     cache_key = f"attraction_autocomplete:{city_name.lower()}"  # Cache key based on city name
-    cached = await get_redis_client().get(cache_key)  # Try to get cached result
+    cached = await get_cache().get(cache_key)  # Try to get cached result
     if cached:
         return json.loads(cached)  # Return cached data if exists
 
-    # Use semaphore to limit concurrent API calls
-    async with semaphore:
-        url = os.getenv("ATTRACTION_AUTO_COMPLETE_URL")
-        params = {"query": city_name}
-        # Call external API with caching helper function
-        data = await cached_get(url, params=params, headers=HEADERS, ttl=CACHE_TTL)
+    # Known unknown city: skip the API until the negative entry expires
+    if await is_negative("attraction_autocomplete", city_name):
+        return None
 
-    products = data.get("data", {}).get("products")
-    if not products:
+    # Only the first product ID is cached, empty results are negative-cached instead
+    result = await fetch_projection(
+        cache_key, settings.attraction_auto_complete_url, {"query": city_name},
+        project=lambda d: ((d.get("data", {}).get("products") or [{}])[0]).get("id"),
+        cache_if=bool,
+    )
+    if not result:
+        await mark_negative("attraction_autocomplete", city_name)
         return None  # No products found
-
-    result = products[0]["id"]  # Take the first product ID as result
-    # Cache the result in Redis with expiry
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
     return result
 
 
@@ -55,38 +111,84 @@ async def get_attractions_search(client: httpx.AsyncClient, attraction_id: str,
     """
     Search for attractions by location ID and date range, with caching.
     """
+    result, _ = await get_attractions_search_with_hash(client, attraction_id, arrival_date, departure_date)
+    return result
+
+
+async def get_attractions_search_with_hash(client: httpx.AsyncClient, attraction_id: str, arrival_date: str, departure_date: str):
+    """
+    get_attractions_search plus the content hash stored alongside the cached result, used for ETags.
+    Returns a tuple: (search result, content hash or None when nothing was found)
+    """
     cache_key = f"attraction_search:{attraction_id}:{arrival_date}:{departure_date}"
-    cached = await get_redis_client().get(cache_key)  # Check cache first
+    cached, cached_hash = await get_with_hash(cache_key)  # Check cache first
     if cached:
-        return json.loads(cached)
+        return json.loads(cached), cached_hash
+
+    search_key = f"{attraction_id}:{arrival_date}:{departure_date}"
+    if await is_negative("attraction_search", search_key):
+        return {}, None
+
+    # Cache the search result with its content hash, empty results are negative-cached instead
+    params = {"id": attraction_id, "startDate": arrival_date, "endDate": departure_date}
+    result, result_hash = await fetch_projection(
+        cache_key, settings.attraction_search_url, params,
+        project=lambda d: {"products": [trim_search_product(p) for p in d.get("data", {}).get("products") or []]},
+        cache_if=lambda r: bool(r.get("products")),
+        with_hash=True,
+    )
+    if not result.get("products"):
+        await mark_negative("attraction_search", search_key)
+        return result, None
+    return result, result_hash
 
-    async with semaphore:
-        url = os.getenv("ATTRACTION_SEARCH_URL")
-        params = {"id": attraction_id, "startDate": arrival_date, "endDate": departure_date}
-        data = await cached_get(url, params=params, headers=HEADERS, ttl=CACHE_TTL)
 
-    result = data.get("data", {})
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))  # Cache the fresh result
-    return result
+async def get_availability_bitmap(client: httpx.AsyncClient, attraction_id: str):
+    """
+    Get the availability calendar for a given attraction as a compact bitmap (cached).
+    """
+    cache_key = f"availability_bitmap:{attraction_id}"
+    cached = await get_cache().get(cache_key)
+    if cached:
+        return AvailabilityBitmap.decode(cached)
+
+    return await fetch_projection(
+        cache_key, settings.attraction_availability_calendar_url, {"id": attraction_id},
+        project=lambda d: AvailabilityBitmap.from_calendar(d.get("data", [])),
+        encode=AvailabilityBitmap.encode, decode=AvailabilityBitmap.decode,
+    )
 
 
-async def get_availability_calendar(client: httpx.AsyncClient, attraction_id: str):
+async def get_availability_bitmaps(client: httpx.AsyncClient, attraction_ids):
     """
-    Get availability calendar for a given attraction (cached).
+    Get availability bitmaps for many attractions: one MGET for the cached ones,
+    concurrent fetches for the rest. Returns {attraction_id: AvailabilityBitmap}.
     """
-    cache_key = f"availability_calendar:{attraction_id}"
-    cached = await get_redis_client().get(cache_key)
-    if cached:
-        return json.loads(cached)
+    if not attraction_ids:
+        return {}
 
-    async with semaphore:
-        url = os.getenv("ATTRACTION_AVAILABILITY_CALENDAR_URL")
-        params = {"id": attraction_id}
-        data = await cached_get(url, params=params, headers=HEADERS, ttl=CACHE_TTL)
+    cached_values = await get_cache().get_many([f"availability_bitmap:{a}" for a in attraction_ids])
+    bitmaps = {
+        attraction_id: AvailabilityBitmap.decode(value)
+        for attraction_id, value in zip(attraction_ids, cached_values) if value
+    }
+
+    missing = [a for a in attraction_ids if a not in bitmaps]
+    fetched = await asyncio.gather(*[get_availability_bitmap(client, a) for a in missing])
+    bitmaps.update(zip(missing, fetched))
+    return bitmaps
 
-    result = data.get("data", [])
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
-    return result
+
+async def filter_open_during_stay(client: httpx.AsyncClient, products, arrival_date: date, departure_date: date):
+    """
+    Keep only the attractions available on at least one day of the stay.
+    Evaluated with bitmap range queries, no date lists are decoded.
+    """
+    bitmaps = await get_availability_bitmaps(client, [product.get("id") for product in products])
+    return [
+        product for product in products
+        if bitmaps[product.get("id")].any_available(arrival_date, departure_date)
+    ]
 
 
 async def get_availability(client: httpx.AsyncClient, attraction_id: str, attraction_date: str):
@@ -94,42 +196,44 @@ async def get_availability(client: httpx.AsyncClient, attraction_id: str, attrac
     Get availability information for a specific date of an attraction (cached).
     """
     cache_key = f"availability:{attraction_id}:{attraction_date}"
-    cached = await get_redis_client().get(cache_key)
+    cached = await get_cache().get(cache_key)
     if cached:
         return json.loads(cached)
 
-    async with semaphore:
-        url = os.getenv("ATTRACTION_AVAILABILITY_URL")
-        params = {"id": attraction_id, "date": attraction_date}
-        data = await cached_get(url, params=params, headers=HEADERS, ttl=CACHE_TTL)
+    # Only the start times are used, so only they are cached
+    return await fetch_projection(
+        cache_key, settings.attraction_availability_url, {"id": attraction_id, "date": attraction_date},
+        project=lambda d: [{"start": avail.get("start")} for avail in d.get("data", [])],
+    )
 
-    result = data.get("data", [])
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
-    return result
 
+async def skipped():
+    return None
 
-async def fetch_availability_data(client: httpx.AsyncClient, attraction_id: str, attraction_date: str):
+
+async def fetch_availability_data(client: httpx.AsyncClient, attraction_id: str, attraction_date: str,
+                                  dates: bool = True, times: bool = True):
     """
     Fetch availability calendar and specific date availability concurrently.
-    Returns lists of available dates and available time slots.
+    Returns lists of available dates and available time slots; a list switched
+    off with dates / times is returned empty without calling its API.
     """
-    # Fetch calendar and date availability concurrently for performance
-    calendar_data, availability_data = await asyncio.gather(
-        get_availability_calendar(client, attraction_id),
-        get_availability(client, attraction_id, attraction_date)
+    # Fetch calendar bitmap and date availability concurrently for performance
+    bitmap, availability_data = await asyncio.gather(
+        get_availability_bitmap(client, attraction_id) if dates else skipped(),
+        get_availability(client, attraction_id, attraction_date) if times else skipped()
     )
 
-    # Filter available dates where "available" is not "false"
+    # Only available days are set in the bitmap
     available_dates = [
-        {"availability_date": cal.get("date")}
-        for cal in calendar_data
-        if cal.get("available") != "false"
+        {"availability_date": day.isoformat()}
+        for day in (bitmap.available_dates() if bitmap is not None else [])
     ]
 
     # Extract available start times
     available_times = [
         {"start_at": avail.get("start")}
-        for avail in availability_data
+        for avail in availability_data or []
     ]
 
     return available_dates, available_times
@@ -143,78 +247,105 @@ async def get_attraction_detail(slug: str):
         return None
 
     cache_key = f"attraction_detail:{slug}"
-    cached = await get_redis_client().get(cache_key)
+    cached = await get_cache().get(cache_key)
     if cached:
         return json.loads(cached)
 
-    async with semaphore:
-        url = os.getenv("ATTRACTION_DETAIL_URL")
-        params = {"slug": slug}
-        data = await cached_get(url, params=params, headers=HEADERS, ttl=CACHE_TTL)
+    return await fetch_projection(
+        cache_key, settings.attraction_detail_url, {"slug": slug},
+        project=lambda d: d.get("data", {}).get("description"),
+    )
+
+
+async def build_attraction(client: httpx.AsyncClient, attraction: dict, attraction_date: str,
+                           base_currency_code: str, base_currency_date: str, fields=None):
+    """
+    Build the full info for one attraction as a single pipeline:
+    availability and description are fetched concurrently, then the price is converted.
+    With a sparse fieldset, calls for fields that were not requested are skipped.
+    """
+    (available_dates, available_times), description = await asyncio.gather(
+        fetch_availability_data(client, attraction.get("id"), attraction_date,
+                                dates=wants(fields, "available_date"), times=wants(fields, "attraction_daily_timing")),
+        get_attraction_detail(attraction.get("slug")) if wants(fields, "attraction_description") else skipped()
+    )
+
+    price = attraction.get("representativePrice", {}).get("chargeAmount")
+    currency = attraction.get("representativePrice", {}).get("currency", "USD")
+
+    price_in_bhd = None
+    if price is not None and wants(fields, "attraction_price"):
+        # Convert price to BHD currency
+        price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
 
-    description = data.get("data", {}).get("description")
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(description))
-    return description
+    return select(attraction_record(
+        attraction, description, price_in_bhd, base_currency_code, base_currency_date, available_dates, available_times
+    ), fields)
 
 
-async def build_attractions(client: httpx.AsyncClient, attractions: dict, attraction_date: str):
+def attraction_record(attraction: dict, description, price_in_bhd, base_currency_code: str, base_currency_date: str,
+                      available_dates, available_times) -> dict:
     """
-    Build a detailed list of attractions with availability, descriptions, and price conversions.
+    An /attraction record from a search product and its enrichment.
     """
-    found_attractions = []
-    tasks = []
+    return {
+        "attraction_id": attraction.get("id"),
+        "attraction_name": attraction.get("name"),
+        "allReviewsCount": (attraction.get("reviewsStats") or {}).get("allReviewsCount"),
+        "percentageReview": (attraction.get("reviewsStats") or {}).get("percentage"),
+        "averageReview": (attraction.get("numericReviewsStats") or {}).get("average"),
+        "totalReview": (attraction.get("numericReviewsStats") or {}).get("total"),
+        "attractionPhoto": (attraction.get("primaryPhoto") or {}).get("small"),
+        "attraction_description": description,  # Use cached or fetched description
+        "attraction_price": price_in_bhd,  # Price converted to BHD
+        "currency": "BHD",
+        "base_currency": base_currency_code,
+        "base_currency_date": base_currency_date,
+        "available_date": available_dates,
+        "attraction_daily_timing": available_times
+    }
+
+
+def degraded_attraction(attraction: dict, base_currency_code: str, base_currency_date: str, fields=None) -> dict:
+    """
+    The search fields of an attraction whose enrichment failed while an upstream was
+    down, without description, price or availability, marked "degraded".
+    """
+    record = attraction_record(attraction, None, None, base_currency_code, base_currency_date, [], [])
+    record["degraded"] = True
+    return select(record, fields)
 
+
+async def build_attractions(client: httpx.AsyncClient, attractions: dict, attraction_date: str,
+                            page: int = 1, limit: int = 10, fields=None):
+    """
+    Build a detailed list of attractions with availability, descriptions, and price conversions.
+    Only the requested page is enriched, and each attraction runs as its own pipeline
+    so the total latency is bounded by the slowest attraction. An attraction whose
+    pipeline hits an upstream outage is returned degraded instead of failing the page.
+    """
     # Get exchange rates once to convert all prices to BHD (Bahraini Dinar)
     exchange_data = await ExchangeRateService.get_rates()
     base_currency_code = exchange_data.get("base_currency", "BHD")
     base_currency_date = exchange_data.get("base_currency_date", "")
 
-    # Prepare asynchronous tasks to fetch availability data for all attractions
-    for attraction in attractions.get("products", []):
-        attr_id = attraction.get("id")
-        tasks.append(fetch_availability_data(client, attr_id, attraction_date))
+    # Apply pagination before any enrichment call is made
+    start = (page - 1) * limit
+    page_products = attractions.get("products", [])[start:start + limit]
 
-    # Run all availability fetches concurrently
-    availability_results = await asyncio.gather(*tasks)
-
-    # Prepare tasks to fetch attraction descriptions concurrently
-    detail_tasks = [
-        get_attraction_detail(attraction.get("slug"))
-        for attraction in attractions.get("products", [])
-    ]
-    descriptions = await asyncio.gather(*detail_tasks)
-
-    # Combine all data to build the final list of attraction info dictionaries
-    for idx, (attraction, (available_dates, available_times)) in enumerate(
-        zip(attractions.get("products", []), availability_results)
-    ):
-        price = attraction.get("representativePrice", {}).get("chargeAmount")
-        currency = attraction.get("representativePrice", {}).get("currency", "USD")
-
-        price_in_bhd = None
-        if price is not None:
-            # Convert price to BHD currency
-            price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
-
-        attraction_info = {
-            "attraction_id": attraction.get("id"),
-            "attraction_name": attraction.get("name"),
-            "allReviewsCount": (attraction.get("reviewsStats") or {}).get("allReviewsCount"),
-            "percentageReview": (attraction.get("reviewsStats") or {}).get("percentage"),
-            "averageReview": (attraction.get("numericReviewsStats") or {}).get("average"),
-            "totalReview": (attraction.get("numericReviewsStats") or {}).get("total"),
-            "allReviewsCount": (attraction.get("reviewsStats") or {}).get("allReviewsCount"),
-            "attractionPhoto": (attraction.get("primaryPhoto") or {}).get("small"),
-            "attraction_description": descriptions[idx],  # Use cached or fetched description
-            "attraction_price": price_in_bhd,  # Price converted to BHD
-            "currency": "BHD",
-            "base_currency": base_currency_code,
-            "base_currency_date": base_currency_date,
-            "available_date": available_dates,
-            "attraction_daily_timing": available_times
-        }
-        found_attractions.append(attraction_info)
+    # Run all per-attraction pipelines concurrently, results keep the page order
+    results = await asyncio.gather(*[
+        build_attraction(client, attraction, attraction_date, base_currency_code, base_currency_date, fields)
+        for attraction in page_products
+    ], return_exceptions=True)
 
+    found_attractions = []
+    for attraction, result in zip(page_products, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception) or not is_degradable(result):
+                raise result
+            result = degraded_attraction(attraction, base_currency_code, base_currency_date, fields)
+        found_attractions.append(result)
     return found_attractions
 
 
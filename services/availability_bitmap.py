@@ -0,0 +1,91 @@
+import base64
+from datetime import date, timedelta
+
+
+class AvailabilityBitmap:
+    """
+    Compact availability calendar: a start date plus one bit per day,
+    where bit i is set when the attraction is available on start + i days.
+    Range queries are answered with integer masks, without building date lists.
+    """
+
+    __slots__ = ("start", "bits", "days")
+
+    def __init__(self, start: date, bits: int = 0, days: int = 0):
+        self.start = start
+        self.bits = bits
+        self.days = days
+
+    @classmethod
+    def from_calendar(cls, calendar):
+        """
+        Build a bitmap from the upstream calendar: a list of {"date": "YYYY-MM-DD", "available": ...}.
+        Days marked "false" (or False) are unavailable, as are days missing from the calendar.
+        """
+        available_days = []
+        for entry in calendar or []:
+            try:
+                day = date.fromisoformat(entry.get("date"))
+            except (TypeError, ValueError):
+                continue
+            if entry.get("available") not in ("false", False):
+                available_days.append(day)
+
+        if not available_days:
+            return cls(date.today())
+
+        start = min(available_days)
+        bits = 0
+        for day in available_days:
+            bits |= 1 << (day - start).days
+        return cls(start, bits, bits.bit_length())
+
+    def encode(self) -> str:
+        """
+        Serialize as "YYYY-MM-DD:<days>:<base64 little-endian bits>" for caching.
+        """
+        raw = self.bits.to_bytes((self.days + 7) // 8, "little")
+        return f"{self.start.isoformat()}:{self.days}:{base64.b64encode(raw).decode()}"
+
+    @classmethod
+    def decode(cls, encoded: str):
+        start, days, raw = encoded.split(":", 2)
+        bits = int.from_bytes(base64.b64decode(raw), "little")
+        return cls(date.fromisoformat(start), bits, int(days))
+
+    def _offsets(self, first: date, last: date):
+        # Clip an inclusive date range to bit offsets inside the bitmap, None if disjoint
+        lo = max((first - self.start).days, 0)
+        hi = min((last - self.start).days, self.days - 1)
+        return (lo, hi) if lo <= hi else None
+
+    def is_available(self, day: date) -> bool:
+        return self.any_available(day, day)
+
+    def any_available(self, first: date, last: date) -> bool:
+        """
+        True if the attraction is available on any day between first and last (inclusive).
+        """
+        offsets = self._offsets(first, last)
+        if offsets is None:
+            return False
+        lo, hi = offsets
+        mask = ((1 << (hi - lo + 1)) - 1) << lo
+        return bool(self.bits & mask)
+
+    def next_available(self, from_day: date, n: int):
+        """
+        Return up to n available dates on or after from_day.
+        """
+        lo = max((from_day - self.start).days, 0)
+        remaining = self.bits >> lo
+        found = []
+        while remaining and len(found) < n:
+            lowest = remaining & -remaining
+            offset = lowest.bit_length() - 1
+            found.append(self.start + timedelta(days=lo + offset))
+            remaining ^= lowest
+        return found
+
+    def available_dates(self):
+        return self.next_available(self.start, self.days)
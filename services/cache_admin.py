@@ -0,0 +1,234 @@
+import asyncio, fnmatch, heapq, logging, random
+from collections import defaultdict
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from config.cache import NAMESPACE_TTLS, STATS_KEY, get_cache, key_namespace
+from config.redis_client import get_redis_client
+from config.settings import get_settings
+from services.negative_cache import flush_negative_stats, get_negative_cache_stats
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Keys fetched per SCAN step (and unlinked per command): small enough that Redis is never blocked for long
+SCAN_COUNT = 500
+
+# Most keys considered per namespace in one budget enforcement run
+MAX_EVICTION_CANDIDATES = 20000
+
+
+async def scan_keys(match: str = "*"):
+    """
+    Iterate over keys matching `match` with incremental SCAN.
+    """
+    async for key in get_redis_client().scan_iter(match=match, count=SCAN_COUNT):
+        yield key
+
+
+async def namespace_memory_report(match: str = "*", sample_size: int = 50) -> dict:
+    """
+    Key count and estimated memory per namespace. Sizes come from MEMORY USAGE
+    on a random sample of up to sample_size keys per namespace (reservoir
+    sampling), extrapolated to the namespace's key count.
+    """
+    counts = defaultdict(int)
+    samples = defaultdict(list)
+    async for key in scan_keys(match):
+        namespace = key_namespace(key)
+        counts[namespace] += 1
+        if len(samples[namespace]) < sample_size:
+            samples[namespace].append(key)
+        else:
+            slot = random.randrange(counts[namespace])
+            if slot < sample_size:
+                samples[namespace][slot] = key
+
+    redis_client = get_redis_client()
+    report = {}
+    for namespace, keys in samples.items():
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            sizes = [size for size in await pipe.execute() if size is not None]
+        average = sum(sizes) / len(sizes) if sizes else 0
+        report[namespace] = {
+            "keys": counts[namespace],
+            "sampled": len(sizes),
+            "avg_bytes": round(average),
+            "est_bytes": round(average * counts[namespace]),
+        }
+    return dict(sorted(report.items(), key=lambda item: item[1]["est_bytes"], reverse=True))
+
+
+async def get_hit_ratios() -> dict:
+    """
+    Hits, misses and hit ratio per namespace, summed over all workers (flushed counters).
+    """
+    await get_cache().flush_stats()
+    counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+    for field, value in (await get_redis_client().hgetall(STATS_KEY)).items():
+        namespace, counter = field.rsplit(":", 1)
+        counters[namespace][counter] = int(value)
+
+    for entry in counters.values():
+        lookups = entry["hits"] + entry["misses"]
+        entry["hit_ratio"] = round(entry["hits"] / lookups, 3) if lookups else None
+    return dict(counters)
+
+
+def budget_bytes(namespace: str):
+    budget_mb = settings.cache_budgets_mb.get(namespace)
+    return int(budget_mb * 1024 * 1024) if budget_mb is not None else None
+
+
+async def get_cache_overview(sample_size: int = 50) -> dict:
+    """
+    Registry view of every namespace: key count, sampled size, hit ratio, TTL and budget.
+    While Redis is unavailable only the backend health (memory fallback) is reported,
+    with empty namespace and negative-cache sections.
+    """
+    cache = get_cache()
+    unavailable = {"backend": cache.health(), "namespaces": {}, "negative_cache": {}}
+    if not cache.redis_available():
+        return unavailable
+    try:
+        report = await namespace_memory_report(sample_size=sample_size)
+        hits = await get_hit_ratios()
+        negative_cache = await get_negative_cache_stats()
+    except (RedisError, OSError) as e:
+        cache.record_failure(e)
+        return {**unavailable, "backend": cache.health()}
+
+    namespaces = {}
+    for namespace in sorted(set(report) | set(hits)):
+        entry = report.get(namespace, {"keys": 0, "sampled": 0, "avg_bytes": 0, "est_bytes": 0})
+        base = namespace.split(":", 1)[-1] if namespace.startswith("hash:") else namespace
+        budget = budget_bytes(namespace)
+        namespaces[namespace] = {
+            **entry,
+            **hits.get(namespace, {"hits": 0, "misses": 0, "hit_ratio": None}),
+            "ttl": settings.cache_ttls.get(namespace) or NAMESPACE_TTLS.get(base),
+            "budget_bytes": budget,
+            "over_budget": budget is not None and entry["est_bytes"] > budget,
+        }
+
+    return {
+        "backend": cache.health(),
+        "namespaces": namespaces,
+        "negative_cache": negative_cache,
+    }
+
+
+async def unlink_keys(keys) -> int:
+    if not keys:
+        return 0
+    return await get_redis_client().unlink(*keys)
+
+
+async def purge(pattern: str) -> int:
+    """
+    Delete every key matching `pattern`, SCAN_COUNT keys at a time with UNLINK
+    (freed in the background by Redis). Matching in-memory fallback entries are dropped too.
+    """
+    if not pattern.strip() or pattern.strip() == "*":
+        raise HTTPException(status_code=400, detail="Refusing to purge every key, give a namespace pattern")
+
+    memory = get_cache().memory
+    for key in [k for k in memory.entries if fnmatch.fnmatchcase(k, pattern)]:
+        memory.delete(key)
+
+    deleted, batch = 0, []
+    async for key in scan_keys(pattern):
+        batch.append(key)
+        if len(batch) >= SCAN_COUNT:
+            deleted += await unlink_keys(batch)
+            batch = []
+    return deleted + await unlink_keys(batch)
+
+
+async def enforce_budget(namespace: str, budget: int, est_bytes: int) -> dict:
+    """
+    Evict the least valuable keys of a namespace until it fits its budget.
+    Value is judged by idle time and size: a large key nobody read for a long
+    time goes first (score = idle seconds x bytes).
+    """
+    to_free = est_bytes - budget
+    if to_free <= 0:
+        return {"evicted": 0, "freed_bytes": 0}
+
+    # Keep the highest-scoring candidates in a bounded min-heap while scanning
+    candidates, batch = [], []
+    redis_client = get_redis_client()
+
+    async def score_batch(keys):
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.object("idletime", key)
+                pipe.memory_usage(key)
+            # OBJECT IDLETIME fails under LFU eviction policies: treat those keys as just used
+            results = await pipe.execute(raise_on_error=False)
+        for i, key in enumerate(keys):
+            idle, size = results[2 * i], results[2 * i + 1]
+            if isinstance(size, Exception) or size is None:
+                continue
+            idle = 0 if isinstance(idle, Exception) or idle is None else idle
+            item = ((idle + 1) * size, key, size)
+            if len(candidates) < MAX_EVICTION_CANDIDATES:
+                heapq.heappush(candidates, item)
+            else:
+                heapq.heappushpop(candidates, item)
+
+    async for key in scan_keys(f"{namespace}:*"):
+        batch.append(key)
+        if len(batch) >= SCAN_COUNT:
+            await score_batch(batch)
+            batch = []
+    if batch:
+        await score_batch(batch)
+
+    evicted, freed, victims = 0, 0, []
+    for _, key, size in sorted(candidates, reverse=True):
+        if freed >= to_free:
+            break
+        victims.append(key)
+        freed += size
+        if len(victims) >= SCAN_COUNT:
+            evicted += await unlink_keys(victims)
+            victims = []
+    evicted += await unlink_keys(victims)
+    return {"evicted": evicted, "freed_bytes": freed}
+
+
+async def enforce_budgets(sample_size: int = 50) -> dict:
+    """
+    Check every namespace with a budget and evict from those over it.
+    """
+    results = {}
+    for namespace in settings.cache_budgets_mb:
+        report = await namespace_memory_report(f"{namespace}:*", sample_size)
+        entry = report.get(namespace)
+        if entry:
+            results[namespace] = await enforce_budget(namespace, budget_bytes(namespace), entry["est_bytes"])
+    return results
+
+
+async def cache_maintenance():
+    """
+    Background loop: flush the cache and negative-cache hit/miss counters every
+    CACHE_STATS_FLUSH_INTERVAL seconds and enforce namespace budgets every
+    CACHE_BUDGET_INTERVAL seconds.
+    """
+    loop = asyncio.get_running_loop()
+    next_budget_run = loop.time() + settings.cache_budget_interval
+    while True:
+        await asyncio.sleep(settings.cache_stats_flush_interval)
+        try:
+            await get_cache().flush_stats()
+            await flush_negative_stats()
+            if loop.time() >= next_budget_run and get_cache().redis_available():
+                next_budget_run = loop.time() + settings.cache_budget_interval
+                evicted = await enforce_budgets()
+                if any(result["evicted"] for result in evicted.values()):
+                    logger.info("Cache budgets enforced", extra={"evicted": evicted})
+        except Exception:
+            logger.exception("Cache maintenance failed")
@@ -0,0 +1,130 @@
+import time
+import httpx
+from config.settings import get_settings
+from config.deadline import bound_by_deadline, timeout_for
+
+settings = get_settings()
+
+# Consecutive failures that open a breaker, and seconds it stays open before a probe is let through
+FAILURE_THRESHOLD = settings.circuit_failure_threshold
+RECOVERY_TIMEOUT = settings.circuit_recovery_timeout
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose breaker is open.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit open for {name}")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one upstream URL.
+    - closed: requests flow, consecutive failures are counted
+    - open: requests fail fast until RECOVERY_TIMEOUT has passed
+    - half_open: a single probe request decides between closed and open
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 recovery_timeout: float = RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = None
+        self._state = self.CLOSED
+
+    @property
+    def state(self):
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(self.recovery_timeout - (time.monotonic() - self.opened_at), 0)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN:
+            return False
+
+        # Half-open: let one probe through. A probe that never reported back
+        # (e.g. cancelled) is replaced after another recovery timeout.
+        now = time.monotonic()
+        if self.probe_started_at is None or now - self.probe_started_at >= self.recovery_timeout:
+            self.probe_started_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.probe_started_at = None
+        self._state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        self.probe_started_at = None
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def check(self):
+        """
+        Raise CircuitOpenError if a request may not be sent right now.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+
+# One breaker per upstream URL, created on first use
+_breakers = {}
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    breaker = _breakers.get(url)
+    if breaker is None:
+        breaker = _breakers[url] = CircuitBreaker(url)
+    return breaker
+
+
+def breaker_states() -> dict:
+    """
+    Current state of every known breaker, for diagnostics.
+    """
+    return {name: breaker.state for name, breaker in _breakers.items()}
+
+
+def is_upstream_failure(status_code: int) -> bool:
+    # Rate limiting and server errors count against the upstream, other 4xx do not
+    return status_code == 429 or status_code >= 500
+
+
+async def guarded_get(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """
+    client.get() through the breaker for `url`, bounded by the request deadline.
+    Raises CircuitOpenError without sending anything while the breaker is open.
+    Running out of our own deadline does not count as an upstream failure.
+    """
+    breaker = get_breaker(url)
+    breaker.check()
+    kwargs.setdefault("timeout", timeout_for(client.timeout.read or 30))
+    try:
+        response = await bound_by_deadline(client.get(url, **kwargs))
+    except httpx.RequestError:
+        breaker.record_failure()
+        raise
+
+    if is_upstream_failure(response.status_code):
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
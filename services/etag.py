@@ -0,0 +1,54 @@
+import hashlib, json
+from typing import Union
+from fastapi import Request, Response
+from config.settings import get_settings
+
+settings = get_settings()
+
+# How long clients may reuse a search response before revalidating with If-None-Match
+SEARCH_CACHE_MAX_AGE = settings.search_cache_max_age
+
+
+def content_hash(payload: Union[str, bytes]) -> str:
+    """
+    Stable hash of a serialized cache value, stored next to it as hash:<cache key>.
+    """
+    return hashlib.sha1(payload if isinstance(payload, bytes) else payload.encode()).hexdigest()
+
+
+def body_hash(body) -> str:
+    """
+    Content hash of a response body, for ETags of responses assembled from several cached sources.
+    """
+    return content_hash(json.dumps(body, sort_keys=True, default=str))
+
+
+def make_etag(*parts) -> str:
+    """
+    Build an ETag from the content hashes and request parameters that fully
+    determine a response. It is weak: the identity, gzip and br encodings of
+    the response (config.compression) share it.
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def matches_if_none_match(request: Request, etag: str) -> bool:
+    """
+    True if the client already holds `etag` (weak comparison, as for GET requests).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def cache_headers(etag: str, max_age: int = SEARCH_CACHE_MAX_AGE) -> dict:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
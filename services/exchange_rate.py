@@ -2,17 +2,19 @@ import time
 import json
 import httpx
 from fastapi import HTTPException
-from config.redis_client import get_redis_client
-import os
-from dotenv import load_dotenv
+from config.cache import get_cache
+from config.http_pool import get_http_client
+from config.deadline import timeout_for
+from services.http_client import cache_with_stale, get_stale, is_degradable
+from services.circuit_breaker import guarded_get
+from config.settings import get_settings
 
-# Load environment variables from the .env file before accessing them
-load_dotenv()  
+settings = get_settings()
 
 # Set headers for API requests, using keys from environment variables
 HEADERS = {
-    "x-rapidapi-key": os.getenv("RAPID_API_KEY"),
-    "x-rapidapi-host": os.getenv("RAPID_API_HOST")
+    "x-rapidapi-key": settings.rapid_api_key,
+    "x-rapidapi-host": settings.rapid_api_host
 }
 
 # Timeout for HTTP requests in seconds
@@ -42,7 +44,7 @@ class ExchangeRateService:
 
         # Try to get cached data from Redis
         redis_key = f"exchange_rates:{base_currency}"
-        cached = await get_redis_client().get(redis_key)
+        cached = await get_cache().get(redis_key)
         if cached:
             data = json.loads(cached)
             # Update in-memory cache and last fetch time
@@ -51,41 +53,47 @@ class ExchangeRateService:
             return data
 
         # If no cache or expired, fetch fresh data from external API
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            params = {"baseCurrency": base_currency}
-            resp = await client.get(os.getenv("EXCHANGE_RATE_URL"), headers=HEADERS, params=params)
-
-            # If API response is not successful, raise an HTTP error
-            if resp.status_code != 200:
-                raise HTTPException(status_code=resp.status_code, detail="Failed to fetch exchange rates")
-
-            data = resp.json()
-
-            # Extract relevant information from API response
-            base_currency_code = data.get("data", {}).get("base_currency", base_currency)
-            base_currency_date = data.get("data", {}).get("base_currency_date", "")
-            rates_list = data.get("data", {}).get("exchange_rates", [])
-
-            # Convert list of rates into a dictionary mapping currency codes to exchange rate values
-            rates_dict = {
-                r.get("currency"): r.get("exchange_rate_buy")
-                for r in rates_list if r.get("currency") and r.get("exchange_rate_buy")
-            }
-
-            # Prepare the final result dict with base currency info and rates dictionary
-            result = {
-                "base_currency": base_currency_code,
-                "base_currency_date": base_currency_date,
-                "rates": rates_dict
-            }
-
-            # Cache the result in Redis for subsequent requests
-            await get_redis_client().setex(redis_key, CACHE_TTL, json.dumps(result))
-
-            # Update in-memory cache and timestamp
-            cls._rates_cache = result
-            cls._last_fetch_time = current_time
-            return result
+        client = get_http_client()
+        params = {"baseCurrency": base_currency}
+        try:
+            resp = await guarded_get(client, settings.exchange_rate_url, headers=HEADERS, params=params,
+                                     timeout=timeout_for(TIMEOUT))
+            resp.raise_for_status()
+        except Exception as e:
+            # Upstream down: keep using the last known rates if we have them
+            stale = await get_stale(redis_key) if is_degradable(e) else None
+            if stale is None:
+                status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 503
+                raise HTTPException(status_code=status_code, detail="Failed to fetch exchange rates")
+            return json.loads(stale)
+
+        data = resp.json()
+
+        # Extract relevant information from API response
+        base_currency_code = data.get("data", {}).get("base_currency", base_currency)
+        base_currency_date = data.get("data", {}).get("base_currency_date", "")
+        rates_list = data.get("data", {}).get("exchange_rates", [])
+
+        # Convert list of rates into a dictionary mapping currency codes to exchange rate values
+        rates_dict = {
+            r.get("currency"): r.get("exchange_rate_buy")
+            for r in rates_list if r.get("currency") and r.get("exchange_rate_buy")
+        }
+
+        # Prepare the final result dict with base currency info and rates dictionary
+        result = {
+            "base_currency": base_currency_code,
+            "base_currency_date": base_currency_date,
+            "rates": rates_dict
+        }
+
+        # Cache the result in Redis for subsequent requests
+        await cache_with_stale(redis_key, CACHE_TTL, json.dumps(result))
+
+        # Update in-memory cache and timestamp
+        cls._rates_cache = result
+        cls._last_fetch_time = current_time
+        return result
 
     @classmethod
     async def convert_to_bhd(cls, amount: float, from_currency: str) -> float:
@@ -123,4 +131,4 @@ class ExchangeRateService:
         cls._rates_cache = None
         cls._last_fetch_time = 0
         redis_key = f"exchange_rates:{base_currency}"
-        await get_redis_client().delete(redis_key)
+        await get_cache().delete(redis_key)
@@ -0,0 +1,69 @@
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Hashable
+
+
+class FairLimiter:
+    """
+    Concurrency limit shared by many flows (e.g. the legs of batch searches and
+    single searches) that hands out free slots round-robin across flows instead
+    of first come, first served: a flow queueing 25 jobs cannot starve one
+    queueing 2. Jobs run in their caller's own task, so request deadlines and
+    logging context still apply to them.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        # flow key -> waiting futures, in the order flows get their next turn
+        self.waiters: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+    async def acquire(self, key: Hashable):
+        if self.active < self.capacity and not self.waiters:
+            self.active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(key, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted a slot just as the caller was cancelled: hand it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._grant()
+
+    def _grant(self):
+        while self.active < self.capacity and self.waiters:
+            key, queue = next(iter(self.waiters.items()))
+            waiter = queue.popleft()
+            # The flow goes to the back of the line, or leaves it once it has nothing queued
+            if queue:
+                self.waiters.move_to_end(key)
+            else:
+                del self.waiters[key]
+            if waiter.cancelled():
+                continue
+            self.active += 1
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "flows_waiting": len(self.waiters),
+            "jobs_waiting": sum(len(queue) for queue in self.waiters.values()),
+        }
@@ -0,0 +1,44 @@
+from typing import FrozenSet, Iterable, Optional
+from fastapi import HTTPException
+
+# Sparse fieldsets: ?fields=a,b,c limits a search response to those fields of each record.
+# None means every field. The record's id field is always kept so clients can match results.
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str], id_field: str) -> Optional[FrozenSet[str]]:
+    """
+    Parse a comma separated fields= parameter. Raises 400 on unknown field names.
+    """
+    if fields is None or not fields.strip():
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}",
+        )
+    return frozenset(requested | {id_field})
+
+
+def wants(fields: Optional[FrozenSet[str]], *names: str) -> bool:
+    """
+    True if any of `names` is part of the response, i.e. worth computing or fetching.
+    """
+    return fields is None or any(name in fields for name in names)
+
+
+def select(record: dict, fields: Optional[FrozenSet[str]]) -> dict:
+    """
+    Keep only the requested fields of a record (markers such as "degraded" are always kept).
+    """
+    if fields is None:
+        return record
+    return {key: value for key, value in record.items() if key in fields or key == "degraded"}
+
+
+def fields_key(fields: Optional[FrozenSet[str]]) -> str:
+    """
+    Stable representation of a fieldset for ETags.
+    """
+    return "*" if fields is None else ",".join(sorted(fields))
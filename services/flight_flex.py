@@ -0,0 +1,156 @@
+import asyncio, json
+from datetime import date, timedelta
+from fastapi import HTTPException
+from config.cache import get_cache
+from config.http_pool import get_http_client
+from services.exchange_rate import ExchangeRateService
+from services.flights import HEADERS, ROUNDTRIP_CACHE_TTL, get_airport_info, get_offer_list_price
+from services.http_client import cached_get, is_degradable
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Cheapest-offer cells live as long as the round-trip searches they summarize
+FLEX_CELL_TTL = settings.flight_flex_cell_ttl
+FLEX_MAX_DAYS = settings.flight_flex_max_days
+
+# Most uncached cells searched per request: what the shared 3-call upstream limit can
+# finish within the flight_flex deadline. Cells past it are returned as pending and
+# filled by later requests, since every finished cell is cached.
+FLEX_MAX_SEARCHES = settings.flight_flex_max_searches
+
+
+def cell_key(departure_id: str, arrival_id: str, outbound_date: date, return_date: date) -> str:
+    return f"flight_flex:{departure_id}:{arrival_id}:{outbound_date.isoformat()}:{return_date.isoformat()}"
+
+
+def cheapest_offer(data: dict) -> dict:
+    """
+    Reduce a round-trip search payload to its cheapest list price and offer count.
+    """
+    offers = data.get("data", {}).get("flightOffers", [])
+    prices = [price for price in (get_offer_list_price(offer) for offer in offers) if price[0] is not None]
+    if not prices:
+        return {"price": None, "currency": None, "offers": len(offers)}
+    price, currency = min(prices, key=lambda price: price[0])
+    return {"price": price, "currency": currency, "offers": len(offers)}
+
+
+async def fetch_cell(departure_id: str, arrival_id: str, outbound_date: date, return_date: date) -> dict:
+    """
+    Run one round-trip search for a cell. It reads through the same http_cache
+    entry as /flight for those dates (and leaves one for it); the shared
+    cached_get limiter caps concurrency.
+    """
+    params = {
+        "departId": departure_id,
+        "arrivalId": arrival_id,
+        "departDate": outbound_date.isoformat(),
+        "returnDate": return_date.isoformat(),
+    }
+    data = await cached_get(settings.flight_roundtrip_url, params=params, headers=HEADERS, ttl=ROUNDTRIP_CACHE_TTL)
+    return cheapest_offer(data)
+
+
+async def get_flex_cells(departure_id: str, arrival_id: str, pairs, center):
+    """
+    Cheapest-offer summary of every (outbound, return) date pair. Cached cells
+    come from one MGET, then up to FLEX_MAX_SEARCHES others are searched
+    concurrently, nearest to `center` (the requested dates) first, and cached,
+    so overlapping windows reuse each other's cells. Cells whose search failed
+    are returned as degraded, cells left for a later request as pending;
+    neither is cached.
+    """
+    keys = [cell_key(departure_id, arrival_id, *pair) for pair in pairs]
+    cached = await get_cache().get_many(keys)
+    cells = {pair: json.loads(value) for pair, value in zip(pairs, cached) if value}
+
+    outbound_center, return_center = center
+    missing = sorted((pair for pair in pairs if pair not in cells),
+                     key=lambda pair: abs((pair[0] - outbound_center).days) + abs((pair[1] - return_center).days))
+    missing, pending = missing[:FLEX_MAX_SEARCHES], missing[FLEX_MAX_SEARCHES:]
+    for pair in pending:
+        cells[pair] = {"price": None, "currency": None, "offers": None, "pending": True}
+
+    results = await asyncio.gather(*[fetch_cell(departure_id, arrival_id, *pair) for pair in missing],
+                                   return_exceptions=True)
+
+    fresh = []
+    for pair, result in zip(missing, results):
+        if isinstance(result, Exception):
+            if not is_degradable(result):
+                raise result
+            cells[pair] = {"price": None, "currency": None, "offers": None, "degraded": True}
+        else:
+            cells[pair] = result
+            fresh.append((cell_key(departure_id, arrival_id, *pair), json.dumps(result), FLEX_CELL_TTL))
+    if fresh:
+        await get_cache().set_many(fresh)
+    return cells
+
+
+async def get_flex_matrix(city_name: str, departure_city_name: str, arrival_date: str, departure_date: str,
+                          flex_days: int) -> dict:
+    """
+    Departure-by-return price matrix for every outbound date within flex_days of
+    arrival_date and every return date within flex_days of departure_date
+    (returns before the outbound date are left out). Each cell holds the
+    cheapest list price in BHD; /flight with the chosen dates gives the offers.
+    A wide matrix may take several requests to fill: "complete" is false while
+    some cells are still pending or degraded.
+    """
+    try:
+        outbound_center, return_center = date.fromisoformat(arrival_date), date.fromisoformat(departure_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+    if not 0 <= flex_days <= FLEX_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"flex_days must be between 0 and {FLEX_MAX_DAYS}")
+
+    client = get_http_client()
+    (arrival_id, _), (departure_id, _) = await asyncio.gather(
+        get_airport_info(client, city_name),
+        get_airport_info(client, departure_city_name),
+    )
+    if not arrival_id or not departure_id:
+        raise HTTPException(status_code=404, detail="Could not find arrival or departure airport")
+
+    offsets = range(-flex_days, flex_days + 1)
+    outbound_dates = [outbound_center + timedelta(days=offset) for offset in offsets]
+    return_dates = [return_center + timedelta(days=offset) for offset in offsets]
+    pairs = [(outbound, back) for outbound in outbound_dates for back in return_dates if back >= outbound]
+
+    cells, rates = await asyncio.gather(
+        get_flex_cells(departure_id, arrival_id, pairs, (outbound_center, return_center)),
+        ExchangeRateService.get_rates(),
+    )
+
+    matrix, cheapest = [], None
+    for outbound in outbound_dates:
+        row = []
+        for back in return_dates:
+            cell = cells.get((outbound, back))
+            if cell is None:
+                row.append(None)
+                continue
+            price_in_bhd = None
+            if cell["price"] is not None and cell["currency"]:
+                price_in_bhd = await ExchangeRateService.convert_to_bhd(cell["price"], cell["currency"])
+            entry = {"price": price_in_bhd, "offers": cell["offers"]}
+            for flag in ("degraded", "pending"):
+                if cell.get(flag):
+                    entry[flag] = True
+            row.append(entry)
+            if price_in_bhd is not None and (cheapest is None or price_in_bhd < cheapest["price"]):
+                cheapest = {"arrival_date": outbound.isoformat(), "departure_date": back.isoformat(), "price": price_in_bhd}
+        matrix.append(row)
+
+    return {
+        "currency": "BHD",
+        "base_currency": rates.get("base_currency", "BHD"),
+        "base_currency_date": rates.get("base_currency_date", 0),
+        "arrival_dates": [day.isoformat() for day in outbound_dates],
+        "departure_dates": [day.isoformat() for day in return_dates],
+        "matrix": matrix,
+        "cheapest": cheapest,
+        "complete": not any(cell.get("degraded") or cell.get("pending") for cell in cells.values()),
+    }
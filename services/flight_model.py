@@ -0,0 +1,191 @@
+from typing import Any, Dict, List, Optional, Tuple
+from services.fieldsets import select
+
+# Version of the cached layout; entries in any other layout are treated as a cache miss
+CACHE_FORMAT = 2
+
+
+class InternTable:
+    """
+    Append-only list of distinct values, each addressed by its index.
+    """
+    __slots__ = ("values", "index")
+
+    def __init__(self, values=()):
+        self.values = [tuple(value) for value in values]
+        self.index = {value: i for i, value in enumerate(self.values)}
+
+    def intern(self, value: Tuple) -> int:
+        i = self.index.get(value)
+        if i is None:
+            i = self.index[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+    def __getitem__(self, i: int) -> Tuple:
+        return self.values[i]
+
+
+class Leg:
+    __slots__ = ("departure_time", "arrival_time", "departure_airport", "arrival_airport",
+                 "cabin_class", "flight_number", "arrival_terminal", "carrier")
+
+    def __init__(self, departure_time, arrival_time, departure_airport, arrival_airport,
+                 cabin_class, flight_number, arrival_terminal, carrier):
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.departure_airport = departure_airport  # index into FlightResult.airports
+        self.arrival_airport = arrival_airport
+        self.cabin_class = cabin_class
+        self.flight_number = flight_number
+        self.arrival_terminal = arrival_terminal
+        self.carrier = carrier  # index into FlightResult.carriers, or None
+
+    def to_list(self) -> list:
+        return [getattr(self, field) for field in Leg.__slots__]
+
+
+class Segment:
+    __slots__ = ("token", "travellers_count", "price", "price_source", "departure_time", "arrival_time",
+                 "departure_airport", "arrival_airport", "duration_seconds", "legs")
+
+    def __init__(self, token, travellers_count, price, price_source, departure_time, arrival_time,
+                 departure_airport, arrival_airport, duration_seconds, legs):
+        self.token = token
+        self.travellers_count = travellers_count
+        self.price = price  # BHD
+        self.price_source = price_source
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.departure_airport = departure_airport
+        self.arrival_airport = arrival_airport
+        self.duration_seconds = duration_seconds
+        self.legs = legs
+
+    @property
+    def duration_hours(self) -> float:
+        return round((self.duration_seconds or 0) / 3600, 2)
+
+    def to_list(self) -> list:
+        return [getattr(self, field) for field in Segment.__slots__[:-1]] + [[leg.to_list() for leg in self.legs]]
+
+    @classmethod
+    def from_list(cls, values: list) -> "Segment":
+        *fields, legs = values
+        return cls(*fields, tuple(Leg(*leg) for leg in legs))
+
+
+class FlightResult:
+    """
+    Compact form of one round-trip search. Airports (name, city, country) and
+    carriers (name, logo) repeat on almost every leg, so they are interned once
+    per result and referenced by index from the __slots__ segments and legs.
+    The cache holds this normalized form (to_cache); the API renders the
+    original JSON shape for the requested page only (render_segment).
+    """
+    __slots__ = ("airports", "carriers", "base_currency", "base_currency_date",
+                 "departure_airport_info", "arrival_airport_info", "outbound", "return_", "sort_orders")
+
+    def __init__(self, base_currency: str, base_currency_date, departure_airport_info, arrival_airport_info,
+                 airports: Optional[InternTable] = None, carriers: Optional[InternTable] = None):
+        self.airports = airports or InternTable()
+        self.carriers = carriers or InternTable()
+        self.base_currency = base_currency
+        self.base_currency_date = base_currency_date
+        self.departure_airport_info = departure_airport_info
+        self.arrival_airport_info = arrival_airport_info
+        self.outbound: List[Segment] = []
+        self.return_: List[Segment] = []
+        self.sort_orders: Dict[str, Dict[str, List[int]]] = {}
+
+    def segments(self, direction: str) -> List[Segment]:
+        return self.outbound if direction == "outbound" else self.return_
+
+    def airport(self, airport: Dict[str, Any]) -> int:
+        return self.airports.intern((airport.get("name"), airport.get("cityName"), airport.get("countryName")))
+
+    def carrier(self, carriers_data: List[Dict[str, Any]]) -> Optional[int]:
+        if not carriers_data:
+            return None
+        return self.carriers.intern((carriers_data[0].get("name"), carriers_data[0].get("logo")))
+
+    def carrier_name(self, leg: Leg) -> Optional[str]:
+        return self.carriers[leg.carrier][0] if leg.carrier is not None else None
+
+    def to_cache(self) -> Dict[str, Any]:
+        return {
+            "format": CACHE_FORMAT,
+            "airports": self.airports.values,
+            "carriers": self.carriers.values,
+            "base_currency": self.base_currency,
+            "base_currency_date": self.base_currency_date,
+            "departure_airport_info": self.departure_airport_info,
+            "arrival_airport_info": self.arrival_airport_info,
+            "outbound": [segment.to_list() for segment in self.outbound],
+            "return": [segment.to_list() for segment in self.return_],
+            "sort_orders": self.sort_orders,
+        }
+
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> Optional["FlightResult"]:
+        """
+        Rebuild a result from its cached form, or None for entries in another layout.
+        """
+        if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+            return None
+        result = cls(data["base_currency"], data["base_currency_date"], data["departure_airport_info"],
+                     data["arrival_airport_info"], InternTable(data["airports"]), InternTable(data["carriers"]))
+        result.outbound = [Segment.from_list(values) for values in data["outbound"]]
+        result.return_ = [Segment.from_list(values) for values in data["return"]]
+        result.sort_orders = data["sort_orders"]
+        return result
+
+
+def render_leg(result: FlightResult, leg: Leg) -> Dict[str, Any]:
+    departure_name, departure_city, departure_country = result.airports[leg.departure_airport]
+    arrival_name, arrival_city, arrival_country = result.airports[leg.arrival_airport]
+    carrier, carrier_logo = result.carriers[leg.carrier] if leg.carrier is not None else (None, None)
+    return {
+        "departure_time": leg.departure_time,
+        "arrival_time": leg.arrival_time,
+        "departure_airport": departure_name,
+        "arrival_airport": arrival_name,
+        "departure_city": departure_city,
+        "arrival_city": arrival_city,
+        "departure_country": departure_country,
+        "arrival_country": arrival_country,
+        "cabin_class": leg.cabin_class,
+        "flight_number": leg.flight_number,
+        "arrivalTerminal": leg.arrival_terminal,
+        "carrier": carrier,
+        "carrier_logo": carrier_logo,
+    }
+
+
+def render_segment(result: FlightResult, segment: Segment, fields=None) -> Dict[str, Any]:
+    """
+    Expand a segment into the JSON shape the /flight endpoint has always returned,
+    limited to `fields` if given (legs are then only rendered when requested).
+    """
+    departure_name, departure_city, departure_country = result.airports[segment.departure_airport]
+    arrival_name, arrival_city, arrival_country = result.airports[segment.arrival_airport]
+    return select({
+        "token": segment.token,
+        "travellers_count": segment.travellers_count,
+        "price": segment.price,
+        "price_source": segment.price_source,
+        "currency": "BHD",
+        "base_currency": result.base_currency,
+        "base_currency_date": result.base_currency_date,
+        "departure_time": segment.departure_time,
+        "arrival_time": segment.arrival_time,
+        "departure_city": departure_city,
+        "departure_country": departure_country,
+        "departure_airport": departure_name,
+        "arrival_city": arrival_city,
+        "arrival_country": arrival_country,
+        "arrival_airport": arrival_name,
+        "duration_seconds": segment.duration_seconds,
+        "duration_hours": segment.duration_hours,
+        "legs": [render_leg(result, leg) for leg in segment.legs] if fields is None or "legs" in fields else None,
+    }, fields)
@@ -1,31 +1,61 @@
 from uuid import UUID
-import httpx, asyncio, json, os
+import httpx, asyncio, json
 from fastapi import Depends, HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from config.auth import get_current_user
 from models.user import User
 from models.flight import Flight, flight_pydantic, flight_pydanticIn
 from services.exchange_rate import ExchangeRateService
-from config.redis_client import get_redis_client
-from services.http_client import cached_get 
-from dotenv import load_dotenv
-
-# Load environment variables from .env file before using os.getenv
-load_dotenv() 
+from config.cache import get_cache
+from config.http_pool import get_http_client
+from services.http_client import cache_with_stale, cached_get, get_stale, get_with_hash, is_degradable
+from services.etag import content_hash
+from services.json_codec import decode, dumps
+from services.flight_model import FlightResult, Leg, Segment, render_segment
+from services.fieldsets import select
+from services.airport_index import learn_airports, metro_airports
+from services.circuit_breaker import guarded_get
+from services.negative_cache import is_negative, mark_negative
+from config.settings import get_settings
+
+settings = get_settings()
 
 # API headers with keys loaded from environment variables
 HEADERS = {
-    "x-rapidapi-key": os.getenv("RAPID_API_KEY"),
-    "x-rapidapi-host": os.getenv("RAPID_API_HOST")
+    "x-rapidapi-key": settings.rapid_api_key,
+    "x-rapidapi-host": settings.rapid_api_host
 }
 
-# Timeout for HTTP requests (seconds)
-TIMEOUT = 30.0
-
 # Cache time-to-live (seconds) and concurrency semaphore for rate limiting
 CACHE_TTL = 86400  # cache results for 24 hours
 semaphore = asyncio.Semaphore(3)  # allow max 3 concurrent API calls
 
+# Max offers priced eagerly per search (one detail call each), and max offers
+# returned when prices come from the search payload and are fetched on demand
+FLIGHT_OFFER_LIMIT = settings.flight_offer_limit
+FLIGHT_LAZY_OFFER_LIMIT = settings.flight_lazy_offer_limit
+
+# Cache time-to-live (seconds) for authoritative token prices
+FLIGHT_PRICE_TTL = settings.flight_price_ttl or CACHE_TTL
+
+# Cache time-to-live (seconds) of raw round-trip searches, shared with the /flight/flex cells
+ROUNDTRIP_CACHE_TTL = 7200
+
+# Sort keys accepted by the /flight endpoint, mapped to the parsed segment field they order by
+FLIGHT_SORT_FIELDS = {
+    "price": "price",
+    "duration": "duration_seconds",
+    "departure_time": "departure_time",
+}
+
+# Fields of a /flight segment, plus the airport lists returned once per page, for sparse fieldsets
+FLIGHT_FIELDS = (
+    "token", "travellers_count", "price", "price_source", "currency", "base_currency", "base_currency_date",
+    "departure_time", "arrival_time", "departure_city", "departure_country", "departure_airport",
+    "arrival_city", "arrival_country", "arrival_airport", "duration_seconds", "duration_hours", "legs",
+    "departure_airport_info", "arrival_airport_info",
+)
+
 
 async def get_airport_info(client: httpx.AsyncClient, city: str):
     """
@@ -33,17 +63,32 @@ async def get_airport_info(client: httpx.AsyncClient, city: str):
     Returns a tuple: (first airport code found, list of airports in city)
     """
     cache_key = f"airport_info:{city}"
-    cached = await get_redis_client().get(cache_key)
+    cached = await get_cache().get(cache_key)
     if cached:
         # Return cached airport info if available
         return json.loads(cached)
 
+    # Known unknown city: skip the API until the negative entry expires
+    if await is_negative("airport_info", city):
+        return None, []
+
     # If no cache, call external API to autocomplete airport for city
-    resp = await client.get(os.getenv("FLIGHT_AUTO_COMPLETE_URL"), headers=HEADERS, params={"query": city})
+    try:
+        resp = await guarded_get(client, settings.flight_auto_complete_url, headers=HEADERS, params={"query": city})
+        resp.raise_for_status()
+    except Exception as e:
+        # Upstream down: use the last known airport info if there is one
+        stale = await get_stale(cache_key) if is_degradable(e) else None
+        if stale is None:
+            raise
+        return json.loads(stale)
     data = resp.json()
     airports_data = data.get("data", [])
+    # Autocomplete results with coordinates extend the nearest-airport index
+    learn_airports(airports_data)
     if not airports_data:
         # No airports found for city
+        await mark_negative("airport_info", city)
         return None, []
 
     airport_id = None
@@ -62,54 +107,122 @@ async def get_airport_info(client: httpx.AsyncClient, city: str):
                 "distance_to_city": airport.get("distanceToCity", {}).get("value")
             })
 
+    if not airport_id:
+        # Only non-airport matches (e.g. regions), nothing to search flights from
+        await mark_negative("airport_info", city)
+        return None, airports
+
     result = (airport_id, airports)
 
     # Cache the airport info in Redis
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
+    await cache_with_stale(cache_key, CACHE_TTL, json.dumps(result))
     return result
 
 
-async def get_flight_details_price(token: str):
+async def get_flight_details_price(token: str, client: Optional[httpx.AsyncClient] = None):
     """
     Get flight price details for a specific token.
     Cache results in Redis.
+    Uses the given client when provided, otherwise the shared connection pool.
+    If the upstream is down, returns the last known price or an empty price marked "degraded".
     """
     cache_key = f"flight_price:{token}"
-    cached = await get_redis_client().get(cache_key)
+    cached = await get_cache().get(cache_key)
     if cached:
         # Return cached price info if available
         return json.loads(cached)
 
     # Limit concurrent requests to avoid rate limiting
-    async with semaphore:
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            resp = await client.get(os.getenv("FLIGHT_DETAILS_URL"), headers=HEADERS, params={"token": token})
-            if resp.status_code != 200:
-                # If API fails, return None price and currency
-                return {"price": None, "currency": None}
-            data = resp.json()
-
-            # Extract traveller price info from response
-            price_info_list= data.get("data", {}).get("travellerPrices", [])
-            price_info = price_info_list[0]  # assume first traveller price
-
-            result = {
-                "price": price_info.get("travellerPriceBreakdown", {}).get("totalRounded", {}).get("units"),
-                "currency": price_info.get("travellerPriceBreakdown", {}).get("totalRounded", {}).get("currencyCode"),
-            }
-
-            # Cache price info in Redis
-            await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
-            return result
-
-
-def parse_segment(segment: Dict[str, Any], token: str, price_bhd: float,
-                  base_currency: str, base_currency_date: str, travellers_count: int) -> Dict[str, Any]:
+    try:
+        async with semaphore:
+            resp = await guarded_get(client or get_http_client(), settings.flight_details_url,
+                                     headers=HEADERS, params={"token": token})
+    except Exception as e:
+        if not is_degradable(e):
+            raise
+        stale = await get_stale(cache_key)
+        return json.loads(stale) if stale else {"price": None, "currency": None, "degraded": True}
+
+    if resp.status_code != 200:
+        # If API fails, return None price and currency
+        return {"price": None, "currency": None}
+    data = resp.json()
+
+    # Extract traveller price info from response
+    price_info_list = data.get("data", {}).get("travellerPrices", [])
+    if not price_info_list:
+        return {"price": None, "currency": None}
+    price_info = price_info_list[0]  # assume first traveller price
+
+    result = {
+        "price": price_info.get("travellerPriceBreakdown", {}).get("totalRounded", {}).get("units"),
+        "currency": price_info.get("travellerPriceBreakdown", {}).get("totalRounded", {}).get("currencyCode"),
+    }
+
+    # Cache price info in Redis
+    await cache_with_stale(cache_key, FLIGHT_PRICE_TTL, json.dumps(result))
+    return result
+
+
+async def get_flight_prices(tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch authoritative prices for the offers a user expands, converted to BHD.
+    Cached prices are read with a single MGET; only the missing tokens are
+    requested, concurrently over one shared client.
+    """
+    tokens = list(dict.fromkeys(t for t in tokens if t))  # drop blanks and duplicates, keep order
+    if not tokens:
+        return {}
+
+    cached_values = await get_cache().get_many([f"flight_price:{t}" for t in tokens])
+    prices = {t: json.loads(v) for t, v in zip(tokens, cached_values) if v}
+
+    missing = [t for t in tokens if t not in prices]
+    if missing:
+        client = get_http_client()
+        fetched = await asyncio.gather(*[get_flight_details_price(t, client) for t in missing])
+        prices.update(zip(missing, fetched))
+
+    result = {}
+    for token in tokens:
+        price = prices[token].get("price")
+        currency = prices[token].get("currency")
+
+        price_in_bhd = None
+        if price is not None and currency:
+            price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
+
+        result[token] = {
+            "price": price_in_bhd,
+            "currency": "BHD",
+            "original_price": price,
+            "original_currency": currency,
+        }
+        if prices[token].get("degraded"):
+            result[token]["degraded"] = True
+    return result
+
+
+def get_offer_list_price(offer: Dict[str, Any]):
     """
-    Parse a flight segment dictionary and extract detailed flight info,
-    including legs, times, airports, carrier, and price info converted to BHD.
+    Read the list price shipped with a flight offer in the search payload.
+    Returns a tuple: (price, currency), both None if the offer has no price.
     """
-    legs_info = []
+    total = offer.get("priceBreakdown", {}).get("total") or {}
+    units = total.get("units")
+    if units is None:
+        return None, None
+    return units + (total.get("nanos") or 0) / 1e9, total.get("currencyCode")
+
+
+def parse_segment(result: FlightResult, segment: Dict[str, Any], token: str, price_bhd: float,
+                  travellers_count: int, price_source: str = "token") -> Segment:
+    """
+    Parse a flight segment dictionary into a compact Segment of `result`,
+    interning its airports and carriers in the result's tables.
+    `price_source` is "token" for detail-call prices and "list" for search payload prices.
+    """
+    legs = []
 
     # Loop through each leg of the segment to extract flight details
     for leg in segment.get("legs", []):
@@ -118,131 +231,261 @@ def parse_segment(segment: Dict[str, Any], token: str, price_bhd: float,
             str(leg.get("flightInfo", {}).get("flightNumber"))
         )
 
-        legs_info.append({
-            "departure_time": leg.get("departureTime"),
-            "arrival_time": leg.get("arrivalTime"),
-            "departure_airport": leg.get("departureAirport", {}).get("name"),
-            "arrival_airport": leg.get("arrivalAirport", {}).get("name"),
-            "departure_city": leg.get("departureAirport", {}).get("cityName"),
-            "arrival_city": leg.get("arrivalAirport", {}).get("cityName"),
-            "departure_country": leg.get("departureAirport", {}).get("countryName"),
-            "arrival_country": leg.get("arrivalAirport", {}).get("countryName"),
-            "cabin_class": leg.get("cabinClass"),
-            "flight_number": flight_number,
-            "arrivalTerminal": leg.get("arrivalTerminal"),
-            "carrier": leg.get("carriersData", [{}])[0].get("name") if leg.get("carriersData") else None,
-            "carrier_logo": leg.get("carriersData", [{}])[0].get("logo") if leg.get("carriersData") else None,
-        })
-
-    # Build and return the parsed segment info dictionary
-    return {
-        "token": token,
-        "travellers_count": travellers_count,
-        "price": price_bhd,
-        "currency": "BHD",
-        "base_currency": base_currency,
-        "base_currency_date": base_currency_date,
-        "departure_time": segment.get("departureTime"),
-        "arrival_time": segment.get("arrivalTime"),
-        "departure_city": segment.get("departureAirport", {}).get("cityName"),
-        "departure_country": segment.get("departureAirport", {}).get("countryName"),
-        "departure_airport": segment.get("departureAirport", {}).get("name"),
-        "arrival_city": segment.get("arrivalAirport", {}).get("cityName"),
-        "arrival_country": segment.get("arrivalAirport", {}).get("countryName"),
-        "arrival_airport": segment.get("arrivalAirport", {}).get("name"),
-        "duration_seconds": segment.get("totalTime"),
-        "duration_hours": round(segment.get("totalTime", 0) / 3600, 2),
-        "legs": legs_info
-    }
+        legs.append(Leg(
+            leg.get("departureTime"),
+            leg.get("arrivalTime"),
+            result.airport(leg.get("departureAirport", {})),
+            result.airport(leg.get("arrivalAirport", {})),
+            leg.get("cabinClass"),
+            flight_number,
+            leg.get("arrivalTerminal"),
+            result.carrier(leg.get("carriersData")),
+        ))
+
+    return Segment(
+        token,
+        travellers_count,
+        price_bhd,
+        price_source,
+        segment.get("departureTime"),
+        segment.get("arrivalTime"),
+        result.airport(segment.get("departureAirport", {})),
+        result.airport(segment.get("arrivalAirport", {})),
+        segment.get("totalTime"),
+        tuple(legs),
+    )
 
 
-async def get_flights(city_name: str, arrival_date: str, departure_date: str, departure_city_name: str):
+def build_sort_orders(segments: List[Segment]) -> Dict[str, List[int]]:
     """
-    Main function to fetch flight offers for a round trip:
-    - Gets airport codes for departure and arrival cities,
-    - Queries flight offers,
-    - Fetches prices for each offer,
-    - Converts prices to BHD,
-    - Parses and separates outbound and return flights,
-    - Caches results in Redis.
+    Precompute the index order of a segment list for every supported sort key.
+    Segments missing the sort field (e.g. no price) are placed last.
     """
-    cache_key = f"flights:{city_name}:{arrival_date}:{departure_date}:{departure_city_name}"
-    cached = await get_redis_client().get(cache_key)
-    if cached:
-        # Return cached flight offers if available
-        return json.loads(cached)
+    orders = {}
+    for sort_key, field in FLIGHT_SORT_FIELDS.items():
+        values = [getattr(segment, field) for segment in segments]
+        present = [i for i in range(len(segments)) if values[i] is not None]
+        missing = [i for i in range(len(segments)) if values[i] is None]
+        orders[sort_key] = sorted(present, key=lambda i: values[i]) + missing
+    return orders
+
+
+def segment_matches(result: FlightResult, segment: Segment, max_price: Optional[float] = None,
+                    max_duration: Optional[float] = None, stops: Optional[int] = None,
+                    carrier: Optional[str] = None, cabin_class: Optional[str] = None) -> bool:
+    """
+    Check a segment against the /flight filters.
+    `max_duration` is in hours and `stops` is the maximum number of stops allowed.
+    """
+    legs = segment.legs
+
+    if max_price is not None and (segment.price is None or segment.price > max_price):
+        return False
+    if max_duration is not None and segment.duration_hours > max_duration:
+        return False
+    if stops is not None and max(len(legs) - 1, 0) > stops:
+        return False
+    if carrier and not any((result.carrier_name(leg) or "").lower() == carrier.lower() for leg in legs):
+        return False
+    if cabin_class and not any((leg.cabin_class or "").upper() == cabin_class.upper() for leg in legs):
+        return False
+    return True
+
+
+def filter_flights(flights: FlightResult, max_price: Optional[float] = None,
+                   max_duration: Optional[float] = None, stops: Optional[int] = None,
+                   carrier: Optional[str] = None, cabin_class: Optional[str] = None,
+                   sort_by: str = "price", page: int = 1, limit: int = 10, fields=None):
+    """
+    Filter, sort and paginate a cached get_flights result without calling the API again.
+    Uses the sort orders stored alongside the cached result, so only one page is rendered,
+    with only the requested `fields`.
+    Returns a tuple: (page of flights, total matches per direction)
+    """
+    start = (page - 1) * limit
+
+    page_data = select({
+        "departure_airport_info": flights.departure_airport_info,
+        "arrival_airport_info": flights.arrival_airport_info,
+    }, fields)
+    totals = {}
+
+    for direction in ("outbound", "return"):
+        segments = flights.segments(direction)
+
+        order = flights.sort_orders.get(direction, {}).get(sort_by)
+        if order is None:
+            order = build_sort_orders(segments)[sort_by]
 
-    async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-        # Get arrival and departure airport info including codes and airport list
-        arrival_id, arrival_airports = await get_airport_info(client, city_name)
-        departure_id, departure_airports = await get_airport_info(client, departure_city_name)
+        matched = [
+            segments[i] for i in order
+            if segment_matches(flights, segments[i], max_price, max_duration, stops, carrier, cabin_class)
+        ]
+        totals[direction] = len(matched)
+        page_data[direction] = [render_segment(flights, segment, fields) for segment in matched[start:start + limit]]
+
+    return page_data, totals
+
+
+def metro_codes(airport_id: str, airports) -> List[str]:
+    """
+    Airports to search for a city in multi-airport mode: the main airport, the
+    city's other autocomplete airports within the metro radius and indexed
+    airports near the main one (see metro_airports).
+    """
+    radius = settings.flight_metro_radius_km
+    city_codes = [
+        airport["airport_code"] for airport in airports
+        if airport.get("distance_to_city") is None or airport["distance_to_city"] <= radius
+    ]
+    return metro_airports(airport_id, city_codes)
 
-        if not arrival_id or not departure_id:
-            # If airports not found, raise 404 error
-            raise HTTPException(status_code=404, detail="Could not find arrival or departure airport")
 
-        # Prepare query parameters for flight search API
-        querystring = {
-            "departId": departure_id,
-            "arrivalId": arrival_id,
+async def search_round_trips(departure_codes: List[str], arrival_codes: List[str], arrival_date: str,
+                             departure_date: str) -> List[Dict[str, Any]]:
+    """
+    Round-trip offers for every departure x arrival airport pair, searched
+    concurrently. With several pairs, pairs that fail are skipped (unless all
+    do) and offers are merged cheapest first by list price.
+    """
+    pairs = [(departure_code, arrival_code) for departure_code in departure_codes for arrival_code in arrival_codes]
+    searches = [
+        cached_get(settings.flight_roundtrip_url, params={
+            "departId": departure_code,
+            "arrivalId": arrival_code,
             "departDate": arrival_date,
             "returnDate": departure_date
-        }
+        }, headers=HEADERS, ttl=ROUNDTRIP_CACHE_TTL)
+        for departure_code, arrival_code in pairs
+    ]
+    if len(searches) == 1:
+        data = await searches[0]
+        return data.get("data", {}).get("flightOffers", [])
+
+    results = await asyncio.gather(*searches, return_exceptions=True)
+    payloads = [result for result in results if not isinstance(result, Exception)]
+    if not payloads:
+        raise results[0]
+
+    offers = {}
+    for payload in payloads:
+        for offer in payload.get("data", {}).get("flightOffers", []):
+            offers.setdefault(offer.get("token"), offer)
+    prices = {token: get_offer_list_price(offer)[0] for token, offer in offers.items()}
+    return sorted(offers.values(), key=lambda offer: (prices[offer.get("token")] is None, prices[offer.get("token")] or 0))
+
+
+async def get_flights(city_name: str, arrival_date: str, departure_date: str, departure_city_name: str,
+                      lazy_pricing: bool = False, multi_airport: bool = False):
+    """
+    Round-trip flight offers for the given cities and dates as a compact
+    FlightResult, see get_flights_with_hash.
+    """
+    result, _ = await get_flights_with_hash(city_name, arrival_date, departure_date, departure_city_name,
+                                            lazy_pricing, multi_airport)
+    return result
 
-        # Get flight offers, with caching and timeout handled by cached_get
-        data = await cached_get(os.getenv("FLIGHT_ROUNDTRIP_URL"), params=querystring, headers=HEADERS, ttl=7200)
-
-        # Limit flight offers to first 10 results to avoid large data
-        flight_offers = data.get("data", {}).get("flightOffers", [])[:10]
-
-        # Get exchange rate data once to convert prices to BHD
-        exchange_data = await ExchangeRateService.get_rates()
-        base_currency_code = exchange_data.get("base_currency", "BHD")
-        base_currency_date = exchange_data.get("base_currency_date", "")
-
-        # Collect tokens for each flight offer
-        tokens = [offer.get("token") for offer in flight_offers]
-
-        # Get prices for all tokens in parallel (with concurrency/semaphore)
-        prices_data = await asyncio.gather(*[get_flight_details_price(t) for t in tokens])
-
-        # Prepare lists to hold parsed outbound and return flights
-        outbound_flights, return_flights = [], []
-
-        # Iterate offers and their corresponding prices
-        for i, offer in enumerate(flight_offers):
-            token = tokens[i]
-            price = prices_data[i]["price"]
-            currency = prices_data[i]["currency"]
-            travellers_count = len(offer.get("travellers", [])) or 1  # default to 1 if none
-
-            price_in_bhd = None
-            if price is not None and currency:
-                # Convert price to BHD
-                price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
-
-            # Parse each segment (leg) of the flight offer
-            for seg in offer.get("segments", []):
-                parsed = parse_segment(seg, token, price_in_bhd,
-                                       base_currency_code, base_currency_date, travellers_count)
-
-                # Separate outbound vs return flights based on departure airport code
-                if seg.get("departureAirport", {}).get("code") == departure_id:
-                    outbound_flights.append(parsed)
-                elif seg.get("departureAirport", {}).get("code") == arrival_id:
-                    return_flights.append(parsed)
-
-        # Prepare final result object including airport info and flight lists
-        result = {
-            "departure_airport_info": departure_airports,
-            "arrival_airport_info": arrival_airports,
-            "outbound": outbound_flights,
-            "return": return_flights
-        }
 
-        # Cache the flight results in Redis for CACHE_TTL duration
-        await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(result))
-        return result
+async def get_flights_with_hash(city_name: str, arrival_date: str, departure_date: str, departure_city_name: str,
+                                lazy_pricing: bool = False, multi_airport: bool = False):
+    """
+    Main function to fetch flight offers for a round trip:
+    - Gets airport codes for departure and arrival cities (with multi_airport,
+      every airport of each metro area, e.g. LHR, LGW and STN for London),
+    - Queries flight offers,
+    - Fetches prices for each offer (or, with lazy_pricing, uses the list
+      price from the search payload and leaves token prices to get_flight_prices),
+    - Converts prices to BHD,
+    - Parses and separates outbound and return flights into a compact FlightResult,
+    - Caches its normalized form in Redis together with its content hash.
+    Returns a tuple: (FlightResult, content hash) - the hash is used for ETags.
+    """
+    cache_key = f"flights:{city_name}:{arrival_date}:{departure_date}:{departure_city_name}"
+    if lazy_pricing:
+        cache_key += ":lazy"
+    if multi_airport:
+        cache_key += ":metro"
+    cached, cached_hash = await get_with_hash(cache_key)
+    result = FlightResult.from_cache(await decode(cached)) if cached else None
+    if result is not None:
+        # Return cached flight offers if available (entries in an older layout are refetched)
+        return result, cached_hash
+
+    client = get_http_client()
+
+    # Get arrival and departure airport info including codes and airport list
+    arrival_id, arrival_airports = await get_airport_info(client, city_name)
+    departure_id, departure_airports = await get_airport_info(client, departure_city_name)
+
+    if not arrival_id or not departure_id:
+        # If airports not found, raise 404 error
+        raise HTTPException(status_code=404, detail="Could not find arrival or departure airport")
+
+    departure_codes = metro_codes(departure_id, departure_airports) if multi_airport else [departure_id]
+    arrival_codes = metro_codes(arrival_id, arrival_airports) if multi_airport else [arrival_id]
+
+    # Get flight offers, with caching and timeout handled by cached_get
+    flight_offers = await search_round_trips(departure_codes, arrival_codes, arrival_date, departure_date)
+
+    # Limit flight offers to avoid large data; lazy pricing makes no
+    # per-offer calls so it can afford a larger cap
+    offer_limit = FLIGHT_LAZY_OFFER_LIMIT if lazy_pricing else FLIGHT_OFFER_LIMIT
+    flight_offers = flight_offers[:offer_limit]
+
+    # Get exchange rate data once to convert prices to BHD
+    exchange_data = await ExchangeRateService.get_rates()
+    base_currency_code = exchange_data.get("base_currency", "BHD")
+    base_currency_date = exchange_data.get("base_currency_date", "")
+
+    # Collect tokens for each flight offer
+    tokens = [offer.get("token") for offer in flight_offers]
+
+    if lazy_pricing:
+        # Use the list prices already in the search payload
+        prices_data = [
+            dict(zip(("price", "currency"), get_offer_list_price(offer)))
+            for offer in flight_offers
+        ]
+        price_source = "list"
+    else:
+        # Get prices for all tokens in parallel (with concurrency/semaphore) over the shared client
+        prices_data = await asyncio.gather(*[get_flight_details_price(t, client) for t in tokens])
+        price_source = "token"
+
+    # Outbound and return flights share the result's airport and carrier tables
+    result = FlightResult(base_currency_code, base_currency_date, departure_airports, arrival_airports)
+
+    # Iterate offers and their corresponding prices
+    for i, offer in enumerate(flight_offers):
+        token = tokens[i]
+        price = prices_data[i]["price"]
+        currency = prices_data[i]["currency"]
+        travellers_count = len(offer.get("travellers", [])) or 1  # default to 1 if none
+
+        price_in_bhd = None
+        if price is not None and currency:
+            # Convert price to BHD
+            price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
+
+        # Parse each segment (leg) of the flight offer
+        for seg in offer.get("segments", []):
+            # Separate outbound vs return flights based on departure airport code
+            if seg.get("departureAirport", {}).get("code") in departure_codes:
+                result.outbound.append(parse_segment(result, seg, token, price_in_bhd, travellers_count, price_source))
+            elif seg.get("departureAirport", {}).get("code") in arrival_codes:
+                result.return_.append(parse_segment(result, seg, token, price_in_bhd, travellers_count, price_source))
+
+    # Sort orders used by filter_flights
+    result.sort_orders = {
+        "outbound": build_sort_orders(result.outbound),
+        "return": build_sort_orders(result.return_),
+    }
+
+    # Cache the normalized flight results and their hash in Redis for CACHE_TTL duration
+    payload = dumps(result.to_cache())
+    result_hash = content_hash(payload)
+    await get_cache().set_many([(cache_key, payload, CACHE_TTL), (f"hash:{cache_key}", result_hash, CACHE_TTL)])
+    return result, result_hash
 
 
 flightIn=flight_pydanticIn
@@ -1,11 +1,96 @@
-import httpx, os
+import asyncio, httpx, json, logging
 from fastapi import HTTPException
-from dotenv import load_dotenv
+from config.settings import get_settings
+from config.cache import get_cache
+from config.http_pool import get_http_client
+from services.circuit_breaker import CircuitOpenError, guarded_get
+from config.deadline import DeadlineExceeded, bound_by_deadline, timeout_for
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Current conditions change slowly, so they are reused for a short time
+WEATHER_CACHE_TTL = settings.weather_cache_ttl
+
+# Most cities accepted by one /weather?cities= request
+WEATHER_BATCH_MAX = settings.weather_batch_max
+
+# Lookups currently running per normalized city, awaited by concurrent requests for the same city
+_in_flight = {}
+
+
+def normalize_city(city: str) -> str:
+    return " ".join(city.split()).lower()
 
-# Load environment variables from .env file before accessing with os.getenv
-load_dotenv() 
 
 async def get_weather_service(city: str):
+    """
+    Current weather for a city, cached per normalized city name for WEATHER_CACHE_TTL.
+    Concurrent requests for the same city share a single upstream call.
+    """
+    key = normalize_city(city)
+    cache_key = f"weather:{key}"
+    cached = await get_cache().get(cache_key)
+    if cached:
+        return json.loads(cached)
+
+    return await single_flight(key, cache_key)
+
+
+async def single_flight(key: str, cache_key: str):
+    """
+    Join the running lookup for `key`, or start one. The lookup runs as its own
+    task so a cancelled caller does not cancel it for the others.
+    """
+    task = _in_flight.get(key)
+    if task is None:
+        task = _in_flight[key] = asyncio.ensure_future(fetch_and_cache_weather(key, cache_key))
+        task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await bound_by_deadline(asyncio.shield(task))
+
+
+async def fetch_and_cache_weather(city: str, cache_key: str):
+    result = await fetch_weather(city)
+    await get_cache().set(cache_key, json.dumps(result), WEATHER_CACHE_TTL)
+    return result
+
+
+async def get_weather_batch(cities: list):
+    """
+    Current weather for several cities resolved concurrently, in request order.
+    Cached cities are read with one MGET; a city that fails gets an "error"
+    entry instead of failing the whole batch.
+    """
+    keys = list(dict.fromkeys(normalize_city(city) for city in cities if city.strip()))
+    if not keys:
+        raise HTTPException(status_code=400, detail="No cities given")
+    if len(keys) > WEATHER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {WEATHER_BATCH_MAX} cities per request")
+
+    cached_values = await get_cache().get_many([f"weather:{key}" for key in keys])
+
+    results = {key: json.loads(cached) for key, cached in zip(keys, cached_values) if cached}
+    missing = [key for key in keys if key not in results]
+    fetched = await asyncio.gather(*[single_flight(key, f"weather:{key}") for key in missing],
+                                   return_exceptions=True)
+    for key, result in zip(missing, fetched):
+        if isinstance(result, HTTPException):
+            results[key] = {"city": key, "error": result.detail}
+        elif isinstance(result, DeadlineExceeded):
+            results[key] = {"city": key, "error": "Request deadline exceeded"}
+        elif isinstance(result, Exception):
+            # e.g. a malformed upstream payload: only this city fails
+            logger.error("Weather lookup failed", extra={"city": key}, exc_info=result)
+            results[key] = {"city": key, "error": "Weather data unavailable"}
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            results[key] = result
+
+    return [results[key] for key in keys]
+
+
+async def fetch_weather(city: str):
     """
     Asynchronous function to get current weather data for a given city
     from an external weather API.
@@ -13,24 +98,23 @@ async def get_weather_service(city: str):
 
     # Prepare query parameters for the API request
     params = {
-        "key": os.getenv("WEATHER_API_KEY"),  # API key from environment variables
+        "key": settings.weather_api_key,  # API key from environment variables
         "q": city,                            # City name to query weather for
         "aqi": "no"                          # Disable air quality index data
     }
 
-    # Use an async HTTP client with a timeout of 10 seconds
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        try:
-            # Send GET request to the weather API URL with the query parameters
-            res = await client.get(os.getenv("WEATHER_API_URL"), params=params)
-            # Raise exception if HTTP status is an error (4xx or 5xx)
-            res.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            # Raise HTTPException with status code and message if API returns error response
-            raise HTTPException(status_code=e.response.status_code, detail="Error fetching weather data")
-        except httpx.RequestError:
-            # Raise HTTPException if there was a problem connecting to the API (network issues, timeout, etc.)
-            raise HTTPException(status_code=500, detail="Weather service not reachable")
+    # Use the shared connection pool with a timeout of 10 seconds
+    try:
+        # Send GET request to the weather API URL with the query parameters
+        res = await guarded_get(get_http_client(), settings.weather_api_url, params=params, timeout=timeout_for(10.0))
+        # Raise exception if HTTP status is an error (4xx or 5xx)
+        res.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        # Raise HTTPException with status code and message if API returns error response
+        raise HTTPException(status_code=e.response.status_code, detail="Error fetching weather data")
+    except (httpx.RequestError, CircuitOpenError, DeadlineExceeded):
+        # Raise HTTPException if there was a problem connecting to the API (network issues, timeout, etc.)
+        raise HTTPException(status_code=500, detail="Weather service not reachable")
 
     # Parse the JSON response data
     data = res.json()
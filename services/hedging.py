@@ -0,0 +1,84 @@
+import asyncio, time
+from collections import deque
+from config.deadline import remaining
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Hedged requests are opt-in: they trade extra upstream calls for lower tail latency
+HEDGE_ENABLED = settings.hedge_requests
+
+# Latency samples kept per upstream, and samples needed before the observed p95 is trusted
+HEDGE_WINDOW = settings.hedge_window
+HEDGE_MIN_SAMPLES = settings.hedge_min_samples
+
+# Hedge delay in seconds used until an upstream has enough samples
+HEDGE_DEFAULT_DELAY = settings.hedge_default_delay
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful request latencies for one upstream.
+    """
+
+    def __init__(self, window: int = HEDGE_WINDOW):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.samples.append(seconds)
+
+    def p95(self):
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+_trackers = {}
+
+
+def get_tracker(key: str) -> LatencyTracker:
+    tracker = _trackers.get(key)
+    if tracker is None:
+        tracker = _trackers[key] = LatencyTracker()
+    return tracker
+
+
+async def _timed(tracker: LatencyTracker, make_request):
+    started = time.monotonic()
+    result = await make_request()
+    tracker.record(time.monotonic() - started)
+    return result
+
+
+async def hedged(key: str, make_request):
+    """
+    Run make_request() for upstream `key`. If it has not finished after the
+    observed p95 latency, start a second identical attempt and return whichever
+    succeeds first; the other one is cancelled.
+    Only use for idempotent GETs. Latency is tracked even when hedging is disabled.
+    """
+    tracker = get_tracker(key)
+    delay = tracker.p95() or HEDGE_DEFAULT_DELAY
+    left = remaining()
+    if not HEDGE_ENABLED or (left is not None and delay >= left):
+        return await _timed(tracker, make_request)
+
+    first = asyncio.ensure_future(_timed(tracker, make_request))
+    pending = {first}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            pending.add(asyncio.ensure_future(_timed(tracker, make_request)))
+
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,109 @@
+import asyncio, logging
+from fastapi import HTTPException
+from config.http_pool import get_http_client
+from models.hotel import HotelSearchLeg
+from services.exchange_rate import ExchangeRateService
+from config.deadline import DeadlineExceeded, interactive
+from services.fieldsets import wants
+from services.hotels import (
+    FULL_DETAIL_FIELDS, REVIEW_FIELDS, build_hotel_infos, enrich_hotels, get_cached_enrichment,
+    get_hotels_page, get_location_id
+)
+from services.http_client import is_degradable
+from services.json_codec import dumps
+
+logger = logging.getLogger(__name__)
+
+
+async def resolve_locations(client, city_names):
+    """
+    Location IDs of every distinct city, looked up concurrently.
+    Returns {city name: location ID or the exception raised for it}.
+    """
+    cities = list(dict.fromkeys(city_names))
+    results = await asyncio.gather(*[get_location_id(city, client) for city in cities], return_exceptions=True)
+    return dict(zip(cities, results))
+
+
+async def search_leg(client, leg: HotelSearchLeg, location_id, rates: dict, details: bool, fieldset, fair_key):
+    """
+    One leg of a batch: the /hotel search for one city and stay, using the
+    batch's rates snapshot and queueing its enrichment under fair_key.
+    """
+    if isinstance(location_id, Exception):
+        raise location_id
+    if not location_id:
+        raise HTTPException(status_code=404, detail="City not found")
+
+    hotels, _ = await get_hotels_page(location_id, leg.arrival_date, leg.departure_date, client, leg.page, leg.sort_by)
+    if not hotels:
+        return []
+
+    hotel_ids = [hotel["id"] for hotel in hotels]
+    parts = {"reviews": wants(fieldset, *REVIEW_FIELDS), "full_details": wants(fieldset, *FULL_DETAIL_FIELDS)}
+    if details:
+        enrichment = await enrich_hotels(hotel_ids, client, leg.arrival_date, leg.departure_date, **parts,
+                                         fair_key=fair_key)
+    else:
+        enrichment = await get_cached_enrichment(hotel_ids, **parts)
+    return await build_hotel_infos(hotels, enrichment, rates.get("base_currency", "BHD"),
+                                   rates.get("base_currency_date", 0), fieldset)
+
+
+def leg_error(error: Exception) -> dict:
+    if isinstance(error, HTTPException):
+        return {"status": "error", "status_code": error.status_code, "detail": error.detail}
+    if isinstance(error, DeadlineExceeded):
+        return {"status": "error", "status_code": 504, "detail": "Request deadline exceeded"}
+    if is_degradable(error):
+        return {"status": "error", "status_code": 503, "detail": "Upstream service temporarily unavailable"}
+    logger.error("Batch hotel search leg failed", exc_info=error)
+    return {"status": "error", "status_code": 500, "detail": "Internal error"}
+
+
+async def prepare_hotel_batch(legs):
+    """
+    Everything a batch needs before its stream starts: the location of every
+    city (resolved concurrently, per-city failures are kept for their legs) and
+    one exchange-rate snapshot. Runs before the response so that a failure here
+    is a proper error status rather than a truncated stream.
+    """
+    return await asyncio.gather(
+        resolve_locations(get_http_client(), [leg.city_name for leg in legs]),
+        ExchangeRateService.get_rates(),
+    )
+
+
+async def stream_hotel_batch(legs, locations, rates: dict, details: bool = True, fieldset=None):
+    """
+    Run several hotel searches as one batch and yield one NDJSON line per leg
+    as soon as it finishes (in completion order, "leg" is the index in the request).
+    Takes the locations and rates from prepare_hotel_batch, and all enrichment
+    goes through the global fair queue with one flow per leg.
+    The whole stream counts as an interactive request: the route's deadline
+    dependency has already exited when the body runs.
+    """
+    with interactive():
+        client = get_http_client()
+        batch = object()
+
+        async def run(index, leg):
+            try:
+                data = await search_leg(client, leg, locations[leg.city_name], rates, details, fieldset, (batch, index))
+                return index, {"status": "Ok", "data": data}
+            except Exception as e:
+                return index, leg_error(e)
+
+        tasks = [asyncio.create_task(run(index, leg)) for index, leg in enumerate(legs)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, result = await finished
+                leg = legs[index]
+                yield dumps({
+                    "leg": index, "city_name": leg.city_name, "arrival_date": leg.arrival_date,
+                    "departure_date": leg.departure_date, **result,
+                }) + "\n"
+        finally:
+            # Client went away: stop the legs still running
+            for task in tasks:
+                task.cancel()
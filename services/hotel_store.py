@@ -0,0 +1,165 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+from config.cache import get_cache
+from services.etag import content_hash
+from services.exchange_rate import ExchangeRateService
+from config.settings import get_settings
+
+settings = get_settings()
+
+CACHE_TTL = 86400  # Same lifetime as the cached search pages the store is built from
+PAGE_SIZE = settings.hotel_search_page_size
+
+
+def hotel_price(hotel):
+    return hotel.get("priceBreakdown", {}).get("grossPrice", {}).get("value")
+
+
+# Sort orders that can be reproduced from the hotel data itself. The others
+# (distance, popularity, upsort_bh, bayesian_review_score) are ranked by the
+# upstream and always come from it; their pages still feed the store.
+LOCAL_SORTS = {
+    "price": (hotel_price, False),
+    "review_score": (lambda hotel: hotel.get("reviewScore"), True),
+    "class_descending": (lambda hotel: hotel.get("propertyClass"), True),
+    "class_ascending": (lambda hotel: hotel.get("propertyClass"), False),
+}
+
+# Hotel fields kept in the store: what the listing and local sorting read
+STORED_FIELDS = ("id", "name", "reviewScoreWord", "reviewScore", "priceBreakdown", "checkin", "checkout", "propertyClass")
+
+
+@dataclass(frozen=True)
+class HotelFilters:
+    min_price: Optional[float] = None  # BHD
+    max_price: Optional[float] = None  # BHD
+    min_review_score: Optional[float] = None
+
+    def __bool__(self):
+        return any(value is not None for value in (self.min_price, self.max_price, self.min_review_score))
+
+    def __str__(self):
+        return f"{self.min_price}:{self.max_price}:{self.min_review_score}"
+
+
+def store_key(location_id: str, arrival_date: str, departure_date: str) -> str:
+    # v2: hash layout, distinct from the earlier single-JSON-blob keys still expiring
+    return f"hotel_store:v2:{location_id}:{arrival_date}:{departure_date}"
+
+
+# The store is a hash per location and dates, written field by field with HSETNX:
+#   page:<sort>:<n>  hotels of upstream page n for that sort order (JSON)
+#   last:<sort>      last page of that sort order, once a short or empty page showed it
+#   complete         a sort order whose pages 1..last are all stored
+def page_field(sort_by: str, page: int) -> str:
+    return f"page:{sort_by}:{page}"
+
+
+def last_field(sort_by: str) -> str:
+    return f"last:{sort_by}"
+
+
+async def mark_if_complete(key: str, sort_by: str):
+    """
+    Flag the store complete once every page of sort_by up to its last one is
+    stored: the merged set is then the whole result set for the location and dates.
+    Every writer checks after its own write, so the last one to land sees all pages.
+    """
+    last, = await get_cache().hash_get(key, last_field(sort_by))
+    # An empty result set is never complete: emptiness is left to the short-lived negative cache
+    if last is None or int(last) < 1:
+        return
+    pages = await get_cache().hash_get(key, *(page_field(sort_by, n) for n in range(1, int(last) + 1)))
+    if all(stored is not None for stored in pages):
+        await get_cache().hash_set_nx(key, {"complete": sort_by}, CACHE_TTL)
+
+
+async def record_page(location_id: str, arrival_date: str, departure_date: str, page: int, sort_by: str, hotels):
+    """
+    Add one upstream search page to the store. Each page is its own hash field
+    set with HSETNX, so concurrent writers never drop each other's pages and a
+    page already recorded costs one pipelined write. The end of the results is
+    the first page shorter than the upstream page size (or the page before an
+    empty one). An empty first page is not recorded.
+    """
+    fields = {}
+    if hotels:
+        stored = [{field: hotel[field] for field in STORED_FIELDS if field in hotel} for hotel in hotels]
+        fields[page_field(sort_by, page)] = json.dumps(stored)
+        if len(hotels) < PAGE_SIZE:
+            fields[last_field(sort_by)] = str(page)
+    elif page > 1:
+        fields[last_field(sort_by)] = str(page - 1)
+    else:
+        return
+
+    key = store_key(location_id, arrival_date, departure_date)
+    if any(await get_cache().hash_set_nx(key, fields, CACHE_TTL)):
+        await mark_if_complete(key, sort_by)
+
+
+async def load_hotels(key: str):
+    """
+    Hotels of a complete store, merged by id in the order of its complete sort,
+    or None when the store is not complete.
+    """
+    complete, = await get_cache().hash_get(key, "complete")
+    if complete is None:
+        return None
+    store = await get_cache().hash_get_all(key)
+    hotels = {}
+    for n in range(1, int(store.get(last_field(complete), 0)) + 1):
+        for hotel in json.loads(store.get(page_field(complete, n)) or "[]"):
+            hotels.setdefault(str(hotel["id"]), hotel)
+    return list(hotels.values())
+
+
+async def apply_filters(hotels, filters: HotelFilters):
+    """
+    Keep the hotels matching every filter. Prices are compared in BHD, as shown to users.
+    """
+    if not filters:
+        return hotels
+
+    kept = []
+    for hotel in hotels:
+        if filters.min_review_score is not None and (hotel.get("reviewScore") or 0) < filters.min_review_score:
+            continue
+        if filters.min_price is not None or filters.max_price is not None:
+            price, currency = hotel_price(hotel), hotel.get("priceBreakdown", {}).get("grossPrice", {}).get("currency")
+            if price is None or not currency:
+                continue
+            price = await ExchangeRateService.convert_to_bhd(price, currency)
+            if filters.min_price is not None and price < filters.min_price:
+                continue
+            if filters.max_price is not None and price > filters.max_price:
+                continue
+        kept.append(hotel)
+    return kept
+
+
+async def get_local_page(location_id: str, arrival_date: str, departure_date: str, page: int, sort_by: str,
+                         filters: HotelFilters):
+    """
+    Serve a search page from the merged store: sort and filter locally, then
+    slice with the upstream's page size. Returns (hotels, content hash), or
+    None when the sort order is not reproducible or the store is incomplete.
+    """
+    if sort_by not in LOCAL_SORTS:
+        return None
+    hotels = await load_hotels(store_key(location_id, arrival_date, departure_date))
+    if hotels is None:
+        return None
+
+    sort_key, descending = LOCAL_SORTS[sort_by]
+    hotels = await apply_filters(hotels, filters)
+    # Hotels missing the sort field go last whichever the direction
+    ranked = sorted((hotel for hotel in hotels if sort_key(hotel) is not None), key=sort_key, reverse=descending)
+    ranked += [hotel for hotel in hotels if sort_key(hotel) is None]
+
+    start = (page - 1) * PAGE_SIZE
+    page_hotels = ranked[start:start + PAGE_SIZE]
+    if not page_hotels:
+        return [], None
+    return page_hotels, content_hash(json.dumps(page_hotels, sort_keys=True))
@@ -1,50 +1,86 @@
 from uuid import UUID
 from fastapi import Depends, HTTPException
-import httpx, asyncio, json, os
+import httpx, asyncio, json
 from config.auth import get_current_user
 from models.user import User
 from services.exchange_rate import ExchangeRateService
-from config.redis_client import get_redis_client
-from services.http_client import cached_get
+from config.cache import get_cache
+from services.http_client import cache_with_stale, cached_get_with_hash, get_stale, is_degradable
+from services.circuit_breaker import get_breaker, guarded_get, is_upstream_failure
+from services.negative_cache import is_negative, mark_negative
+from config.deadline import deadline_scope, sleep_within_deadline
+from services.hedging import hedged
+from services.photo_parser import extract_hotel_photo
+from services.hotel_store import HotelFilters, apply_filters, get_local_page, record_page
+from services.fieldsets import select, wants
+from services.fair_queue import FairLimiter
 from models.hotel import Hotel, hotel_pydantic, hotel_pydanticIn
-from dotenv import load_dotenv
+from config.settings import get_settings
 
-# Load environment variables from .env before using os.getenv
-load_dotenv()
+settings = get_settings()
 
 CACHE_TTL = 86400  # Cache time-to-live in seconds (24 hours)
 
 # Headers required for API calls, using credentials from environment variables
 HEADERS = {
-    "x-rapidapi-key": os.getenv("RAPID_API_KEY"),
-    "x-rapidapi-host": os.getenv("RAPID_API_HOST")
+    "x-rapidapi-key": settings.rapid_api_key,
+    "x-rapidapi-host": settings.rapid_api_host
 }
 
 # Limit the number of concurrent requests to hotel reviews to avoid rate limiting
 semaphore = asyncio.Semaphore(3)
 
+# Limit how many hotels are enriched (reviews + details + photo) at the same time, across
+# all requests; free slots go round-robin across searches (and batch search legs)
+HOTEL_DETAIL_CONCURRENCY = settings.hotel_detail_concurrency
+detail_queue = FairLimiter(HOTEL_DETAIL_CONCURRENCY)
+
+# Fields of a /hotel record, and those that need the reviews / full details enrichment calls
+HOTEL_FIELDS = (
+    "hotel_id", "hotel_name", "hotel_address", "review_scoreWord", "review_score", "hotel_booking_url",
+    "hotel_photo_url", "local_price", "currency", "original_price", "original_currency", "check_in",
+    "check_out", "score",
+)
+REVIEW_FIELDS = ("score",)
+FULL_DETAIL_FIELDS = ("hotel_address", "hotel_booking_url", "hotel_photo_url")
+
+# Cache key prefix of each enrichment part
+ENRICHMENT_PREFIXES = {"reviews": "hotel_reviews", "full_details": "hotel_full_detail"}
+
 async def get_location_id(city_name: str, client: httpx.AsyncClient):
     """
     Get the location ID for a given city from the hotel autocomplete API.
     Results are cached in Redis for 24 hours to reduce API calls.
     """
     cache_key = f"hotel_location_id:{city_name.lower()}"
-    cached = await get_redis_client().get(cache_key)
+    cached = await get_cache().get(cache_key)
     if cached:
         # Return cached location ID if available (decode bytes to string if necessary)
         return cached.decode() if isinstance(cached, bytes) else cached
 
+    # Known unknown city (typo, bot traffic): skip the API until the negative entry expires
+    if await is_negative("hotel_location", city_name):
+        return None
+
     # If not cached, make API request to get location ID
     params = {"query": city_name}
-    response = await client.get(os.getenv("HOTEL_AUTO_COMPLETE_URL"), headers=HEADERS, params=params)
-    response.raise_for_status()  # Raise exception for bad HTTP status codes
+    try:
+        response = await guarded_get(client, settings.hotel_auto_complete_url, headers=HEADERS, params=params)
+        response.raise_for_status()  # Raise exception for bad HTTP status codes
+    except Exception as e:
+        # Upstream down: use the last known location ID if there is one
+        stale = await get_stale(cache_key) if is_degradable(e) else None
+        if stale is None:
+            raise
+        return stale
     data = response.json()
     if not data.get("data"):
+        await mark_negative("hotel_location", city_name)
         return None  # No location data found
 
     location_id = data["data"][0]["id"]
     # Cache the location ID in Redis for 24 hours
-    await get_redis_client().setex(cache_key, 86400, str(location_id))
+    await cache_with_stale(cache_key, 86400, str(location_id))
     return location_id
 
 
@@ -52,7 +88,24 @@ async def get_hotels_data(location_id: str, arrival_date: str, departure_date: s
     """
     Retrieve hotel search results for a given location and date range.
     Uses cached_get utility to cache API responses for 24 hours.
+    Empty pages are only negative-cached, for a short time.
     """
+    hotels, _ = await get_hotels_page(location_id, arrival_date, departure_date, client, page, sortBy)
+    return hotels
+
+
+async def get_hotels_page(location_id: str, arrival_date: str, departure_date: str, client: httpx.AsyncClient, page: int, sortBy: int,
+                          filters: HotelFilters = HotelFilters()):
+    """
+    get_hotels_data plus the content hash of the cached listing, used for ETags.
+    Once the hotel store holds the whole result set for the location and dates,
+    sortable orders and filters are served from it without calling the API.
+    Returns a tuple: (hotels, content hash or None for an empty page)
+    """
+    local = await get_local_page(location_id, arrival_date, departure_date, page, sortBy, filters)
+    if local is not None:
+        return local
+
     params = {
         "locationId": location_id,
         "checkinDate": arrival_date,
@@ -61,9 +114,24 @@ async def get_hotels_data(location_id: str, arrival_date: str, departure_date: s
         "page": page,
         "sortBy": sortBy
     }
-    # Fetch data from hotel search API with caching
-    data = await cached_get(os.getenv("HOTEL_SEARCH_URL"), params=params, headers=HEADERS, ttl=CACHE_TTL)
-    return data.get("data", [])
+    search_key = f"{location_id}:{arrival_date}:{departure_date}:{page}:{sortBy}"
+
+    # Fetch data from hotel search API with caching; known empty pages are skipped on a cache miss
+    data, data_hash = await cached_get_with_hash(settings.hotel_search_url, params=params, headers=HEADERS, ttl=CACHE_TTL,
+                                                 cache_if=lambda d: bool(d.get("data")),
+                                                 negative=("hotel_search", search_key))
+    if data is None:
+        return [], None
+    hotels = data.get("data") or []
+    await record_page(location_id, arrival_date, departure_date, page, sortBy, hotels)
+    if not hotels:
+        await mark_negative("hotel_search", search_key)
+        return [], None
+
+    # Store incomplete: filter this upstream page only
+    if filters:
+        hotels = await apply_filters(hotels, filters)
+    return hotels, data_hash
 
 
 async def get_hotel_reviews(hotel_id: int, client: httpx.AsyncClient):
@@ -71,90 +139,135 @@ async def get_hotel_reviews(hotel_id: int, client: httpx.AsyncClient):
     Get review scores for a specific hotel ID.
     Results are cached in Redis for 6 hours.
     Limits concurrent requests with a semaphore.
+    If the upstream is down, returns the last known reviews or {"degraded": True}.
     """
     cache_key = f"hotel_reviews:{hotel_id}"
 
-    cached_data = await get_redis_client().get(cache_key)
+    cached_data = await get_cache().get(cache_key)
     if cached_data:
         # Return cached review data if available (decode bytes if needed)
         return json.loads(cached_data.decode() if isinstance(cached_data, bytes) else cached_data)
 
-    async with semaphore:
-        await asyncio.sleep(0.4)
-        params = {"hotelId": hotel_id}
-        response = await client.get(os.getenv("HOTEL_REVIEW_SCORES_URL"), headers=HEADERS, params=params)
-        response.raise_for_status()
-        data = response.json()
+    url = settings.hotel_review_scores_url
+
+    async def fetch():
+        async with semaphore:
+            await sleep_within_deadline(0.4)
+            params = {"hotelId": hotel_id}
+            response = await guarded_get(client, url, headers=HEADERS, params=params)
+            response.raise_for_status()
+            return response.json()
+
+    try:
+        data = await hedged(url, fetch)
+    except Exception as e:
+        if not is_degradable(e):
+            raise
+        stale = await get_stale(cache_key)
+        return json.loads(stale) if stale else {"degraded": True}
 
     # Cache the review data in Redis for 6 hours
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(data))
+    await cache_with_stale(cache_key, CACHE_TTL, json.dumps(data))
     return data
 
 async def fetch_with_retry(client, url, params=None, max_retries=6):
+    # Every attempt goes through the URL's circuit breaker, so once it opens the
+    # backoff loop stops with CircuitOpenError instead of waiting out all retries
     for attempt in range(max_retries):
         try:
             async with semaphore:
-                response = await client.get(url, headers=HEADERS, params=params)
+                response = await guarded_get(client, url, headers=HEADERS, params=params)
             if response.status_code == 429:
-                await asyncio.sleep(2 ** attempt)  # exponential backoff
+                await sleep_within_deadline(2 ** attempt)  # exponential backoff, never past the deadline
                 continue
             response.raise_for_status()
             return response.json()
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 429:
-                await asyncio.sleep(2 ** attempt)
+                await sleep_within_deadline(2 ** attempt)
                 continue
             raise
-    raise Exception(f"Failed after {max_retries} retries due to 429 for URL: {url}")
+    # Still rate limited after all retries
+    response.raise_for_status()
 
 
+async def fetch_photo_with_retry(client, url, hotel_id, params=None, max_retries=6):
+    """
+    Same retry policy as fetch_with_retry, but streams the photo payload and
+    parses it incrementally, keeping only the main photo path and url prefix.
+    Returns a tuple: (url prefix, photo path)
+    """
+    breaker = get_breaker(url)
+    for attempt in range(max_retries):
+        breaker.check()
+        async with semaphore, deadline_scope():
+            try:
+                async with client.stream("GET", url, headers=HEADERS, params=params) as response:
+                    if is_upstream_failure(response.status_code):
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    if response.status_code != 429:
+                        response.raise_for_status()
+                        return await extract_hotel_photo(response.aiter_bytes(), hotel_id)
+            except httpx.RequestError:
+                breaker.record_failure()
+                raise
+        await sleep_within_deadline(2 ** attempt)  # exponential backoff on 429
+    # Still rate limited after all retries
+    response.raise_for_status()
+
+
+
+def parse_full_detail(cached_data):
+    """
+    Read a cached hotel_full_detail entry back into the full detail dictionary.
+    """
+    cached_dict = json.loads(cached_data.decode() if isinstance(cached_data, bytes) else cached_data)
+    return {
+        "hotel_booking_url": cached_dict.get("hotel_booking_url", ""),
+        "hotel_address": cached_dict.get("hotel_address") or "Address not available",
+        "hotel_photo_url": cached_dict.get("hotel_photo_url", "")
+    }
+
 
 async def get_hotel_full_detail(hotel_id: int, client: httpx.AsyncClient, arrival_date: str, departure_date: str):
     """
     Fetches hotel booking URL, address, spoken languages, and photo URL.
     Caches results in Redis for 6 hours.
+    If an upstream is down, returns the last known details or a partial result marked "degraded".
     """
     cache_key = f"hotel_full_detail:{hotel_id}"
-    cached_data = await get_redis_client().get(cache_key)
+    cached_data = await get_cache().get(cache_key)
     if cached_data:
-        cached_dict = json.loads(cached_data.decode() if isinstance(cached_data, bytes) else cached_data)
+        return parse_full_detail(cached_data)
 
-        data_content = cached_dict.get("data") or {}
-        hotel_booking_url = data_content.get("url", "")
-        hotel_address = data_content.get("hotel_address_line", "Address not available")
-        spoken_lang = data_content.get("spoken_languages", [])
-        hotel_photo_url = cached_dict.get("hotel_photo_url", "")
+    try:
+        # --- Fetch hotel details ---
+        details_params = {"hotelId": hotel_id, "checkinDate": arrival_date, "checkoutDate": departure_date}
+        details_url = settings.hotel_details_url
+        details_data = await hedged(details_url, lambda: fetch_with_retry(client, details_url, details_params))
+        data_content = details_data.get("data")
+        hotel_booking_url = data_content.get("url")
+        hotel_address = data_content.get("hotel_address_line")
+
+        # --- Fetch hotel photo (streamed, only data.data[hotel_id][0][4][5] and url_prefix are parsed) ---
+        photo_params = {"hotelId": hotel_id}
+        base_url, hotel_photo = await fetch_photo_with_retry(client, settings.hotel_photo_url, hotel_id, photo_params)
+        hotel_photo_url = base_url + hotel_photo
+    except Exception as e:
+        if not is_degradable(e):
+            raise
+        stale = await get_stale(cache_key)
+        if stale:
+            return parse_full_detail(stale)
         return {
-            "hotel_booking_url": hotel_booking_url,
-            "hotel_address": hotel_address,
-            "spoken_languages": spoken_lang,
-            "hotel_photo_url": hotel_photo_url
+            "hotel_booking_url": None,
+            "hotel_address": None,
+            "hotel_photo_url": None,
+            "degraded": True
         }
 
-
-    # --- Fetch hotel details ---
-    details_params = {"hotelId": hotel_id, "checkinDate": arrival_date, "checkoutDate": departure_date}
-    details_data = await fetch_with_retry(client, os.getenv("HOTEL_DETAILS_URL"), details_params)
-    # print(details_data)
-    data_content = details_data.get("data")
-    # print(data_content)
-    hotel_booking_url = data_content.get("url")
-    # print(hotel_booking_url)
-    hotel_address = data_content.get("hotel_address_line")
-    # print(hotel_address)
-
-
-    # --- Fetch hotel photo ---
-    photo_params = {"hotelId": hotel_id}
-    photo_data = await fetch_with_retry(client, os.getenv("HOTEL_PHOTO_URL"), photo_params)
-    try:
-        hotel_photo = photo_data.get("data", {}).get("data", {}).get(str(hotel_id), [[[],[],[],[],[]]])[0][4][5]
-        base_url = photo_data.get("data", {}).get("url_prefix", "")
-    except (KeyError, IndexError, TypeError):
-        hotel_photo = ""
-        base_url = ""
-    hotel_photo_url = base_url + hotel_photo
-
     full_detail = {
         "hotel_booking_url": hotel_booking_url,
         "hotel_address": hotel_address,
@@ -162,17 +275,90 @@ async def get_hotel_full_detail(hotel_id: int, client: httpx.AsyncClient, arriva
     }
 
     #Cache for 6 hours
-    await get_redis_client().setex(cache_key, CACHE_TTL, json.dumps(full_detail))
+    await cache_with_stale(cache_key, CACHE_TTL, json.dumps(full_detail))
     return full_detail
 
 
-# ===== Build hotel info =====
-async def assemble_hotel_info(hotel, review_scores, hotel_booking_url, hotel_photo_url, hotel_address, base_currency_code: str, base_currency_date: str):
+async def get_cached_enrichment(hotel_ids, reviews: bool = True, full_details: bool = True):
     """
-    Build a detailed dictionary of hotel info, including price converted to BHD,
-    check-in/out times, and categorized review scores.
+    Look up cached reviews and full details for many hotels with a single MGET.
+    Returns {hotel_id: {"reviews": ..., "full_details": ...}} with None for anything
+    not cached or not asked for (reviews / full_details False).
+    """
+    parts = [part for part, wanted in (("reviews", reviews), ("full_details", full_details)) if wanted]
+    enrichment = {hotel_id: {"reviews": None, "full_details": None} for hotel_id in hotel_ids}
+    if not hotel_ids or not parts:
+        return enrichment
+
+    keys = [f"{ENRICHMENT_PREFIXES[part]}:{hotel_id}" for hotel_id in hotel_ids for part in parts]
+    values = iter(await get_cache().get_many(keys))
+    for hotel_id in hotel_ids:
+        for part in parts:
+            cached = next(values)
+            if cached:
+                enrichment[hotel_id][part] = json.loads(cached) if part == "reviews" else parse_full_detail(cached)
+    return enrichment
+
+
+async def enrich_hotels(hotel_ids, client: httpx.AsyncClient, arrival_date: str, departure_date: str,
+                        reviews: bool = True, full_details: bool = True, fair_key=None):
+    """
+    Get reviews and full details for the requested hotels only.
+    Starts from one batched cache lookup, then fetches whatever is missing
+    with at most HOTEL_DETAIL_CONCURRENCY hotels in flight overall, shared
+    fairly between calls (or between fair_key flows). Parts switched off
+    (e.g. by a sparse fieldset) are neither looked up nor fetched.
+    """
+    enrichment = await get_cached_enrichment(hotel_ids, reviews, full_details)
+    fair_key = fair_key if fair_key is not None else object()
+
+    async def fill(hotel_id):
+        entry = enrichment[hotel_id]
+        missing_reviews = reviews and entry["reviews"] is None
+        missing_details = full_details and entry["full_details"] is None
+        if not (missing_reviews or missing_details):
+            return
+        async with detail_queue.slot(fair_key):
+            if missing_reviews:
+                entry["reviews"] = await get_hotel_reviews(hotel_id, client)
+            if missing_details:
+                entry["full_details"] = await get_hotel_full_detail(hotel_id, client, arrival_date, departure_date)
+
+    await asyncio.gather(*[fill(hotel_id) for hotel_id in enrichment])
+    return enrichment
+
+
+async def build_hotel_infos(hotels, enrichment, base_currency_code: str, base_currency_date: str, fields=None):
     """
-    score_percentages = review_scores.get("data", {}).get("score_percentage", [])
+    Assemble hotel info for a listing page, using whatever enrichment is available.
+    Hotels without reviews or full details keep those fields empty.
+    With a sparse fieldset only the requested fields are returned.
+    """
+    hotel_infos = []
+    for hotel in hotels:
+        entry = enrichment.get(hotel["id"]) or {}
+        full_details = entry.get("full_details") or {}
+        info = await assemble_hotel_info(
+            hotel,
+            entry.get("reviews") or {},
+            full_details.get("hotel_booking_url"),
+            full_details.get("hotel_photo_url"),
+            full_details.get("hotel_address"),
+            base_currency_code,
+            base_currency_date,
+            fields
+        )
+        if is_degraded(entry):
+            info["degraded"] = True
+        hotel_infos.append(select(info, fields))
+    return hotel_infos
+
+
+def build_review_breakdown(review_scores):
+    """
+    Categorize review score percentages into the five review buckets.
+    """
+    score_percentages = (review_scores or {}).get("data", {}).get("score_percentage", [])
 
     def safe_score(index):
         if len(score_percentages) > index:
@@ -182,11 +368,52 @@ async def assemble_hotel_info(hotel, review_scores, hotel_booking_url, hotel_pho
             }
         return {"percent": None, "count": None}
 
+    return {
+        "Wonderful": safe_score(0),
+        "Good": safe_score(1),
+        "Okay": safe_score(2),
+        "Poor": safe_score(3),
+        "Very Poor": safe_score(4),
+    }
+
+
+def is_degraded(entry):
+    """
+    True if any part of a hotel's enrichment is a partial result served while an upstream was down.
+    """
+    return any((entry.get(part) or {}).get("degraded") for part in ("reviews", "full_details"))
+
+
+def build_hotel_detail(hotel_id, entry):
+    """
+    Build the enrichment-only view of a hotel returned by /hotel/details.
+    """
+    full_details = entry.get("full_details") or {}
+    detail = {
+        "hotel_id": hotel_id,
+        "hotel_address": full_details.get("hotel_address"),
+        "hotel_booking_url": full_details.get("hotel_booking_url"),
+        "hotel_photo_url": full_details.get("hotel_photo_url"),
+        "score": build_review_breakdown(entry.get("reviews")),
+    }
+    if is_degraded(entry):
+        detail["degraded"] = True
+    return detail
+
+
+# ===== Build hotel info =====
+async def assemble_hotel_info(hotel, review_scores, hotel_booking_url, hotel_photo_url, hotel_address, base_currency_code: str, base_currency_date: str,
+                              fields=None):
+    """
+    Build a detailed dictionary of hotel info, including price converted to BHD,
+    check-in/out times, and categorized review scores.
+    The BHD conversion is skipped when `fields` excludes the converted price.
+    """
     price = hotel.get("priceBreakdown", {}).get("grossPrice", {}).get("value")
     currency = hotel.get("priceBreakdown", {}).get("grossPrice", {}).get("currency")
 
     price_in_bhd = None
-    if price is not None and currency:
+    if price is not None and currency and wants(fields, "local_price", "currency"):
         price_in_bhd = await ExchangeRateService.convert_to_bhd(price, currency)
 
     return {
@@ -209,13 +436,7 @@ async def assemble_hotel_info(hotel, review_scores, hotel_booking_url, hotel_pho
             "from": hotel.get("checkout", {}).get("fromTime"),
             "until": hotel.get("checkout", {}).get("untilTime"),
         },
-        "score": {
-            "Wonderful": safe_score(0),
-            "Good": safe_score(1),
-            "Okay": safe_score(2),
-            "Poor": safe_score(3),
-            "Very Poor": safe_score(4),
-        }
+        "score": build_review_breakdown(review_scores)
     }
 
 
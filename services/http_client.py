@@ -1,35 +1,124 @@
 import json, httpx, asyncio
-from redis.exceptions import ConnectionError, RedisError
-from config.redis_client import get_redis_client
+from typing import Union
+from config.cache import get_cache
+from config.http_pool import get_http_client
+from services.circuit_breaker import CircuitOpenError, guarded_get, is_upstream_failure
+from config.deadline import DeadlineExceeded, sleep_within_deadline
+from services.hedging import hedged
+from services.etag import content_hash
+from services.json_codec import decode
+from services.negative_cache import is_negative
+from config.settings import get_settings
+
+settings = get_settings()
 
 semaphore = asyncio.Semaphore(3)
 
-async def cached_get(url: str, params=None, headers=None, ttl: int = 3600):
+async def cache_with_stale(cache_key: str, ttl: int, value: Union[str, bytes], value_hash: str = None):
+    """
+    Write a cache entry that is fresh for `ttl` and then still served by
+    get_stale() while its upstream is down (one stored copy, see
+    config.cache.with_soft_expiry), and its content hash under hash:<cache_key> when given.
+    """
+    entries = [(cache_key, value, ttl, True)]
+    if value_hash:
+        entries.append((f"hash:{cache_key}", value_hash, ttl))
+    await get_cache().set_many(entries)
+
+
+async def get_with_hash(cache_key: str):
+    """
+    Read a cache entry and its stored content hash in one round trip.
+    Returns a tuple: (raw value or None, hash or None). Entries written without
+    a hash get one computed from the raw value.
+    """
+    value, value_hash = await get_cache().get_many([cache_key, f"hash:{cache_key}"])
+    if value and not value_hash:
+        value_hash = content_hash(value)
+    return value, value_hash
+
+
+async def get_stale(cache_key: str):
+    """
+    Return the last known value of a cache entry even if it expired, or None.
+    """
+    try:
+        return await get_cache().get_stale(cache_key)
+    except DeadlineExceeded:
+        return None
+
+
+def is_degradable(error: Exception) -> bool:
+    """
+    True for errors where serving stale or partial data beats failing the request:
+    open breakers, network errors, rate limiting, upstream 5xx and an exhausted deadline.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return is_upstream_failure(error.response.status_code)
+    return isinstance(error, (CircuitOpenError, httpx.RequestError, DeadlineExceeded))
+
+async def cached_get(url: str, params=None, headers=None, ttl: int = 3600, cache_if=None, persist_raw: bool = True):
+    # cache_if: optional predicate on the decoded response, e.g. to keep empty
+    # results out of the long-lived cache (callers negative-cache those instead)
+    # persist_raw=False: derived-result mode for callers that cache their own
+    # projection of the response; the raw response is neither read from nor written to http_cache
+    data, _ = await cached_get_with_hash(url, params, headers, ttl, cache_if, persist_raw)
+    return data
+
+
+async def cached_get_with_hash(url: str, params=None, headers=None, ttl: int = 3600, cache_if=None,
+                               persist_raw: bool = True, negative=None):
+    """
+    cached_get that also returns the content hash stored alongside the cached response.
+    Returns a tuple: (data, content hash); the hash is None with persist_raw=False.
+    negative: optional (kind, key) negative-cache entry, checked only on a cache
+    miss; when it is set the upstream is skipped and (None, None) returned.
+    """
     cache_key = f"http_cache:{url}:{json.dumps(params, sort_keys=True)}"
-    redis_client = get_redis_client()
 
     # Try to get cached data
-    try:
-        cached_data = await redis_client.get(cache_key)
+    if persist_raw:
+        cached_data, cached_hash = await get_with_hash(cache_key)
         if cached_data:
-            return json.loads(cached_data)
-    except (ConnectionError, RedisError) as e:
-        print(f"Redis unavailable, using API: {e}")
-
-    # Limit concurrent HTTP requests
-    async with semaphore:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.get(url, headers=headers, params=params)
+            return await decode(cached_data), cached_hash
+
+    if negative is not None and await is_negative(*negative):
+        return None, None
+
+    async def fetch():
+        # Limit concurrent HTTP requests
+        async with semaphore:
+            client = get_http_client()
+            response = await guarded_get(client, url, headers=headers, params=params)
             if response.status_code == 429:  # Too Many Requests
-                await asyncio.sleep(2)
-                response = await client.get(url, headers=headers, params=params)
+                await sleep_within_deadline(2)
+                response = await guarded_get(client, url, headers=headers, params=params)
             response.raise_for_status()
-            data = response.json()
+            return response.content
 
-    # Try to cache data, ignore failures
     try:
-        await redis_client.setex(cache_key, ttl, json.dumps(data))
-    except (ConnectionError, RedisError) as e:
-        print(f"Failed to write cache: {e}")
+        # Idempotent GET: may be hedged with a second attempt after the observed p95
+        raw = await hedged(url, fetch)
+    except Exception as e:
+        # Upstream down or breaker open: fall back to the last known value if we have one
+        if not is_degradable(e) or not persist_raw:
+            raise
+        stale = await get_stale(cache_key)
+        if stale is None:
+            raise
+        return await decode(stale), content_hash(stale)
 
-    return data
+    # Large search payloads are decoded off the event loop
+    data = await decode(raw)
+    if not persist_raw:
+        return data, None
+
+    # The upstream bytes are cached as they came, never re-encoded
+    data_hash = content_hash(raw)
+    if cache_if is not None and not cache_if(data):
+        return data, data_hash
+
+    # Cache data (falls back to the in-memory store if Redis is down)
+    await cache_with_stale(cache_key, ttl, raw, data_hash)
+
+    return data, data_hash
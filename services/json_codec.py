@@ -0,0 +1,51 @@
+import asyncio
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Payloads at least this large are decoded/encoded in a worker thread instead of on the event loop
+OFFLOAD_BYTES = settings.json_offload_bytes
+
+# Few workers on purpose: decoding holds the GIL, so more parallel decodes only
+# take more turns away from the event loop instead of finishing sooner
+executor = ThreadPoolExecutor(max_workers=settings.json_offload_workers, thread_name_prefix="json")
+
+
+async def offload(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def loads(raw):
+    """
+    Decode JSON from str or bytes (orjson, several times faster than json.loads).
+    """
+    return orjson.loads(raw)
+
+
+def dumps(data) -> str:
+    """
+    Encode to a JSON string. Non-string dict keys are stringified like json.dumps does.
+    """
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def decode(raw):
+    """
+    loads() that moves payloads of OFFLOAD_BYTES or more off the event loop,
+    so one large upstream response does not stall every other request.
+    """
+    if len(raw) >= OFFLOAD_BYTES:
+        return await offload(loads, raw)
+    return loads(raw)
+
+
+async def encode(data, size_hint: int = 0) -> str:
+    """
+    dumps() in a worker thread when the caller knows the result is large,
+    e.g. from the size of the upstream payload it was decoded from.
+    """
+    if size_hint >= OFFLOAD_BYTES:
+        return await offload(dumps, data)
+    return dumps(data)
@@ -0,0 +1,116 @@
+import time
+from collections import defaultdict
+from redis.exceptions import RedisError
+from config.cache import get_cache
+from config.redis_client import get_redis_client
+from config.settings import get_settings
+
+settings = get_settings()
+
+# Unknown cities and empty searches are remembered for a short time only
+NEGATIVE_CACHE_TTL = settings.negative_cache_ttl
+
+# Upper bound on live negative entries, so junk lookups cannot flood Redis memory
+NEGATIVE_CACHE_MAX_KEYS = settings.negative_cache_max_keys
+
+# Sorted set of live negative keys scored by expiry time, and hash of counters
+INDEX_KEY = "negative:index"
+STATS_KEY = "negative:stats"
+
+
+# Hit/miss counters since the last flush_negative_stats(), by "<kind>:<counter>"
+_stats = defaultdict(int)
+
+
+def negative_key(kind: str, key: str) -> str:
+    return f"negative:{kind}:{str(key).strip().lower()}"
+
+
+async def is_negative(kind: str, key: str) -> bool:
+    """
+    True if `key` is known to have no result for lookup `kind` (e.g. "hotel_location").
+    Lives in Redis only: while the cache backend is on its in-memory fallback nothing is negative.
+    """
+    cache = get_cache()
+    if not cache.redis_available():
+        return False
+    try:
+        found = bool(await get_redis_client().exists(negative_key(kind, key)))
+        # Counted locally and added to STATS_KEY by flush_negative_stats(), off the hot path
+        _stats[f"{kind}:{'hits' if found else 'misses'}"] += 1
+        return found
+    except (RedisError, OSError) as e:
+        cache.record_failure(e)
+        return False
+
+
+async def mark_negative(kind: str, key: str) -> bool:
+    """
+    Remember that `key` has no result for lookup `kind` for NEGATIVE_CACHE_TTL seconds.
+    Returns False without storing anything once NEGATIVE_CACHE_MAX_KEYS entries are live.
+    """
+    cache = get_cache()
+    if not cache.redis_available():
+        return False
+    full_key = negative_key(kind, key)
+    now = time.time()
+    redis_client = get_redis_client()
+    try:
+        # Drop expired entries from the index before counting
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(INDEX_KEY, 0, now)
+            pipe.zcard(INDEX_KEY)
+            _, live_keys = await pipe.execute()
+
+        if live_keys >= NEGATIVE_CACHE_MAX_KEYS:
+            await redis_client.hincrby(STATS_KEY, f"{kind}:rejected", 1)
+            return False
+
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(full_key, NEGATIVE_CACHE_TTL, "1")
+            pipe.zadd(INDEX_KEY, {full_key: now + NEGATIVE_CACHE_TTL})
+            pipe.expire(INDEX_KEY, NEGATIVE_CACHE_TTL)
+            pipe.hincrby(STATS_KEY, f"{kind}:stores", 1)
+            await pipe.execute()
+        return True
+    except (RedisError, OSError) as e:
+        cache.record_failure(e)
+        return False
+
+
+async def flush_negative_stats():
+    """
+    Add the local hit/miss counters to the shared STATS_KEY hash and reset them.
+    """
+    global _stats
+    stats, _stats = _stats, defaultdict(int)
+    cache = get_cache()
+    if not stats or not cache.redis_available():
+        return
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            for field, count in stats.items():
+                pipe.hincrby(STATS_KEY, field, count)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        cache.record_failure(e)
+
+
+async def get_negative_cache_stats() -> dict:
+    """
+    Counters (hits, misses, stores, rejected) per lookup kind, plus the number of live entries.
+    """
+    await flush_negative_stats()
+    redis_client = get_redis_client()
+    await redis_client.zremrangebyscore(INDEX_KEY, 0, time.time())
+
+    kinds = {}
+    for field, value in (await redis_client.hgetall(STATS_KEY)).items():
+        kind, counter = field.rsplit(":", 1)
+        kinds.setdefault(kind, {"hits": 0, "misses": 0, "stores": 0, "rejected": 0})[counter] = int(value)
+
+    return {
+        "live_keys": await redis_client.zcard(INDEX_KEY),
+        "max_keys": NEGATIVE_CACHE_MAX_KEYS,
+        "kinds": kinds,
+    }
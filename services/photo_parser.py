@@ -0,0 +1,148 @@
+import json, re
+import ijson
+
+# Matches the url_prefix key and its string value in raw JSON bytes. An unescaped
+# '"url_prefix"' followed by ':' can only be an object key, never part of a value.
+URL_PREFIX_PATTERN = re.compile(rb'"url_prefix"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+# Bytes kept between chunks while scanning, enough for the key and a long URL
+SCAN_TAIL_BYTES = 4096
+
+# Chunks are tokenized in slices of this size so we can stop right after the photo
+PARSE_SLICE_BYTES = 4096
+
+
+class HotelPhotoExtractor:
+    """
+    Incrementally parse a HOTEL_PHOTO_URL response body and keep only the two
+    values we use: data.url_prefix and the main photo path at
+    data.data[hotel_id][0][4][5]. Nothing else in the payload is materialized.
+
+    The photo sits at the start of the hotel's photo list, so once it is found
+    the event parser is dropped and the rest of the body is only scanned for
+    url_prefix, which is much cheaper than tokenizing every remaining photo.
+    """
+
+    # Array indexes of the main photo path inside the hotel's photo list
+    PHOTO_PATH = [0, 4, 5]
+
+    def __init__(self, hotel_id):
+        self.photos_prefix = f"data.data.{hotel_id}"
+        self.url_prefix = None
+        self.photo_path = None
+        self.photos_done = False
+
+        # Stack of [container type, current index] while inside the hotel's photo list
+        self._stack = None
+
+        self._events = ijson.sendable_list()
+        self._coro = ijson.parse_coro(self._events)
+
+        # Raw bytes carried over between chunks once we switch to scanning
+        self._tail = None
+
+    @property
+    def done(self):
+        # Both values found, or the photo list ended and the prefix is known
+        return self.url_prefix is not None and self.photos_done
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Feed the next chunk of the body. Returns True once nothing more is needed.
+        """
+        if self._tail is not None:
+            self._scan(chunk)
+            return self.done
+
+        for start in range(0, len(chunk), PARSE_SLICE_BYTES):
+            end = start + PARSE_SLICE_BYTES
+            self._coro.send(chunk[start:end])
+            for prefix, event, value in self._events:
+                self._handle(prefix, event, value)
+            del self._events[:]
+
+            if self.photos_done:
+                if self.url_prefix is None:
+                    # Photo found before url_prefix: stop tokenizing, scan the raw bytes instead
+                    self.close()
+                    self._tail = chunk[max(end - SCAN_TAIL_BYTES, 0):end]
+                    self._scan(chunk[end:])
+                break
+        return self.done
+
+    def close(self):
+        if self._coro is None:
+            return
+        try:
+            self._coro.close()
+        except ijson.IncompleteJSONError:
+            # We may stop reading before the end of the document
+            pass
+        self._coro = None
+
+    def _scan(self, chunk: bytes):
+        buffer = self._tail + chunk
+        match = URL_PREFIX_PATTERN.search(buffer)
+        if match:
+            self.url_prefix = json.loads(b'"' + match.group(1) + b'"')
+        else:
+            self._tail = buffer[-SCAN_TAIL_BYTES:]
+
+    def result(self):
+        """
+        Returns a tuple: (url prefix, photo path), empty strings when not found.
+        """
+        return self.url_prefix or "", self.photo_path or ""
+
+    def _handle(self, prefix, event, value):
+        if event == "string" and prefix == "data.url_prefix":
+            self.url_prefix = value
+            return
+        if self.photos_done:
+            return
+
+        if self._stack is None:
+            if prefix == self.photos_prefix and event == "start_array":
+                self._stack = [["array", -1]]
+            return
+
+        if event in ("end_array", "end_map"):
+            self._stack.pop()
+            if not self._stack:
+                # End of the hotel's photo list
+                self.photos_done = True
+            return
+        if event == "map_key":
+            return
+
+        # Any other event starts a value; count it if its parent is an array
+        parent = self._stack[-1]
+        if parent[0] == "array":
+            parent[1] += 1
+
+        if event in ("start_array", "start_map"):
+            self._stack.append(["array" if event == "start_array" else "map", -1])
+        elif event == "string" and self._current_path() == self.PHOTO_PATH:
+            self.photo_path = value
+            self.photos_done = True
+
+    def _current_path(self):
+        if any(kind != "array" for kind, _ in self._stack):
+            return None
+        return [index for _, index in self._stack]
+
+
+async def extract_hotel_photo(chunks, hotel_id):
+    """
+    Stream an async iterator of body chunks through HotelPhotoExtractor,
+    stopping as soon as the photo path and url prefix are known.
+    Returns a tuple: (url prefix, photo path)
+    """
+    extractor = HotelPhotoExtractor(hotel_id)
+    try:
+        async for chunk in chunks:
+            if extractor.feed(chunk):
+                break
+    finally:
+        extractor.close()
+    return extractor.result()
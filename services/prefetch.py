@@ -0,0 +1,96 @@
+import asyncio, logging
+from config.http_pool import get_http_client
+from config.settings import get_settings
+from config.deadline import interactive_requests, set_deadline
+from services.hotels import enrich_hotels, get_hotels_data
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Global prefetch budget: at most this many prefetches run at once, across all users
+prefetch_budget = asyncio.Semaphore(settings.prefetch_concurrency)
+
+# How often a waiting prefetch checks whether interactive requests are done
+IDLE_POLL_INTERVAL = 0.1
+
+# Prefetches scheduled or running, by (location_id, arrival, departure, page, sort_by, details)
+_pending = set()
+_tasks = set()
+_stats = {"scheduled": 0, "completed": 0, "skipped": 0, "abandoned": 0, "failed": 0}
+
+
+async def wait_for_idle() -> bool:
+    """
+    Wait until no interactive request is in flight. Returns False if that did
+    not happen within PREFETCH_MAX_WAIT seconds.
+    """
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + settings.prefetch_max_wait
+    while interactive_requests() > 0:
+        if loop.time() >= give_up_at:
+            return False
+        await asyncio.sleep(IDLE_POLL_INTERVAL)
+    return True
+
+
+async def prefetch_hotel_page(location_id: str, arrival_date: str, departure_date: str, page: int,
+                              sort_by: str, details: bool):
+    """
+    Warm the cache for one hotel search page: the listing, then (with details)
+    each hotel's enrichment one at a time, stepping aside whenever interactive
+    requests are being served.
+    """
+    client = get_http_client()
+    async with prefetch_budget:
+        if not await wait_for_idle():
+            return False
+
+        # Own budget: the task inherited the deadline of the request that scheduled it
+        set_deadline(settings.prefetch_deadline)
+        hotels = await get_hotels_data(location_id, arrival_date, departure_date, client, page, sort_by)
+        if not details:
+            return True
+
+        for hotel in hotels:
+            if not await wait_for_idle():
+                return False
+            await enrich_hotels([hotel["id"]], client, arrival_date, departure_date)
+    return True
+
+
+def schedule_hotel_prefetch(location_id: str, arrival_date: str, departure_date: str, page: int,
+                            sort_by: str, details: bool):
+    """
+    After serving `page`, prefetch page + 1 of the same search in the background.
+    No-op unless HOTEL_PREFETCH is enabled; skipped if that page is already
+    scheduled or PREFETCH_MAX_PENDING prefetches are queued.
+    """
+    if not settings.hotel_prefetch:
+        return
+
+    key = (location_id, arrival_date, departure_date, page + 1, sort_by, details)
+    if key in _pending or len(_pending) >= settings.prefetch_max_pending:
+        _stats["skipped"] += 1
+        return
+
+    _pending.add(key)
+    _stats["scheduled"] += 1
+    task = asyncio.create_task(prefetch_hotel_page(*key))
+    _tasks.add(task)
+
+    def done(task: asyncio.Task):
+        _tasks.discard(task)
+        _pending.discard(key)
+        if task.cancelled():
+            _stats["abandoned"] += 1
+        elif task.exception() is not None:
+            _stats["failed"] += 1
+            logger.warning("Hotel prefetch of page %s failed: %s", key[3], task.exception())
+        else:
+            _stats["completed" if task.result() else "abandoned"] += 1
+
+    task.add_done_callback(done)
+
+
+def prefetch_stats() -> dict:
+    return {**_stats, "pending": len(_pending), "enabled": settings.hotel_prefetch}
@@ -0,0 +1,20 @@
+import time
+import pytest
+import config.cache
+from config.cache import CacheBackend
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """
+    A fresh cache per test, pinned to its in-memory fallback so tests never touch Redis.
+    """
+    cache = CacheBackend()
+    cache.failures, cache.retry_at = 1, time.monotonic() + 3600
+    monkeypatch.setattr(config.cache, "_cache", cache)
+    return cache
@@ -0,0 +1,50 @@
+import time
+import pytest
+from unittest.mock import AsyncMock
+from services import attractions
+from services.attractions import build_attractions, get_attraction_detail
+from services.circuit_breaker import CircuitOpenError
+
+pytestmark = pytest.mark.anyio
+
+PRODUCTS = {"products": [
+    {"id": "a1", "name": "Museum", "slug": "museum", "representativePrice": {"chargeAmount": 10, "currency": "EUR"}},
+    {"id": "a2", "name": "Tower", "slug": "tower", "representativePrice": {"chargeAmount": 20, "currency": "EUR"}},
+]}
+
+
+@pytest.fixture
+def enrichment(monkeypatch):
+    monkeypatch.setattr(attractions.ExchangeRateService, "get_rates", AsyncMock(return_value={"base_currency": "EUR"}))
+    monkeypatch.setattr(attractions.ExchangeRateService, "convert_to_bhd", AsyncMock(side_effect=lambda price, currency: price))
+    monkeypatch.setattr(attractions, "fetch_availability_data", AsyncMock(return_value=([], [])))
+
+
+async def test_upstream_outage_degrades_one_attraction(monkeypatch, enrichment):
+    async def detail(slug):
+        if slug == "tower":
+            raise CircuitOpenError("attraction_detail", 30)
+        return "A museum"
+    monkeypatch.setattr(attractions, "get_attraction_detail", detail)
+
+    museum, tower = await build_attractions(None, PRODUCTS, "2026-11-01")
+
+    assert museum["attraction_description"] == "A museum" and "degraded" not in museum
+    assert tower["attraction_id"] == "a2" and tower["degraded"] is True
+    assert tower["attraction_price"] is None and tower["attraction_description"] is None
+
+
+async def test_other_errors_still_fail_the_page(monkeypatch, enrichment):
+    monkeypatch.setattr(attractions, "get_attraction_detail", AsyncMock(side_effect=KeyError("data")))
+
+    with pytest.raises(KeyError):
+        await build_attractions(None, PRODUCTS, "2026-11-01")
+
+
+async def test_expired_projection_is_served_while_the_upstream_is_down(monkeypatch):
+    monkeypatch.setattr(attractions, "cached_get", AsyncMock(return_value={"data": {"description": "A museum"}}))
+    assert await get_attraction_detail("museum") == "A museum"
+
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + attractions.CACHE_TTL + 1)
+    monkeypatch.setattr(attractions, "cached_get", AsyncMock(side_effect=CircuitOpenError("attraction_detail", 30)))
+    assert await get_attraction_detail("museum") == "A museum"
@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+import main
+from config.auth import get_admin_user
+from services import cache_admin, negative_cache
+
+
+class DownRedis:
+    """
+    Redis client whose every command fails as if the server were unreachable.
+    """
+
+    def __getattr__(self, name):
+        raise ConnectionError("Error 111 connecting to localhost:6379. Connection refused.")
+
+
+def get_overview():
+    main.app.dependency_overrides[get_admin_user] = lambda: None
+    try:
+        return TestClient(main.app).get("/admin/cache")
+    finally:
+        main.app.dependency_overrides.pop(get_admin_user)
+
+
+def test_overview_reports_memory_fallback_when_redis_fails(memory_cache, monkeypatch):
+    memory_cache.failures = 0
+    monkeypatch.setattr(cache_admin, "get_redis_client", DownRedis)
+    monkeypatch.setattr(negative_cache, "get_redis_client", DownRedis)
+
+    response = get_overview()
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["backend"]["backend"] == "memory" and "Connection refused" in data["backend"]["last_error"]
+    assert data["namespaces"] == {} and data["negative_cache"] == {}
+
+
+def test_overview_skips_redis_while_in_backoff(monkeypatch):
+    monkeypatch.setattr(cache_admin, "get_redis_client", DownRedis)
+
+    response = get_overview()
+
+    assert response.status_code == 200
+    assert response.json()["data"]["backend"]["backend"] == "memory"
@@ -0,0 +1,41 @@
+import gzip
+import pytest
+from config.compression import CompressionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+def json_app(body: bytes, etag: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"etag", etag)]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+async def call(middleware):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    await middleware(scope, None, send)
+    return dict(messages[0]["headers"]), gzip.decompress(messages[1]["body"])
+
+
+async def test_cached_compressed_body_follows_the_body_not_the_etag():
+    middleware = CompressionMiddleware(json_app(b"[" + b"1," * 1000 + b"1]", b'"same"'))
+    _, first = await call(middleware)
+
+    middleware.app = json_app(b"[" + b"2," * 1000 + b"2]", b'"same"')
+    _, second = await call(middleware)
+
+    assert first != second and second.startswith(b"[2,")
+
+
+async def test_compressed_variant_gets_a_weak_etag():
+    middleware = CompressionMiddleware(json_app(b"[" + b"1," * 1000 + b"1]", b'"abc"'))
+    headers, _ = await call(middleware)
+
+    assert headers[b"etag"] == b'W/"abc"' and headers[b"content-encoding"] == b"gzip"
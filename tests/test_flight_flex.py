@@ -0,0 +1,65 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from services import flight_flex, flights, http_client
+from services.flight_flex import get_flex_matrix
+
+pytestmark = pytest.mark.anyio
+
+ROUTE = ("London", "Manama", "2026-11-10", "2026-11-20")
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """
+    Fake round-trip search API: the price is the trip length, searches returning
+    on 2026-11-21 fail. Records the (departDate, returnDate) of every call.
+    """
+    calls = []
+
+    async def guarded_get(client, url, headers=None, params=None, **kwargs):
+        calls.append((params["departDate"], params["returnDate"]))
+        request = httpx.Request("GET", "https://flights.test/searchFlights")
+        if params["returnDate"] == "2026-11-21":
+            raise httpx.ConnectError("upstream unreachable", request=request)
+        days = int(params["returnDate"][-2:]) - int(params["departDate"][-2:])
+        offer = {"token": params["departDate"], "priceBreakdown": {"total": {"units": days, "nanos": 0, "currencyCode": "BHD"}}}
+        return httpx.Response(200, json={"data": {"flightOffers": [offer]}}, request=request)
+
+    monkeypatch.setattr(http_client, "guarded_get", guarded_get)
+    monkeypatch.setattr(flight_flex, "get_airport_info", AsyncMock(side_effect=lambda client, city: (city[:3].upper(), [])))
+    monkeypatch.setattr(flight_flex.ExchangeRateService, "get_rates", AsyncMock(return_value={"base_currency": "BHD"}))
+    monkeypatch.setattr(flight_flex.ExchangeRateService, "convert_to_bhd", AsyncMock(side_effect=lambda price, currency: price))
+    return calls
+
+
+async def test_cells_reuse_the_flight_search_cache(upstream):
+    await flights.search_round_trips(["MAN"], ["LON"], "2026-11-10", "2026-11-20")
+
+    result = await get_flex_matrix(*ROUTE, flex_days=0)
+
+    assert upstream == [("2026-11-10", "2026-11-20")]
+    assert result["matrix"] == [[{"price": 10, "offers": 1}]] and result["complete"]
+
+
+async def test_wide_matrix_fills_over_several_requests(upstream, monkeypatch):
+    monkeypatch.setattr(flight_flex, "FLEX_MAX_SEARCHES", 4)
+
+    first = await get_flex_matrix(*ROUTE, flex_days=1)
+
+    # Nearest cells first: the requested dates, then one day off either date
+    assert len(upstream) == 4 and upstream[0] == ("2026-11-10", "2026-11-20")
+    cells = [cell for row in first["matrix"] for cell in row]
+    assert sum(1 for cell in cells if cell.get("pending")) == 5
+    assert sum(1 for cell in cells if cell.get("degraded")) == 1
+    assert not first["complete"] and first["cheapest"]["price"] == 9
+
+    second = await get_flex_matrix(*ROUTE, flex_days=1)
+    third = await get_flex_matrix(*ROUTE, flex_days=1)
+
+    # Cached cells are never searched again, failing ones are retried (4 + 4 + 4 searches)
+    good = [call for call in upstream if call[1] != "2026-11-21"]
+    assert len(upstream) == 12 and len(good) == len(set(good)) == 6
+    assert not any(cell.get("pending") for row in third["matrix"] for cell in row)
+    assert [cell.get("degraded", False) for row in third["matrix"] for cell in row] == [False, False, True] * 3
+    assert not second["complete"] and not third["complete"] and third["cheapest"]["price"] == 8
@@ -0,0 +1,38 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+import main
+from services import hotel_batch
+from config.deadline import DeadlineExceeded, interactive_requests, remaining
+
+
+def test_batch_legs_count_as_interactive():
+    seen = []
+
+    async def search_leg(client, leg, *args):
+        seen.append((interactive_requests(), remaining()))
+        return [{"hotel_id": 1, "city": leg.city_name}]
+
+    legs = [{"city_name": city, "arrival_date": "2026-11-01", "departure_date": "2026-11-05"} for city in ("Paris", "Rome")]
+    with patch.object(hotel_batch, "search_leg", search_leg), \
+            patch.object(hotel_batch, "resolve_locations", AsyncMock(return_value={"Paris": 1, "Rome": 2})), \
+            patch.object(hotel_batch.ExchangeRateService, "get_rates", AsyncMock(return_value={})):
+        response = TestClient(main.app).post("/hotel/batch", json={"legs": legs, "details": False})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200 and all(line["status"] == "Ok" for line in lines)
+    assert len(seen) == 2
+    assert all(count > 0 and left is not None and left > 0 for count, left in seen)
+    assert interactive_requests() == 0
+
+
+@pytest.mark.parametrize("error, status", [(DeadlineExceeded(), 504), (RuntimeError("rates down"), 500)])
+def test_rates_failure_is_an_error_status_not_a_cut_stream(error, status):
+    legs = [{"city_name": "Paris", "arrival_date": "2026-11-01", "departure_date": "2026-11-05"}]
+    with patch.object(hotel_batch, "resolve_locations", AsyncMock(return_value={"Paris": 1})), \
+            patch.object(hotel_batch.ExchangeRateService, "get_rates", AsyncMock(side_effect=error)):
+        response = TestClient(main.app, raise_server_exceptions=False).post("/hotel/batch", json={"legs": legs})
+
+    assert response.status_code == status
+    assert response.headers["content-type"] != "application/x-ndjson"
@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+from services import http_client
+from services.hotels import get_hotels_page
+
+pytestmark = pytest.mark.anyio
+
+STAY = ("-2092174", "2026-11-01", "2026-11-05")
+
+
+async def test_cached_page_skips_the_negative_cache(monkeypatch):
+    async def guarded_get(client, url, headers=None, params=None, **kwargs):
+        hotels = [{"id": i, "name": f"Hotel {i}"} for i in range(3)]
+        return httpx.Response(200, json={"data": hotels}, request=httpx.Request("GET", "https://hotels.test/search"))
+
+    is_negative = AsyncMock(return_value=False)
+    monkeypatch.setattr(http_client, "guarded_get", guarded_get)
+    monkeypatch.setattr(http_client, "is_negative", is_negative)
+
+    first, _ = await get_hotels_page(*STAY, None, 1, "popularity")
+    second, _ = await get_hotels_page(*STAY, None, 1, "popularity")
+
+    assert first == second and len(second) == 3
+    is_negative.assert_awaited_once()
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from services import hotel_store
+from services.hotel_store import HotelFilters, get_local_page, record_page
+
+pytestmark = pytest.mark.anyio
+
+STAY = ("-2092174", "2026-11-01", "2026-11-05")
+
+
+def hotels(first: int, count: int):
+    return [{"id": i, "name": f"Hotel {i}", "reviewScore": i % 10} for i in range(first, first + count)]
+
+
+async def test_single_short_page_completes_the_store():
+    await record_page(*STAY, 1, "price", hotels(1, 3))
+
+    page, _ = await get_local_page(*STAY, 1, "review_score", HotelFilters())
+    assert [hotel["id"] for hotel in page] == [3, 2, 1]
+
+
+async def test_empty_first_page_is_not_recorded(memory_cache):
+    await record_page(*STAY, 1, "price", [])
+
+    assert await get_local_page(*STAY, 1, "review_score", HotelFilters()) is None
+    assert await memory_cache.hash_get_all(hotel_store.store_key(*STAY)) == {}
+
+
+async def test_empty_page_after_full_ones_ends_the_results():
+    size = hotel_store.PAGE_SIZE
+    await record_page(*STAY, 1, "price", hotels(1, size))
+    await record_page(*STAY, 2, "price", [])
+
+    page, _ = await get_local_page(*STAY, 1, "price", HotelFilters())
+    assert len(page) == size
+
+
+async def test_full_page_alone_is_not_complete():
+    await record_page(*STAY, 1, "price", hotels(1, hotel_store.PAGE_SIZE))
+
+    assert await get_local_page(*STAY, 1, "review_score", HotelFilters()) is None
+
+
+async def test_concurrent_writers_keep_every_page(memory_cache, monkeypatch):
+    # Yield to the other writers around every cache call, as a Redis round trip would
+    for name in ("hash_get", "hash_get_all", "hash_set_nx"):
+        async def round_trip(*args, _call=getattr(memory_cache, name), **kwargs):
+            await asyncio.sleep(0)
+            result = await _call(*args, **kwargs)
+            await asyncio.sleep(0)
+            return result
+        monkeypatch.setattr(memory_cache, name, round_trip)
+
+    size = hotel_store.PAGE_SIZE
+    await asyncio.gather(
+        record_page(*STAY, 2, "price", hotels(size + 1, 5)),
+        record_page(*STAY, 1, "price", hotels(1, size)),
+        record_page(*STAY, 1, "popularity", hotels(1, size)),
+    )
+
+    first, _ = await get_local_page(*STAY, 1, "class_ascending", HotelFilters())
+    second, _ = await get_local_page(*STAY, 2, "class_ascending", HotelFilters())
+    assert len(first) == size and len(second) == 5
+    assert {hotel["id"] for hotel in first + second} == set(range(1, size + 6))
+
+
+async def test_recorded_page_is_not_overwritten():
+    await record_page(*STAY, 1, "price", hotels(1, 2))
+    await record_page(*STAY, 1, "price", hotels(50, 2))
+
+    page, _ = await get_local_page(*STAY, 1, "price", HotelFilters())
+    assert [hotel["id"] for hotel in page] == [1, 2]
@@ -0,0 +1,48 @@
+import time
+import httpx
+import pytest
+from services import http_client
+from services.http_client import cached_get_with_hash
+
+pytestmark = pytest.mark.anyio
+
+URL = "https://hotels.test/search"
+
+
+def respond(status, **kwargs):
+    async def guarded_get(client, url, headers=None, params=None, **_):
+        return httpx.Response(status, request=httpx.Request("GET", url), **kwargs)
+    return guarded_get
+
+
+async def test_expired_entry_is_served_stale_from_the_same_key(monkeypatch, memory_cache):
+    monkeypatch.setattr(http_client, "guarded_get", respond(200, json={"data": [1, 2]}))
+    fresh, fresh_hash = await cached_get_with_hash(URL, {"page": 1}, ttl=60)
+
+    assert not [key for key in memory_cache.memory.entries if key.startswith("stale:")]
+
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + 61)
+    monkeypatch.setattr(http_client, "guarded_get", respond(503))
+    stale, stale_hash = await cached_get_with_hash(URL, {"page": 1}, ttl=60)
+
+    assert stale == fresh == {"data": [1, 2]}
+    assert stale_hash == fresh_hash
+
+
+async def test_expired_entry_is_a_cache_miss(monkeypatch, memory_cache):
+    await http_client.cache_with_stale("http_cache:key", 60, "value")
+    assert await memory_cache.get("http_cache:key") == "value"
+
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + 61)
+    assert await memory_cache.get("http_cache:key") is None
+    assert await memory_cache.get_stale("http_cache:key") == "value"
+
+
+async def test_upstream_bytes_are_cached_as_received(monkeypatch, memory_cache):
+    body = b'{"data": [1, 2],  "note": "caf\\u00e9"}'
+    monkeypatch.setattr(http_client, "guarded_get", respond(200, content=body))
+    data, data_hash = await cached_get_with_hash(URL, {"page": 1}, ttl=60)
+
+    cached, cached_hash = await http_client.get_with_hash(f'http_cache:{URL}:{{"page": 1}}')
+    assert cached == body and cached_hash == data_hash
+    assert data == {"data": [1, 2], "note": "café"}
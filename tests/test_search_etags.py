@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+import main
+
+PARAMS = {"city_name": "Paris", "arrival_date": "2026-11-01", "departure_date": "2026-11-05"}
+SEARCH = {"products": [{"id": "a1", "name": "Museum"}]}
+
+
+def get_attractions(description, etag=None):
+    found = [{"attraction_id": "a1", "attraction_description": description}]
+    with patch.object(main, "get_attraction_autocomplete", AsyncMock(return_value="loc")), \
+            patch.object(main, "get_attractions_search_with_hash", AsyncMock(return_value=(SEARCH, "search-hash"))), \
+            patch.object(main.ExchangeRateService, "get_rates", AsyncMock(return_value={})), \
+            patch.object(main, "build_attractions", AsyncMock(return_value=found)):
+        headers = {"If-None-Match": etag} if etag else {}
+        return TestClient(main.app).get("/attraction", params=PARAMS, headers=headers)
+
+
+def test_attraction_etag_covers_the_enrichment():
+    first = get_attractions("A museum")
+    etag = first.headers["etag"]
+
+    assert get_attractions("A museum", etag).status_code == 304
+
+    changed = get_attractions("A museum, now with a rooftop", etag)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_degraded_attractions_are_not_cacheable():
+    with patch.object(main, "get_attraction_autocomplete", AsyncMock(return_value="loc")), \
+            patch.object(main, "get_attractions_search_with_hash", AsyncMock(return_value=(SEARCH, "search-hash"))), \
+            patch.object(main.ExchangeRateService, "get_rates", AsyncMock(return_value={})), \
+            patch.object(main, "build_attractions", AsyncMock(return_value=[{"attraction_id": "a1", "degraded": True}])):
+        response = TestClient(main.app).get("/attraction", params=PARAMS)
+
+    assert response.status_code == 200 and "etag" not in response.headers
+
+
+def get_hotels(score, etag=None):
+    infos = [{"hotel_id": 1, "score": score}]
+    with patch.object(main, "get_location_id", AsyncMock(return_value="-2092174")), \
+            patch.object(main, "get_hotels_page", AsyncMock(return_value=([{"id": 1}], "page-hash"))), \
+            patch.object(main, "schedule_hotel_prefetch", lambda *args: None), \
+            patch.object(main.ExchangeRateService, "get_rates", AsyncMock(return_value={})), \
+            patch.object(main, "enrich_hotels", AsyncMock(return_value={1: {}})), \
+            patch.object(main, "build_hotel_infos", AsyncMock(return_value=infos)):
+        headers = {"If-None-Match": etag} if etag else {}
+        return TestClient(main.app).get("/hotel", params=PARAMS, headers=headers)
+
+
+def test_hotel_details_etag_covers_the_enrichment():
+    etag = get_hotels({"review_score": 8.1}).headers["etag"]
+
+    assert get_hotels({"review_score": 8.1}, etag).status_code == 304
+    assert get_hotels({"review_score": 8.4}, etag).status_code == 200
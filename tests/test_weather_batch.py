@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from services import general
+from config.deadline import set_deadline
+from services.general import get_weather_batch
+
+pytestmark = pytest.mark.anyio
+
+
+async def fetch_weather(city: str):
+    if city == "rome":
+        return {"location": {}}["current"]  # malformed upstream payload
+    if city == "oslo":
+        await asyncio.sleep(1)
+    if city == "atlantis":
+        raise HTTPException(status_code=400, detail="No matching location found.")
+    return {"city": city.title(), "temperature": 20}
+
+
+async def test_failing_cities_get_error_entries(monkeypatch):
+    monkeypatch.setattr(general, "fetch_weather", fetch_weather)
+    set_deadline(0.2)
+
+    results = await get_weather_batch(["Paris", "Rome", "Oslo", "Atlantis"])
+
+    assert results == [
+        {"city": "Paris", "temperature": 20},
+        {"city": "rome", "error": "Weather data unavailable"},
+        {"city": "oslo", "error": "Request deadline exceeded"},
+        {"city": "atlantis", "error": "No matching location found."},
+    ]
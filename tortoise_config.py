@@ -1,20 +1,18 @@
-import os
-from dotenv import load_dotenv
+from config.settings import get_settings
 
-# Load environment variables from .env file before accessing them
-load_dotenv() 
+settings = get_settings()
 
 TORTOISE_ORM = {
  "connections": {
     "default": {
-        "engine": os.getenv("NEON_ENGINE"),
+        "engine": settings.neon_engine,
         "credentials": {
-            "host": os.getenv("NEON_HOST"),
-            "port": int(os.getenv("NEON_PORT")),
-            "user": os.getenv("NEON_USER"),
-            "password": os.getenv("NEON_PASSWORD"),
-            "database": os.getenv("NEON_DATABASE"),
-            "ssl": bool(os.getenv("NEON_SSL")),
+            "host": settings.neon_host,
+            "port": settings.neon_port,
+            "user": settings.neon_user,
+            "password": settings.neon_password,
+            "database": settings.neon_database,
+            "ssl": bool(settings.neon_ssl),
             "server_settings": {"channel_binding": "require"},
         },
     }